@@ -0,0 +1,47 @@
+import React from 'react';
+
+const WIDTH = 320;
+const HEIGHT = 200;
+const PADDING = 24;
+
+// Draws a histogram with its KDE curve from /analyze?mode=data chart JSON.
+const DistributionChart = ({ chart }) => {
+  if (!chart.bins) {
+    return <p className="text-sm text-gray-500">No values in {chart.column}</p>;
+  }
+
+  const { edges, counts } = chart.bins;
+  const xMin = edges[0];
+  const xMax = edges[edges.length - 1];
+  const yMax = Math.max(...counts, ...(chart.kde ? chart.kde.y : [0])) || 1;
+  const scaleX = (x) => PADDING + ((x - xMin) / (xMax - xMin || 1)) * (WIDTH - 2 * PADDING);
+  const scaleY = (y) => HEIGHT - PADDING - (y / yMax) * (HEIGHT - 2 * PADDING);
+
+  const kdePath = chart.kde
+    ? chart.kde.x.map((x, i) => `${i === 0 ? 'M' : 'L'}${scaleX(x)},${scaleY(chart.kde.y[i])}`).join(' ')
+    : null;
+
+  return (
+    <svg viewBox={`0 0 ${WIDTH} ${HEIGHT}`} className="w-full h-auto" role="img"
+         aria-label={`Distribution of ${chart.column}`}>
+      {counts.map((count, i) => (
+        <rect
+          key={i}
+          x={scaleX(edges[i])}
+          y={scaleY(count)}
+          width={Math.max(scaleX(edges[i + 1]) - scaleX(edges[i]) - 1, 1)}
+          height={HEIGHT - PADDING - scaleY(count)}
+          className="fill-blue-400"
+        />
+      ))}
+      {kdePath && <path d={kdePath} fill="none" className="stroke-blue-800" strokeWidth="2" />}
+      <line x1={PADDING} y1={HEIGHT - PADDING} x2={WIDTH - PADDING} y2={HEIGHT - PADDING}
+            className="stroke-gray-400" />
+      <text x={PADDING} y={HEIGHT - 6} fontSize="10" className="fill-gray-600">{xMin}</text>
+      <text x={WIDTH - PADDING} y={HEIGHT - 6} fontSize="10" textAnchor="end"
+            className="fill-gray-600">{xMax}</text>
+    </svg>
+  );
+};
+
+export default DistributionChart;
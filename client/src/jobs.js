@@ -0,0 +1,31 @@
+// Polls a background job started by /train-models or /run-predictions
+// until it finishes, reporting per-model progress along the way.
+export const waitForJob = async (submitResponse, onProgress, intervalMs = 2000) => {
+  const submitted = await submitResponse.json();
+  if (!submitResponse.ok) {
+    throw new Error(submitted.error || 'Failed to start job');
+  }
+
+  for (;;) {
+    const response = await fetch(submitted.status_url);
+    const job = await response.json();
+    if (!response.ok) {
+      throw new Error(job.error || 'Failed to fetch job status');
+    }
+    if (onProgress) {
+      onProgress(job.progress);
+    }
+    if (job.status === 'completed') {
+      return job.results;
+    }
+    if (job.status === 'failed') {
+      throw new Error(job.error || 'Job failed');
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+};
+
+export const formatProgress = (progress) =>
+  Object.entries(progress || {})
+    .map(([model, state]) => `${model}: ${state}`)
+    .join(', ');
@@ -7,19 +7,20 @@ const Analysis = () => {
   const [data, setData] = useState(null);
   const [message, setMessage] = useState('');
 
-  useEffect(() => {
-    // Fetch current data state
-    const fetchData = async () => {
-      try {
-        const response = await fetch('/current-data');
-        if (response.ok) {
-          const result = await response.json();
-          setData(result.data);
-        }
-      } catch (error) {
-        setMessage('Error fetching data: ' + error.message);
+  // Fetch current data state
+  const fetchData = async () => {
+    try {
+      const response = await fetch('/current-data?limit=5');
+      if (response.ok) {
+        const result = await response.json();
+        setData(result.data);
       }
-    };
+    } catch (error) {
+      setMessage('Error fetching data: ' + error.message);
+    }
+  };
+
+  useEffect(() => {
     fetchData();
   }, []);
 
@@ -42,8 +43,7 @@ const Analysis = () => {
       });
 
       if (response.ok) {
-        const result = await response.json();
-        setData(result.data);
+        await fetchData();
         setMessage('Columns removed successfully');
         setSelectedColumns([]);
       }
@@ -68,20 +68,33 @@ const Analysis = () => {
       });
 
       if (response.ok) {
-        const result = await response.json();
-        setData(result.data);
+        await fetchData();
         setMessage(`Null values handled with ${action}`);
-
-        // Store processed filename for model training
-        if (result.processed_file) {
-          sessionStorage.setItem('processedFile', result.processed_file);
-        }
+      } else {
+        const result = await response.json();
+        setMessage(result.error);
       }
     } catch (error) {
       setMessage('Error handling null values: ' + error.message);
     }
   };
 
+  // Step back or forward through the recorded cleaning steps
+  const handleHistory = async (direction) => {
+    try {
+      const response = await fetch(`/cleaning/${direction}`, { method: 'POST' });
+      const result = await response.json();
+      if (response.ok) {
+        await fetchData();
+        setMessage(`Now at version ${result.current}`);
+      } else {
+        setMessage(result.error);
+      }
+    } catch (error) {
+      setMessage(`Error during ${direction}: ` + error.message);
+    }
+  };
+
   return (
     <div className="min-h-screen flex flex-col bg-gray-100">
       <header className="bg-black text-white px-6 py-4 flex justify-between items-center border-b border-gray-700">
@@ -162,6 +175,22 @@ const Analysis = () => {
                       Fill with Mode
                     </button>
                   </div>
+
+                  <div className="flex gap-4">
+                    <button
+                      onClick={() => handleHistory('undo')}
+                      className="flex-1 bg-gray-600 text-white px-6 py-3 rounded-lg hover:bg-gray-700 transition-colors"
+                    >
+                      Undo
+                    </button>
+
+                    <button
+                      onClick={() => handleHistory('redo')}
+                      className="flex-1 bg-gray-600 text-white px-6 py-3 rounded-lg hover:bg-gray-700 transition-colors"
+                    >
+                      Redo
+                    </button>
+                  </div>
                 </div>
               </div>
 
@@ -183,7 +212,7 @@ const Analysis = () => {
 
                       if (response.ok) {
                         const result = await response.json();
-                        setMessage('Data saved successfully to cleansed_data directory');
+                        setMessage(`Data saved to cleansed_data/${result.filename}`);
                       } else {
                         setMessage('Error saving data');
                       }
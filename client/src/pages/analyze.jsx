@@ -1,31 +1,32 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import './layout.css';
+import DistributionChart from '../DistributionChart';
 
 const Analyze = () => {
-  const [images, setImages] = useState([]);
+  const [charts, setCharts] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [correlationMetrics, setCorrelationMetrics] = useState(null);
 
   useEffect(() => {
-    const fetchImages = async () => {
+    const fetchCharts = async () => {
       try {
         setLoading(true);
-        const res = await fetch('/images');
+        // Chart data mode: the server returns bin counts and KDE curves
+        // instead of rendering a PNG per column
+        const res = await fetch('/analyze?mode=data');
+        const data = await res.json();
 
         if (!res.ok) {
-          throw new Error('Failed to fetch image list from server');
+          throw new Error(data.error || 'Failed to fetch chart data from server');
         }
-
-        const data = await res.json();
-        if (!data.images || !Array.isArray(data.images) || data.images.length === 0) {
-          throw new Error('No images found. Run analysis first.');
+        if (!data.charts || data.charts.length === 0) {
+          throw new Error('No numeric columns to chart. Upload a dataset first.');
         }
 
-        const imageUrls = data.images.map(filename => `/images/${filename}`);
-        console.log('Found images:', imageUrls);
-        setImages(imageUrls);
+        setCharts(data.charts);
+        setCorrelationMetrics(data.correlation_metrics);
       } catch (err) {
         console.error('Error:', err.message);
         setError(err.message || 'Something went wrong');
@@ -34,7 +35,7 @@ const Analyze = () => {
       }
     };
 
-    fetchImages();
+    fetchCharts();
   }, []);
 
   return (
@@ -55,25 +56,15 @@ const Analyze = () => {
         <h2 className="text-3xl font-semibold text-center mb-6">Generated Analysis Charts</h2>
 
         {loading && (
-          <p className="text-blue-600 text-center">Loading images...</p>
+          <p className="text-blue-600 text-center">Loading charts...</p>
         )}
 
         {error && (
           <p className="text-red-600 text-center">{error}</p>
         )}
 
-        {!loading && !error && images.length > 0 && (
+        {!loading && !error && charts.length > 0 && (
           <>
-            <div className="mb-8">
-              <h3 className="text-xl font-semibold mb-4">Correlation Heatmap</h3>
-              <div className="bg-white rounded shadow p-4">
-                <img
-                  src="/images/correlation_heatmap.png"
-                  alt="Correlation Heatmap"
-                  className="w-full h-auto rounded object-contain"
-                />
-              </div>
-            </div>
             {correlationMetrics && (
               <div className="mb-8">
                 <h3 className="text-xl font-semibold mb-4">Correlation Metrics</h3>
@@ -84,16 +75,11 @@ const Analyze = () => {
             )}
             <h3 className="text-xl font-semibold mb-4">Distribution Charts</h3>
             <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-6">
-            {images.map((src, index) => (
-              <div key={index} className="bg-white rounded shadow p-4">
-                <img
-                  src={src}
-                  alt={`Chart ${index + 1}`}
-                  className="w-full h-auto rounded object-contain"
-                  onError={(e) => console.error(`Failed to load: ${src}`)}
-                />
+            {charts.map((chart) => (
+              <div key={chart.column} className="bg-white rounded shadow p-4">
+                <DistributionChart chart={chart} />
                 <p className="text-sm text-center mt-2 text-gray-600">
-                  {src.split('/').pop().replace('.png', '')}
+                  {chart.column}
                 </p>
               </div>
             ))}
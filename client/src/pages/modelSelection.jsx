@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
+import { waitForJob, formatProgress } from '../jobs';
 
 const ModelSelection = () => {
   const [predictionType, setPredictionType] = useState('');
@@ -44,17 +45,14 @@ const ModelSelection = () => {
         }),
       });
 
-      const data = await response.json();
-      if (response.ok) {
-        setTrainingResults(data.results);
-        setMessage('Models trained successfully!');
+      const results = await waitForJob(response, progress =>
+        setMessage('Training models... ' + formatProgress(progress)));
+      setTrainingResults(results);
+      setMessage('Models trained successfully!');
 
-        // Only navigate if there's no confusion matrix to display
-        if (!data.results.confusion_matrix) {
-          navigate('/predictions');
-        }
-      } else {
-        setMessage(data.error || 'Failed to train models');
+      // Only navigate if there's no confusion matrix to display
+      if (!results.confusion_matrix) {
+        navigate('/predictions');
       }
     } catch (error) {
       setMessage('Error: ' + error.message);
@@ -1,6 +1,7 @@
 
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
+import { waitForJob, formatProgress } from '../jobs';
 
 const Predictions = () => {
   const [selectedType, setSelectedType] = useState('');
@@ -11,11 +12,12 @@ const Predictions = () => {
   const [message, setMessage] = useState('');
   const [columns, setColumns] = useState([]);
   const [trainingResults, setTrainingResults] = useState(null);
+  const [batchFile, setBatchFile] = useState(null);
 
   useEffect(() => {
     const fetchColumns = async () => {
       try {
-        const response = await fetch('/current-data');
+        const response = await fetch('/current-data?limit=0');
         if (response.ok) {
           const data = await response.json();
           setColumns(Object.keys(data.data));
@@ -44,12 +46,9 @@ const Predictions = () => {
         }),
       });
 
-      if (!trainResponse.ok) {
-        throw new Error('Training failed');
-      }
-
-      const trainData = await trainResponse.json();
-      setTrainingResults(trainData.results);
+      const trainResults = await waitForJob(trainResponse, progress =>
+        setMessage('Training models... ' + formatProgress(progress)));
+      setTrainingResults(trainResults);
 
       // Run predictions
       const predictResponse = await fetch('/run-predictions', {
@@ -65,14 +64,39 @@ const Predictions = () => {
         }),
       });
 
-      if (predictResponse.ok) {
-        const data = await predictResponse.json();
-        setResults(data);
-        setMessage('Model trained and predictions completed successfully!');
-      } else {
-        const error = await predictResponse.json();
-        throw new Error(error.error || 'Prediction failed');
+      const data = await waitForJob(predictResponse, progress =>
+        setMessage('Running predictions... ' + formatProgress(progress)));
+      setResults(data);
+      setMessage('Model trained and predictions completed successfully!');
+    } catch (error) {
+      setMessage('Error: ' + error.message);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  // Score a new CSV with the latest saved version of the selected model;
+  // the server streams the predictions back as CSV.
+  const handleBatchPredict = async () => {
+    setLoading(true);
+    setMessage('Running batch predictions...');
+    try {
+      const formData = new FormData();
+      formData.append('file', batchFile);
+      formData.append('model_name', selectedModel);
+      formData.append('problem_type', selectedType);
+      const response = await fetch('/predict', { method: 'POST', body: formData });
+      if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.error || 'Batch prediction failed');
       }
+      const url = URL.createObjectURL(await response.blob());
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `predictions_${batchFile.name}`;
+      link.click();
+      URL.revokeObjectURL(url);
+      setMessage(`Batch predictions downloaded (model version ${response.headers.get('X-Model-Version')})`);
     } catch (error) {
       setMessage('Error: ' + error.message);
     } finally {
@@ -180,6 +204,28 @@ const Predictions = () => {
             </button>
           </div>
 
+          {selectedModel && selectedType !== 'time_series' && (
+            <div className="bg-white rounded-lg shadow p-6 mb-6">
+              <h3 className="text-lg font-semibold mb-4">Batch Predictions</h3>
+              <p className="text-sm text-gray-600 mb-4">
+                Upload a CSV with the same feature columns to score it with the trained {selectedModel} model.
+              </p>
+              <input
+                type="file"
+                accept=".csv"
+                onChange={(e) => setBatchFile(e.target.files[0] || null)}
+                className="block w-full text-sm mb-4"
+              />
+              <button
+                onClick={handleBatchPredict}
+                disabled={!batchFile || loading}
+                className="w-full bg-green-600 text-white px-4 py-2 rounded-md hover:bg-green-700 disabled:bg-gray-400"
+              >
+                Predict and Download CSV
+              </button>
+            </div>
+          )}
+
           {message && (
             <div className="mb-6 p-4 bg-blue-50 text-blue-700 rounded-md">
               {message}
@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { useNavigate, Link } from 'react-router-dom';
 
+const STREAM_UPLOAD_THRESHOLD = 16 * 1024 * 1024;
+
 const Upload = () => {
   const [file, setFile] = useState(null);
   const [fileDetails, setFileDetails] = useState(null);
@@ -29,10 +31,17 @@ const Upload = () => {
     formData.append('file', selectedFile);
 
     try {
-      const response = await fetch('/upload', {
-        method: 'POST',
-        body: formData,
-      });
+      // Large files are sent as a raw body the server streams to disk
+      const response = selectedFile.size > STREAM_UPLOAD_THRESHOLD
+        ? await fetch(`/upload-stream?filename=${encodeURIComponent(selectedFile.name)}`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'text/csv' },
+            body: selectedFile,
+          })
+        : await fetch('/upload', {
+            method: 'POST',
+            body: formData,
+          });
 
       const data = await response.json();
 
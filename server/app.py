@@ -1,12 +1,30 @@
-from flask import Flask, request, jsonify, send_from_directory, make_response
+from flask import Flask, Response, request, jsonify, send_from_directory, make_response, g, abort
 from flask_cors import CORS
 from interfaces.file_interface import FileInterface
 from interfaces.analysis_interface import AnalysisInterface
 from interfaces.model_interface import ModelInterface
 from interfaces.data_interface import DataInterface
+from interfaces.training_interface import TrainingInterface
+from interfaces.prediction_interface import PredictionInterface
+from model_registry import ModelRegistry
+from dataset_store import DatasetStore, SESSION_ID_PATTERN
+from shared_datasets import SharedDatasets
+from csv_cache import CsvCache
+from cleaning_pipeline import CleaningPipeline, CleaningError
+from session_expiry import SessionExpiry
+from instrumentation import RequestInstrumentation, render_metrics, span
+import pandas as pd
 import os
-import matplotlib
-matplotlib.use('Agg')
+import uuid
+
+# Charts are drawn off-screen; set through the environment so matplotlib is
+# only imported by the processes that actually draw
+os.environ['MPLBACKEND'] = 'Agg'
+
+# Cleaning steps rely on copy-on-write so untouched columns are shared
+# between versions of a dataset (the default from pandas 3 onwards)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
 
 # === Flask Setup ===
 app = Flask(__name__, static_folder='uploads')
@@ -15,35 +33,116 @@ CORS(app,
          "origins": "*"
      }},
      methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-     allow_headers=['Content-Type'],
+     allow_headers=['Content-Type', 'X-Session-Id'],
      supports_credentials=True)
 
-# Initialize interfaces
-file_interface = FileInterface(app)
-analysis_interface = AnalysisInterface(app)
-model_interface = ModelInterface(app)
-data_interface = DataInterface(app)
-
 # Setup directories
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
 IMAGES_FOLDER = os.path.join(os.path.dirname(__file__), 'images')
 SAVED_MODELS_FOLDER = os.path.join(os.path.dirname(__file__), 'saved_models')
+CLEANSED_FOLDER = os.path.join(os.path.dirname(__file__), 'cleansed_data')
+JOBS_FOLDER = os.path.join(os.path.dirname(__file__), 'jobs')
+PREDICTIONS_FOLDER = os.path.join(os.path.dirname(__file__), 'predictions')
+DATASETS_FOLDER = os.path.join(os.path.dirname(__file__), 'session_data')
+HISTORY_FOLDER = os.path.join(os.path.dirname(__file__), 'cleaning_history')
+CSV_CACHE_FOLDER = os.path.join(os.path.dirname(__file__), 'cache', 'csv')
+SEARCH_CACHE_FOLDER = os.path.join(os.path.dirname(__file__), 'cache', 'search')
+# Published datasets are memory-mapped by every worker; a folder under
+# /dev/shm keeps them in shared memory instead of the page cache
+SHARED_DATASETS_FOLDER = os.environ.get('FORCASTICA_SHARED_DATASETS_DIR') or \
+    os.path.join(os.path.dirname(__file__), 'cache', 'datasets')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(IMAGES_FOLDER, exist_ok=True)
 os.makedirs(SAVED_MODELS_FOLDER, exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['IMAGES_FOLDER'] = IMAGES_FOLDER
+app.config['CLEANSED_FOLDER'] = CLEANSED_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('FORCASTICA_MAX_UPLOAD_MB', 16)) * 1024 * 1024
+# /upload-stream bodies are written straight to disk in chunks, so they get a
+# much larger cap; files above STREAM_LOAD_LIMIT are profiled but not loaded
+app.config['MAX_STREAM_CONTENT_LENGTH'] = int(os.environ.get('FORCASTICA_MAX_STREAM_UPLOAD_GB', 50)) * 1024 ** 3
+app.config['JOBS_FOLDER'] = JOBS_FOLDER
+app.config['PREDICTIONS_FOLDER'] = PREDICTIONS_FOLDER
+app.config['TRAINING_WORKERS'] = int(os.environ.get('FORCASTICA_TRAINING_WORKERS', 2))
+app.config['MODEL_TIMEOUT'] = float(os.environ.get('FORCASTICA_MODEL_TIMEOUT', 600))
+# 'holdout' scores each model once on the test split, 'cv' adds k-fold CV
+app.config['TRAINING_EVALUATION'] = os.environ.get('FORCASTICA_TRAINING_EVALUATION', 'holdout')
+app.config['CV_FOLDS'] = int(os.environ.get('FORCASTICA_CV_FOLDS', 5))
+app.config['SEARCH_CACHE_FOLDER'] = SEARCH_CACHE_FOLDER
+app.config['SEARCH_TRIALS'] = int(os.environ.get('FORCASTICA_SEARCH_TRIALS', 27))
+app.config['CSV_CACHE_BUDGET'] = int(os.environ.get('FORCASTICA_CSV_CACHE_MB', 1024)) * 1024 * 1024
+# Sessions idle this long lose their data, history and unshared datasets
+app.config['SESSION_MAX_IDLE_HOURS'] = float(os.environ.get('FORCASTICA_SESSION_MAX_IDLE_HOURS', 24))
+app.config['DATASET_MEMORY_BUDGET'] = int(os.environ.get('FORCASTICA_DATASET_MEMORY_MB', 512)) * 1024 * 1024
+app.config['PLOT_WORKERS'] = int(os.environ.get('FORCASTICA_PLOT_WORKERS', 0)) or None
+app.config['STREAM_LOAD_LIMIT'] = int(os.environ.get('FORCASTICA_STREAM_LOAD_LIMIT_MB', 256)) * 1024 * 1024
+app.config['MODEL_CACHE_SIZE'] = int(os.environ.get('FORCASTICA_MODEL_CACHE_SIZE', 8))
+app.config['PREDICTION_CHUNK_ROWS'] = int(os.environ.get('FORCASTICA_PREDICTION_CHUNK_ROWS', 50000))
+app.config['PREDICTION_BATCH_SIZE'] = int(os.environ.get('FORCASTICA_PREDICTION_BATCH_SIZE', 256))
+app.config['PREDICTION_BATCH_WAIT_MS'] = float(os.environ.get('FORCASTICA_PREDICTION_BATCH_WAIT_MS', 5))
+# Per-request peak memory (tracemalloc) and cProfile dumps cost time, so both are opt-in
+app.config['TRACE_MEMORY'] = os.environ.get('FORCASTICA_TRACE_MEMORY', '0') == '1'
+app.config['PROFILE_FOLDER'] = os.environ.get('FORCASTICA_PROFILE_DIR') or None
+app.config['PROFILE_MIN_MS'] = float(os.environ.get('FORCASTICA_PROFILE_MIN_MS', 0))
+
+# === Instrumentation ===
+# Latency histograms and Server-Timing spans for every request; see /metrics
+instrumentation = RequestInstrumentation(app, trace_memory=app.config['TRACE_MEMORY'],
+                                         profile_folder=app.config['PROFILE_FOLDER'],
+                                         profile_min_seconds=app.config['PROFILE_MIN_MS'] / 1000)
+
+# === Per-session datasets ===
+SESSION_COOKIE = 'forcastica_session'
+# Uploaded datasets are published once and attached zero-copy by id
+shared_datasets = SharedDatasets(SHARED_DATASETS_FOLDER)
+dataset_store = DatasetStore(DATASETS_FOLDER, memory_budget=app.config['DATASET_MEMORY_BUDGET'],
+                             shared_datasets=shared_datasets)
+# Cleaning steps are applied on top of the uploaded dataset when it is read
+cleaning_pipeline = CleaningPipeline(dataset_store, HISTORY_FOLDER)
+session_expiry = SessionExpiry(dataset_store, cleaning_pipeline, shared_datasets,
+                               max_idle_seconds=app.config['SESSION_MAX_IDLE_HOURS'] * 3600)
+
+@app.before_request
+def expire_idle_sessions():
+    session_expiry.run()
+
+def current_session_id():
+    """Session id from the X-Session-Id header or session cookie, else a new one"""
+    if 'session_id' not in g:
+        session_id = request.headers.get('X-Session-Id') or request.cookies.get(SESSION_COOKIE)
+        if not session_id or not SESSION_ID_PATTERN.match(session_id):
+            session_id = uuid.uuid4().hex
+        g.session_id = session_id
+    return g.session_id
 
-# === Global DataFrame ===
-stored_df = None
+def get_stored_df():
+    with span('dataset.load'):
+        try:
+            return cleaning_pipeline.dataset(current_session_id())
+        except CleaningError as e:
+            # Every route that reads the data answers with this JSON error
+            abort(make_response(jsonify({'error': str(e)}), 500))
+
+# Initialize interfaces
+csv_cache = CsvCache(CSV_CACHE_FOLDER, max_bytes=app.config['CSV_CACHE_BUDGET'])
+file_interface = FileInterface(app, dataset_store, csv_cache, shared_datasets)
+analysis_interface = AnalysisInterface(app, cleaning_pipeline, shared_datasets)
+data_interface = DataInterface(app, cleaning_pipeline)
+# Loaded models are shared by training jobs and the prediction endpoints
+model_registry = ModelRegistry(SAVED_MODELS_FOLDER, max_loaded=app.config['MODEL_CACHE_SIZE'])
+model_interface = ModelInterface(app, model_registry)
+training_interface = TrainingInterface(app, model_registry, shared_datasets)
+prediction_interface = PredictionInterface(app, model_registry)
 
 # === Apply CORS Headers ===
 @app.after_request
 def apply_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = '*'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization,X-Session-Id'
     response.headers['Access-Control-Allow-Methods'] = 'GET,POST,OPTIONS'
+    if 'session_id' in g and request.cookies.get(SESSION_COOKIE) != g.session_id:
+        response.set_cookie(SESSION_COOKIE, g.session_id, httponly=True, samesite='Lax')
     return response
 
 # === Routes ===
@@ -51,6 +150,10 @@ def apply_cors_headers(response):
 def home():
     return "🚀 Forcastica Flask API ready."
 
+@app.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/list-files')
 def list_files():
     return file_interface.list_files()
@@ -64,18 +167,20 @@ def upload_file():
         response.headers.add('Access-Control-Allow-Methods', '*')
         return response
 
-    global stored_df
-    response = file_interface.handle_file_upload(request)
-    if isinstance(response, tuple):
-        return response
-    stored_df = file_interface.stored_df
-    return response
+    return file_interface.handle_file_upload(request, current_session_id())
+
+@app.route('/upload-stream', methods=['POST', 'OPTIONS'])
+def upload_stream():
+    if request.method == 'OPTIONS':
+        return '', 204
+    request.max_content_length = app.config['MAX_STREAM_CONTENT_LENGTH']
+    return file_interface.handle_stream_upload(request, current_session_id())
 
 @app.route('/analyze', methods=['GET', 'OPTIONS'])
 def generate_statistics():
     if request.method == 'OPTIONS':
         return '', 204
-    return analysis_interface.generate_statistics(stored_df)
+    return analysis_interface.generate_statistics(get_stored_df(), mode=request.args.get('mode', 'images'))
 
 @app.route('/list-models', methods=['GET'])
 def list_models():
@@ -83,33 +188,71 @@ def list_models():
 
 @app.route('/select-model', methods=['POST'])
 def select_model():
-    return model_interface.select_model(request.json, stored_df)
+    return model_interface.select_model(request.json, get_stored_df())
+
+@app.route('/train-models', methods=['POST'])
+def train_models():
+    return training_interface.train_models(request.get_json(silent=True), get_stored_df())
+
+@app.route('/tune-model', methods=['POST'])
+def tune_model():
+    return training_interface.tune_model(request.get_json(silent=True), get_stored_df())
+
+@app.route('/forecast-groups', methods=['POST'])
+def forecast_groups():
+    return training_interface.forecast_groups(request.get_json(silent=True), get_stored_df())
+
+@app.route('/run-predictions', methods=['POST'])
+def run_predictions():
+    return training_interface.run_predictions(request.get_json(silent=True), get_stored_df())
+
+@app.route('/predict', methods=['POST'])
+def predict():
+    # CSV uploads are read in chunks, so they get the streaming upload cap
+    request.max_content_length = app.config['MAX_STREAM_CONTENT_LENGTH']
+    return prediction_interface.predict(request)
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    return training_interface.job_status(job_id)
+
+@app.route('/predictions/<filename>', methods=['GET'])
+def serve_predictions(filename):
+    return send_from_directory(PREDICTIONS_FOLDER, filename, as_attachment=True)
 
 @app.route('/current-data')
 def get_current_data():
-    return data_interface.get_current_data(stored_df)
+    return data_interface.get_current_data(request, get_stored_df())
 
 @app.route('/remove-columns', methods=['POST'])
 def remove_columns():
-    global stored_df
-    result = data_interface.remove_columns(request, stored_df)
-    if result[1] == 200:
-        stored_df = result[0].json['data']
-    return result
+    return data_interface.remove_columns(request, current_session_id())
 
 @app.route('/save-cleansed', methods=['POST'])
 def save_cleansed():
-    return data_interface.save_cleansed(request, stored_df)
+    return data_interface.save_cleansed(request, current_session_id())
+
+@app.route('/cleaning/history', methods=['GET'])
+def cleaning_history():
+    return data_interface.history(current_session_id())
+
+@app.route('/cleaning/undo', methods=['POST'])
+def cleaning_undo():
+    return data_interface.undo(current_session_id())
+
+@app.route('/cleaning/redo', methods=['POST'])
+def cleaning_redo():
+    return data_interface.redo(current_session_id())
+
+@app.route('/cleaning/checkout', methods=['POST'])
+def cleaning_checkout():
+    return data_interface.checkout(request, current_session_id())
 
 @app.route('/handle-nulls', methods=['POST'])
 def handle_nulls():
-    global stored_df
-    result = analysis_interface.handle_nulls(request, stored_df)
-    if result[1] == 200:
-        stored_df = result[0].json['data']
-    return result
+    return analysis_interface.handle_nulls(request, current_session_id())
 
-@app.route('/images/<filename>', methods=['GET', 'OPTIONS'])
+@app.route('/images/<path:filename>', methods=['GET', 'OPTIONS'])
 def serve_image(filename):
     if request.method == 'OPTIONS':
         return '', 204
@@ -122,11 +265,7 @@ def serve_image(filename):
 
 @app.route('/images', methods=['GET'])
 def list_images():
-    try:
-        files = [f for f in os.listdir(IMAGES_FOLDER) if f.endswith('.png')]
-        return jsonify({'images': files})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    return analysis_interface.list_images(get_stored_df())
 
 # === Launch ===
 if __name__ == '__main__':
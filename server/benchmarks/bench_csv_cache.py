@@ -0,0 +1,56 @@
+"""Load latency of uploads with and without the columnar CSV cache.
+
+For every non-empty CSV in server/uploads this times a plain pd.read_csv,
+the first CsvCache load (parse + convert) and warm CsvCache loads.
+
+    cd server && python benchmarks/bench_csv_cache.py [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from csv_cache import CsvCache  # noqa: E402
+
+UPLOAD_FOLDER = os.path.join(SERVER_DIR, 'uploads')
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    cache = CsvCache(tempfile.mkdtemp(prefix='forcastica-csv-cache-'))
+    print(f"{'file':32} {'read_csv ms':>12} {'first load ms':>14} {'cached ms':>10} {'speedup':>8}")
+    for filename in sorted(os.listdir(UPLOAD_FOLDER)):
+        path = os.path.join(UPLOAD_FOLDER, filename)
+        if not filename.endswith('.csv') or os.path.getsize(path) == 0:
+            continue
+
+        uncached, _ = best_of(lambda: pd.read_csv(path), args.repeat)
+        start = time.perf_counter()
+        cache.read_csv(path)
+        first = time.perf_counter() - start
+        cached, _ = best_of(lambda: cache.read_csv(path), args.repeat)
+        print(f"{filename:32} {uncached * 1000:>12.2f} {first * 1000:>14.2f} "
+              f"{cached * 1000:>10.2f} {uncached / cached:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Wall-clock comparison of serial and parallel model bake-offs.
+
+Runs ModelTrainer.train_and_evaluate_all_models on every non-empty CSV in
+server/uploads, once serially and once with parallel=True.
+
+    cd server && python benchmarks/bench_model_trainer.py [--workers N] [--timeout S]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from model_registry import ModelRegistry  # noqa: E402
+from model_trainer import ModelTrainer  # noqa: E402
+from preprocessing import FeatureCache  # noqa: E402
+
+UPLOAD_FOLDER = os.path.join(SERVER_DIR, 'uploads')
+
+
+def load_upload(path):
+    """Use the numeric columns as features and the last column as target"""
+    if os.path.getsize(path) == 0:
+        return None
+    df = pd.read_csv(path)
+    target = df.columns[-1]
+    X = df.drop(columns=[target]).select_dtypes(include='number').fillna(0)
+    y = df[target]
+    if X.empty or y.isnull().any() or y.nunique() < 2:
+        return None
+    problem_type = 'classification' if y.nunique() <= 20 else 'regression'
+    return X, y, problem_type
+
+
+def time_run(X, y, problem_type, parallel, n_workers, timeout, registry):
+    # A fresh feature cache, so neither run reuses the other's encoding
+    # min_parallel_rows=0 times the parallel path even where it is not used
+    trainer = ModelTrainer(n_workers=n_workers, model_timeout=timeout, registry=registry,
+                           feature_cache=FeatureCache(), min_parallel_rows=0)
+    start = time.perf_counter()
+    results = trainer.train_and_evaluate_all_models(X, y, problem_type, parallel=parallel)
+    elapsed = time.perf_counter() - start
+    errors = [name for name, r in results.items() if isinstance(r, str)]
+    return elapsed, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--timeout', type=float, default=None)
+    args = parser.parse_args()
+
+    files = sorted(f for f in os.listdir(UPLOAD_FOLDER) if f.endswith('.csv'))
+    paths = [os.path.join(UPLOAD_FOLDER, f) for f in files]
+
+    # Keep the benchmark's models out of server/saved_models
+    registry = ModelRegistry(tempfile.mkdtemp(prefix='forcastica-bench-'))
+
+    # Import the estimator backends before timing anything
+    warm_up = next(filter(None, map(load_upload, paths)), None)
+    if warm_up is not None:
+        X, y, problem_type = warm_up
+        time_run(X.head(200), y.head(200), problem_type, False, args.workers, args.timeout, registry)
+
+    print(f"{'file':40} {'rows':>8} {'serial s':>10} {'parallel s':>11} {'speedup':>8}")
+    for filename, path in zip(files, paths):
+        data = load_upload(path)
+        if data is None:
+            print(f"{filename:40} skipped (empty or no usable target)")
+            continue
+        X, y, problem_type = data
+        serial, serial_errors = time_run(X, y, problem_type, False, args.workers, args.timeout, registry)
+        par, par_errors = time_run(X, y, problem_type, True, args.workers, args.timeout, registry)
+        print(f"{filename:40} {len(X):>8} {serial:>10.2f} {par:>11.2f} {serial / par:>7.2f}x")
+        for label, errors in (('serial', serial_errors), ('parallel', par_errors)):
+            if errors:
+                print(f"    {label} errors: {', '.join(errors)}")
+
+
+if __name__ == '__main__':
+    main()
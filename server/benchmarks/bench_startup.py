@@ -0,0 +1,96 @@
+"""Server cold start: import time of app.py and time to the first answered request.
+
+Each run starts a fresh interpreter. `python -X importtime -c "import app"`
+gives the total import time and the slowest top-level imports; a second
+interpreter imports the app and answers GET / through Flask's test client,
+timed from process start. Heavy libraries that were loaded by startup are
+listed, since training and forecasting backends should only be imported
+when first used.
+
+    cd server && python benchmarks/bench_startup.py [--repeat N] [--top N]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['sklearn', 'xgboost', 'statsmodels', 'prophet', 'shap', 'scipy', 'matplotlib']
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)')
+
+FIRST_REQUEST = """
+import sys
+import app
+response = app.app.test_client().get('/')
+assert response.status_code < 500, response.status_code
+print(','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def run_python(args):
+    env = dict(os.environ, PYTHONPATH=SERVER_DIR)
+    return subprocess.run([sys.executable] + args, cwd=SERVER_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def import_times():
+    """(total seconds, [(cumulative seconds, module)] for top-level imports)"""
+    stderr = run_python(['-X', 'importtime', '-c', 'import app']).stderr
+    # A module is listed after everything it imports, so the imports made
+    # directly by app.py are the depth-2 lines since the previous top-level one
+    children, top_level, total = [], [], None
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, depth, module = int(match.group(2)) / 1e6, len(match.group(3)), match.group(4)
+        if depth == 1:
+            if module == 'app':
+                total, top_level = cumulative, children
+            children = []
+        elif depth == 3:
+            children.append((cumulative, module))
+    return total, sorted(top_level, reverse=True)
+
+
+def first_request():
+    """(seconds from interpreter start to the first response, heavy modules loaded)"""
+    start = time.perf_counter()
+    result = run_python(['-c', FIRST_REQUEST.format(heavy=HEAVY_MODULES)])
+    return time.perf_counter() - start, result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='slowest app.py imports to list')
+    args = parser.parse_args()
+
+    # Warm the OS file cache and bytecode so every run measures the same thing
+    run_python(['-c', 'import app'])
+
+    totals, slowest = [], None
+    for _ in range(args.repeat):
+        total, top_level = import_times()
+        totals.append(total)
+        slowest = top_level
+    requests, loaded = [], ''
+    for _ in range(args.repeat):
+        seconds, loaded = first_request()
+        requests.append(seconds)
+
+    print(f"import app          median {statistics.median(totals) * 1000:8.1f} ms  "
+          f"min {min(totals) * 1000:8.1f} ms")
+    print(f"first request       median {statistics.median(requests) * 1000:8.1f} ms  "
+          f"min {min(requests) * 1000:8.1f} ms")
+    print(f"heavy modules loaded at startup: {loaded or 'none'}")
+    print("slowest imports in app.py:")
+    for cumulative, module in slowest[:args.top]:
+        print(f"  {module:40} {cumulative * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+"""End-to-end benchmark suite on synthetic datasets, with JSON results.
+
+For every combination of dataset shape, row count and extra column count
+a CSV is generated with benchmarks/synthetic.py, then each stage runs the
+code behind one server path, in temporary folders with cold caches:
+
+    parse            CsvCache load of a new upload (read_csv + Feather copy)
+    load_cached      the same load served from the Feather copy
+    compact          compact_dtypes, as /upload stores the frame
+    profile          profile_frame, info, describe and preview for /upload
+    correlation      numeric correlations for /analyze
+    plots            histogram PNGs from the PlotCache worker pool (/analyze)
+    chart_data       histogram and KDE data for /analyze?mode=data
+    cleaning         mean-filling nulls and removing a column (CleaningPipeline)
+    serialize_json   the default 1000-row /current-data page as JSON
+    serialize_arrow  the whole frame as an Arrow stream (/current-data?format=arrow)
+    serialize_parquet  the whole frame as Parquet (/save-cleansed)
+    train            ModelTrainer bake-off on a sample of --train-rows rows
+    forecast         TimeSeriesModelTrainer on the daily series (airpollution only)
+
+Each stage reports the median, min and max of --repeat runs (--heavy-repeat
+for plots, train and forecast); --memory adds the peak Python heap of one
+more run, measured with tracemalloc in this process only. Results are
+written as JSON with the git commit, package versions and machine, and
+--compare prints the change against an earlier results file.
+
+    cd server && python benchmarks/bench_suite.py --rows 10000,100000 --extra-columns 0,100
+    cd server && python benchmarks/bench_suite.py --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+from datetime import datetime, timezone
+from importlib import metadata
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from chart_data import distribution_chart  # noqa: E402
+from cleaning_pipeline import CleaningPipeline  # noqa: E402
+from compact_dtypes import compact_dtypes  # noqa: E402
+from csv_cache import CsvCache  # noqa: E402
+from dataset_store import DatasetStore  # noqa: E402
+from fitted_model_cache import FittedModelCache  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+from model_trainer import ModelTrainer, TimeSeriesModelTrainer  # noqa: E402
+from plot_cache import PlotCache  # noqa: E402
+from preprocessing import FeatureCache  # noqa: E402
+from profiler import format_info, profile_frame  # noqa: E402
+from serialization import arrow_response, dumps, frame_payload  # noqa: E402
+from synthetic import DATE_COLUMNS, SHAPES, TARGETS, write_csv  # noqa: E402
+
+RESULTS_FOLDER = os.path.join(SERVER_DIR, 'benchmarks', 'results')
+PACKAGES = ['pandas', 'numpy', 'pyarrow', 'scikit-learn', 'xgboost', 'statsmodels', 'prophet',
+            'matplotlib', 'seaborn', 'flask']
+HEAVY_STAGES = ('plots', 'train', 'forecast')
+# Slower by more than this share is flagged by --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+def fresh_folder(ctx, name):
+    return tempfile.mkdtemp(prefix=f'{name}-', dir=ctx['tmp'])
+
+
+# Each stage does its setup and returns the call to time, or None to skip
+def stage_parse(ctx):
+    cache = CsvCache(fresh_folder(ctx, 'csv'))
+    return lambda: cache.read_csv(ctx['path'])
+
+
+def stage_load_cached(ctx):
+    cache = CsvCache(fresh_folder(ctx, 'csv'))
+    cache.read_csv(ctx['path'])
+    return lambda: cache.read_csv(ctx['path'])
+
+
+def stage_compact(ctx):
+    return lambda: compact_dtypes(ctx['raw'])
+
+
+def stage_profile(ctx):
+    df = ctx['df']
+
+    def run():
+        profile = profile_frame(df)
+        return format_info(df, profile), profile.describe(), profile.null_counts(), \
+            df.head(10).to_dict(orient='records')
+    return run
+
+
+def stage_correlation(ctx):
+    numeric = ctx['df'].select_dtypes(include='number')
+    return lambda: numeric.corr().to_dict()
+
+
+def stage_plots(ctx):
+    cache = ctx['plot_cache']
+    cache.images_folder = fresh_folder(ctx, 'images')
+    return lambda: cache.plots(ctx['df'], ctx['numeric'], kind='hist')
+
+
+def stage_chart_data(ctx):
+    df = ctx['df']
+    return lambda: [distribution_chart(df[col]) for col in ctx['numeric']]
+
+
+def stage_cleaning(ctx):
+    df = ctx['df']
+    store = DatasetStore(fresh_folder(ctx, 'sessions'))
+    pipeline = CleaningPipeline(store, fresh_folder(ctx, 'history'))
+    store.put('bench', df)
+    with_nulls = [col for col in ctx['numeric'] if df[col].hasnans]
+    text = [col for col in df.columns if col not in ctx['numeric']]
+    if with_nulls:
+        pipeline.record('bench', 'handle_nulls', columns=with_nulls, action='mean')
+    if text:
+        pipeline.record('bench', 'remove_columns', columns=text[:1])
+    return lambda: pipeline.dataset('bench')
+
+
+def stage_serialize_json(ctx):
+    return lambda: dumps(frame_payload(ctx['df'], 0, 1000))
+
+
+def stage_serialize_arrow(ctx):
+    return lambda: arrow_response(ctx['df']).get_data()
+
+
+def stage_serialize_parquet(ctx):
+    path = os.path.join(fresh_folder(ctx, 'parquet'), 'data.parquet')
+    return lambda: ctx['df'].to_parquet(path, index=False)
+
+
+def stage_train(ctx):
+    target, problem_type = TARGETS[ctx['shape']]
+    df = ctx['df']
+    if len(df) > ctx['args'].train_rows:
+        df = df.sample(ctx['args'].train_rows, random_state=0)
+    X = df.drop(columns=[target] + ([DATE_COLUMNS[ctx['shape']]] if ctx['shape'] in DATE_COLUMNS else []))
+    trainer = ModelTrainer(n_workers=ctx['args'].workers, registry=ModelRegistry(fresh_folder(ctx, 'models')),
+                           feature_cache=FeatureCache())
+    return lambda: trainer.train_and_evaluate_all_models(X, df[target], problem_type, parallel=True)
+
+
+def stage_forecast(ctx):
+    if ctx['shape'] not in DATE_COLUMNS:
+        return None
+    date, (target, _) = DATE_COLUMNS[ctx['shape']], TARGETS[ctx['shape']]
+    daily = ctx['df'][[date, target]].assign(**{date: pd.to_datetime(ctx['df'][date])}) \
+        .resample('D', on=date)[target].mean().dropna().tail(ctx['args'].forecast_points).reset_index()
+    if len(daily) < 30:
+        return None
+    trainer = TimeSeriesModelTrainer(n_workers=ctx['args'].workers, model_cache=FittedModelCache())
+    return lambda: trainer.train_and_evaluate_all_models(daily, target, date, parallel=True)
+
+
+STAGES = {
+    'parse': stage_parse,
+    'load_cached': stage_load_cached,
+    'compact': stage_compact,
+    'profile': stage_profile,
+    'correlation': stage_correlation,
+    'plots': stage_plots,
+    'chart_data': stage_chart_data,
+    'cleaning': stage_cleaning,
+    'serialize_json': stage_serialize_json,
+    'serialize_arrow': stage_serialize_arrow,
+    'serialize_parquet': stage_serialize_parquet,
+    'train': stage_train,
+    'forecast': stage_forecast,
+}
+
+
+def measure(stage, ctx, repeat, memory):
+    """{'seconds', 'min_seconds', 'max_seconds'[, 'peak_memory_bytes']}, or None if skipped"""
+    times = []
+    for _ in range(repeat):
+        run = STAGES[stage](ctx)
+        if run is None:
+            return None
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    result = {'seconds': statistics.median(times), 'min_seconds': min(times), 'max_seconds': max(times)}
+    if memory:
+        run = STAGES[stage](ctx)
+        tracemalloc.start()
+        try:
+            run()
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run_dataset(args, shape, rows, extra_columns, tmp, plot_cache):
+    """Results for every stage on one generated dataset"""
+    path = os.path.join(tmp, f'{shape}_{rows}_{extra_columns}.csv')
+    start = time.perf_counter()
+    csv_bytes = write_csv(path, shape, rows, extra_columns, seed=args.seed)
+    print(f"\n{shape}: {rows:,} rows, {extra_columns} extra columns, "
+          f"{csv_bytes / 1e6:.1f} MB generated in {time.perf_counter() - start:.1f}s", flush=True)
+
+    raw = pd.read_csv(path)
+    df, _ = compact_dtypes(raw)
+    ctx = {'args': args, 'shape': shape, 'path': path, 'tmp': tmp, 'raw': raw, 'df': df,
+           'numeric': list(df.select_dtypes(include='number').columns), 'plot_cache': plot_cache}
+    results = []
+    for stage in args.stages:
+        repeat = args.heavy_repeat if stage in HEAVY_STAGES else args.repeat
+        entry = {'dataset': shape, 'rows': rows, 'columns': df.shape[1], 'extra_columns': extra_columns,
+                 'csv_bytes': csv_bytes, 'stage': stage, 'repeat': repeat}
+        try:
+            measured = measure(stage, ctx, repeat, args.memory)
+        except Exception as e:
+            entry['error'] = f'{type(e).__name__}: {e}'
+            print(f"  {stage:18} failed: {entry['error']}", flush=True)
+            results.append(entry)
+            continue
+        if measured is None:
+            continue
+        entry.update(measured)
+        results.append(entry)
+        memory = f"  peak {measured['peak_memory_bytes'] / 1e6:8.1f} MB" if 'peak_memory_bytes' in measured else ''
+        print(f"  {stage:18} {measured['seconds'] * 1000:10.1f} ms  (min {measured['min_seconds'] * 1000:.1f}){memory}", flush=True)
+    os.remove(path)
+    return results
+
+
+def environment():
+    def git(*command):
+        try:
+            return subprocess.run(['git', *command], cwd=SERVER_DIR, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    packages = {}
+    for name in PACKAGES:
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+    return {
+        'git_commit': git('rev-parse', 'HEAD'),
+        'git_dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'packages': packages,
+    }
+
+
+def compare(baseline_path, results):
+    """Print each stage's change against the same dataset and stage in a baseline file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def key(entry):
+        return entry['dataset'], entry['rows'], entry['extra_columns'], entry['stage']
+
+    before = {key(entry): entry for entry in baseline['results'] if 'seconds' in entry}
+    print(f"\nCompared with {baseline_path} ({(baseline['environment'].get('git_commit') or '?')[:10]}):")
+    for entry in results:
+        old = before.get(key(entry))
+        if old is None or 'seconds' not in entry:
+            continue
+        change = entry['seconds'] / old['seconds'] - 1 if old['seconds'] else 0.0
+        flag = '  SLOWER' if change > REGRESSION_THRESHOLD else ''
+        print(f"  {entry['dataset']:12} {entry['rows']:>10,} +{entry['extra_columns']:<4} {entry['stage']:18} "
+              f"{old['seconds'] * 1000:10.1f} -> {entry['seconds'] * 1000:10.1f} ms  {change:+7.1%}{flag}")
+
+
+def int_list(text):
+    return [int(value) for value in text.split(',') if value]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shapes', default=','.join(SHAPES))
+    parser.add_argument('--rows', type=int_list, default=[10_000, 100_000], help='comma-separated row counts')
+    parser.add_argument('--extra-columns', type=int_list, default=[0], help='comma-separated extra column counts')
+    parser.add_argument('--stages', default=','.join(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--heavy-repeat', type=int, default=1, help='runs of plots, train and forecast')
+    parser.add_argument('--memory', action='store_true', help='also record each stage\'s peak Python heap')
+    parser.add_argument('--train-rows', type=int, default=10_000)
+    parser.add_argument('--forecast-points', type=int, default=365, help='days of the series to forecast on')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='results file (default benchmarks/results/<time>_<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare with')
+    args = parser.parse_args()
+    args.shapes = [shape for shape in args.shapes.split(',') if shape]
+    args.stages = [stage for stage in args.stages.split(',') if stage]
+    unknown = [s for s in args.shapes if s not in SHAPES] + [s for s in args.stages if s not in STAGES]
+    if unknown:
+        parser.error(f"unknown shapes or stages: {', '.join(unknown)}")
+
+    env = environment()
+    tmp = tempfile.mkdtemp(prefix='forcastica-bench-')
+    plot_cache = PlotCache(tmp, n_workers=args.workers)
+    started = datetime.now(timezone.utc)
+    results = []
+    try:
+        for shape in args.shapes:
+            for rows in args.rows:
+                for extra_columns in args.extra_columns:
+                    results.extend(run_dataset(args, shape, rows, extra_columns, tmp, plot_cache))
+    finally:
+        if plot_cache.executor is not None:
+            plot_cache.executor.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        RESULTS_FOLDER, f"{started.strftime('%Y%m%dT%H%M%SZ')}_{(env['git_commit'] or 'nogit')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    config = {name: value for name, value in vars(args).items() if name not in ('output', 'compare')}
+    with open(output, 'w') as f:
+        json.dump({'schema_version': 1, 'started_at': started.isoformat(), 'environment': env,
+                   'config': config, 'results': results}, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
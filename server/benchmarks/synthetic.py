@@ -0,0 +1,181 @@
+"""Synthetic datasets shaped like the sample uploads, at any size.
+
+'extralearn' follows data_set_extralearn.csv (lead conversion: an ID,
+demographics, Yes/No channel flags and a 0/1 status), 'hmeq' the HMEQ home
+equity loan data (BAD target, loan figures with the original's share of
+nulls in most columns) and 'airpollution' the hourly Beijing PM2.5 series
+(date, pollution, weather). Values are drawn with similar ranges and
+category frequencies, and the targets depend on the features so models
+have something to learn. extra_columns adds alternating float (5% null)
+and low-cardinality text columns to make a frame as wide as needed.
+
+Rows are generated in chunks from a seed, so a 10M-row CSV is written
+without holding it in memory and the same arguments always give the same
+file.
+
+    cd server && python benchmarks/synthetic.py hmeq --rows 1000000 --extra-columns 50 -o hmeq_1m.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SHAPES = ('extralearn', 'hmeq', 'airpollution')
+# Target column and problem type used when training on each shape
+TARGETS = {
+    'extralearn': ('status', 'classification'),
+    'hmeq': ('BAD', 'classification'),
+    'airpollution': ('pollution', 'regression'),
+}
+DATE_COLUMNS = {'airpollution': 'date'}
+CHUNK_ROWS = 500_000
+
+
+def _choice(rng, n, values, p, null_share=0.0):
+    column = rng.choice(np.array(values, dtype=object), size=n, p=p)
+    if null_share:
+        column[rng.random(n) < null_share] = None
+    return column
+
+
+def _with_nulls(rng, values, null_share):
+    values = values.astype(float)
+    values[rng.random(len(values)) < null_share] = np.nan
+    return values
+
+
+def _extralearn(rng, start, n):
+    age = rng.integers(18, 64, n)
+    visits = np.minimum(rng.poisson(3.5, n), 30)
+    time_spent = np.clip(rng.gamma(1.6, 450, n), 0, 2537).astype(int)
+    profile = _choice(rng, n, ['High', 'Medium', 'Low'], [0.49, 0.49, 0.02])
+    first = _choice(rng, n, ['Website', 'Mobile App'], [0.55, 0.45])
+    logit = -2.5 + 0.0012 * time_spent + 1.2 * (first == 'Website') + 0.6 * (profile == 'High') \
+        + 0.01 * (age - 46)
+    yes_no = ['Yes', 'No']
+    return pd.DataFrame({
+        'ID': [f'EXT{i:06d}' for i in range(start + 1, start + n + 1)],
+        'age': age,
+        'current_occupation': _choice(rng, n, ['Professional', 'Unemployed', 'Student'], [0.57, 0.31, 0.12]),
+        'first_interaction': first,
+        'profile_completed': profile,
+        'website_visits': visits,
+        'time_spent_on_website': time_spent,
+        'page_views_per_visit': np.round(np.clip(rng.gamma(2.0, 1.5, n), 0, 18.434), 3),
+        'last_activity': _choice(rng, n, ['Email Activity', 'Phone Activity', 'Website Activity'],
+                                 [0.49, 0.27, 0.24]),
+        'print_media_type1': _choice(rng, n, yes_no, [0.11, 0.89]),
+        'print_media_type2': _choice(rng, n, yes_no, [0.05, 0.95]),
+        'digital_media': _choice(rng, n, yes_no, [0.11, 0.89]),
+        'educational_channels': _choice(rng, n, yes_no, [0.15, 0.85]),
+        'referral': _choice(rng, n, yes_no, [0.02, 0.98]),
+        'status': (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int),
+    })
+
+
+def _hmeq(rng, start, n):
+    loan = np.round(np.clip(rng.lognormal(9.7, 0.5, n), 1100, 89900), -2)
+    mortdue = np.clip(rng.lognormal(11.0, 0.5, n), 2000, 400000)
+    value = mortdue * rng.uniform(1.1, 1.8, n)
+    derog = rng.poisson(0.25, n)
+    delinq = rng.poisson(0.45, n)
+    debtinc = np.clip(rng.normal(33.8, 8.6, n), 0.5, 203)
+    logit = -2.0 + 0.9 * derog + 0.8 * delinq + 0.05 * (debtinc - 34)
+    return pd.DataFrame({
+        'BAD': (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int),
+        'LOAN': loan.astype(int),
+        'MORTDUE': _with_nulls(rng, np.round(mortdue), 0.087),
+        'VALUE': _with_nulls(rng, np.round(value), 0.019),
+        'REASON': _choice(rng, n, ['DebtCon', 'HomeImp'], [0.69, 0.31], null_share=0.042),
+        'JOB': _choice(rng, n, ['Other', 'ProfExe', 'Office', 'Mgr', 'Self', 'Sales'],
+                       [0.42, 0.22, 0.17, 0.135, 0.034, 0.021], null_share=0.047),
+        'YOJ': _with_nulls(rng, np.round(rng.gamma(1.6, 5.5, n), 1), 0.086),
+        'DEROG': _with_nulls(rng, derog, 0.119),
+        'DELINQ': _with_nulls(rng, delinq, 0.097),
+        'CLAGE': _with_nulls(rng, np.clip(rng.normal(180, 85, n), 0, 1168), 0.052),
+        'NINQ': _with_nulls(rng, rng.poisson(1.2, n), 0.086),
+        'CLNO': _with_nulls(rng, rng.poisson(21, n), 0.037),
+        'DEBTINC': _with_nulls(rng, debtinc, 0.213),
+    })
+
+
+def _airpollution(rng, start, n):
+    hours = np.arange(start, start + n)
+    dates = pd.Timestamp('2010-01-02') + pd.to_timedelta(hours, unit='h')
+    day = 2 * np.pi * hours / 24
+    year = 2 * np.pi * hours / (24 * 365.25)
+    temp = np.round(12 - 14 * np.cos(year) + 4 * np.sin(day - 2) + rng.normal(0, 2, n))
+    dew = np.round(temp - 8 - 6 * np.cos(year) + rng.normal(0, 3, n))
+    wind = _choice(rng, n, ['SE', 'NW', 'cv', 'NE'], [0.35, 0.32, 0.21, 0.12])
+    pollution = np.clip(95 + 40 * np.cos(year) + 20 * np.sin(day) + 2.5 * (dew - temp + 10)
+                        - 25 * (wind == 'NW') + rng.gamma(2.0, 30, n) - 60, 0, 994)
+    return pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d %H:%M:%S'),
+        'pollution': np.round(pollution),
+        'dew': dew.astype(int),
+        'temp': temp,
+        'press': np.round(1016 + 10 * np.cos(year) + rng.normal(0, 4, n)),
+        'wnd_dir': wind,
+        'wnd_spd': np.round(rng.gamma(1.2, 20, n), 2),
+        'snow': (rng.random(n) < 0.01 * (np.cos(year) > 0.7)).astype(int),
+        'rain': (rng.random(n) < 0.05 * (np.cos(year) < -0.5)).astype(int),
+    })
+
+
+GENERATORS = {
+    'extralearn': _extralearn,
+    'hmeq': _hmeq,
+    'airpollution': _airpollution,
+}
+
+
+def _extra(rng, n, extra_columns):
+    columns = {}
+    for i in range(extra_columns):
+        if i % 2 == 0:
+            columns[f'extra_{i:03d}'] = _with_nulls(rng, np.round(rng.normal(0, 1, n), 4), 0.05)
+        else:
+            columns[f'extra_{i:03d}'] = _choice(rng, n, ['a', 'b', 'c', 'd', 'e'], [0.4, 0.25, 0.15, 0.1, 0.1])
+    return pd.DataFrame(columns)
+
+
+def generate(shape, rows, extra_columns=0, seed=0, start=0):
+    """Rows [start, start + rows) of a synthetic dataset as a DataFrame"""
+    if shape not in GENERATORS:
+        raise ValueError(f"Unknown dataset shape {shape}")
+    # Each chunk gets its own stream so chunked and one-shot output match
+    parts = []
+    for chunk_start in range(start, start + rows, CHUNK_ROWS):
+        n = min(CHUNK_ROWS, start + rows - chunk_start)
+        rng = np.random.default_rng([seed, chunk_start // CHUNK_ROWS])
+        df = GENERATORS[shape](rng, chunk_start, n)
+        if extra_columns:
+            df = pd.concat([df, _extra(rng, n, extra_columns)], axis=1)
+        parts.append(df)
+    return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+
+
+def write_csv(path, shape, rows, extra_columns=0, seed=0):
+    """Write the dataset to path chunk by chunk; returns the file size in bytes"""
+    with open(path, 'w', newline='') as f:
+        for chunk_start in range(0, rows, CHUNK_ROWS):
+            n = min(CHUNK_ROWS, rows - chunk_start)
+            generate(shape, n, extra_columns, seed, start=chunk_start).to_csv(
+                f, index=False, header=chunk_start == 0)
+        return f.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('shape', choices=SHAPES)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--extra-columns', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args()
+    size = write_csv(args.output, args.shape, args.rows, args.extra_columns, args.seed)
+    print(f"Wrote {args.rows:,} rows to {args.output} ({size / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
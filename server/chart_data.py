@@ -0,0 +1,57 @@
+import numpy as np
+
+KDE_GRID_SIZE = 1024
+
+
+def _round(values, digits=6):
+    return np.round(np.asarray(values, dtype=np.float64), digits).tolist()
+
+
+def binned_kde(values, points=128, grid_size=KDE_GRID_SIZE):
+    """Gaussian KDE evaluated on `points` x values across the data range.
+
+    Uses Scott's bandwidth like seaborn, but instead of summing a kernel per
+    observation the data is first linearly binned onto a fine grid and then
+    convolved with the kernel, which costs O(n + grid_size * kernel width).
+    Returns (x, density), or None when the bandwidth is zero.
+    """
+    n = len(values)
+    std = values.std(ddof=1) if n > 1 else 0.0
+    bandwidth = std * n ** (-1 / 5)
+    if not np.isfinite(bandwidth) or bandwidth <= 0:
+        return None
+
+    low, high = values.min() - 4 * bandwidth, values.max() + 4 * bandwidth
+    step = (high - low) / (grid_size - 1)
+    position = (values - low) / step
+    left = np.floor(position).astype(np.intp)
+    weight = position - left
+    grid = np.bincount(left, weights=1 - weight, minlength=grid_size + 1)
+    grid += np.bincount(left + 1, weights=weight, minlength=grid_size + 1)
+    grid = grid[:grid_size]
+
+    half_width = min(int(np.ceil(4 * bandwidth / step)), grid_size)
+    offsets = np.arange(-half_width, half_width + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2) / (bandwidth * np.sqrt(2 * np.pi))
+    density = np.convolve(grid, kernel, mode='same')[:grid_size] / n
+
+    x = np.linspace(values.min(), values.max(), points)
+    return x, np.interp(x, low + step * np.arange(grid_size), density)
+
+
+def distribution_chart(series, bins='auto', kde_points=128):
+    """Histogram bin counts and a KDE curve scaled to the same count axis"""
+    values = series.dropna().to_numpy(dtype=np.float64)
+    chart = {'column': str(series.name), 'count': int(len(values)), 'bins': None, 'kde': None}
+    if len(values) == 0:
+        return chart
+
+    counts, edges = np.histogram(values, bins=bins)
+    chart['bins'] = {'edges': _round(edges), 'counts': counts.tolist()}
+
+    kde = binned_kde(values, points=kde_points)
+    if kde is not None:
+        x, density = kde
+        bin_width = edges[1] - edges[0]
+        chart['kde'] = {'x': _round(x), 'y': _round(density * len(values) * bin_width)}
+    return chart
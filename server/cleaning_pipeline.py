@@ -0,0 +1,299 @@
+from collections import OrderedDict
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from dataset_store import SESSION_ID_PATTERN
+
+NULL_ACTIONS = ('remove', 'mean', 'mode')
+
+
+class CleaningError(ValueError):
+    """A cleaning step could not be applied to the session's data"""
+
+
+def _remove_columns(df, columns):
+    return df.drop(columns=[col for col in columns if col in df.columns])
+
+
+def _remove_columns_schema(schema, columns):
+    return OrderedDict((col, dtype) for col, dtype in schema.items() if col not in columns)
+
+
+def _handle_nulls(df, columns, action):
+    columns = [col for col in columns if col in df.columns]
+    if action == 'remove':
+        return df.dropna(subset=columns)
+    if not columns or len(df) == 0:
+        return df
+    if action == 'mean':
+        fill_values = df[columns].mean()
+    else:
+        modes = df[columns].mode()
+        # All-null columns have no mode; with only those there are no rows at all
+        fill_values = modes.iloc[0] if len(modes) else pd.Series(dtype=object)
+    # Columns without a fill value are left as they are
+    columns = [col for col in columns if col in fill_values.index and pd.notna(fill_values[col])]
+    if not columns:
+        return df
+    filled = df[columns].fillna(fill_values[columns])
+    # Replace only the filled columns; the others keep sharing their buffers
+    # with the previous version (copy-on-write)
+    df = df.copy(deep=False)
+    for col in columns:
+        df.isetitem(df.columns.get_loc(col), filled[col])
+    return df
+
+
+def _same_schema(schema, **params):
+    return schema
+
+
+# name -> (apply(df, **params) -> df, schema(schema, **params) -> schema)
+OPERATIONS = {
+    'remove_columns': (_remove_columns, _remove_columns_schema),
+    'handle_nulls': (_handle_nulls, _same_schema),
+}
+
+
+class CleaningPipeline:
+    """Cleaning steps recorded as a version tree and applied lazily.
+
+    Each session's history is a JSON file in history_folder: version v0 is
+    the uploaded dataset in the DatasetStore and every other version is its
+    parent plus one operation. Recording a step applies it once to the
+    current version, so a step that cannot run on the data is rejected with
+    a CleaningError instead of being stored, and caches the result. Other
+    versions are computed when dataset() is called, by replaying operations
+    from the nearest ancestor held in the snapshot cache. Undo and redo move
+    the current pointer, and recording a step after an undo starts a new
+    branch without discarding the old one. A new upload invalidates the
+    history.
+
+    Snapshots share the DatasetStore's memory budget: they only use what
+    the stored frames leave free, and an evicted version is rebuilt by
+    replaying its steps.
+    """
+
+    def __init__(self, dataset_store, history_folder, max_snapshots=16):
+        self.dataset_store = dataset_store
+        self.history_folder = history_folder
+        os.makedirs(self.history_folder, exist_ok=True)
+        self.max_snapshots = max_snapshots
+        # (session_id, base version, version id) -> (DataFrame, nbytes)
+        self.snapshots = OrderedDict()
+        self.snapshot_bytes = 0
+        self.lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    def dataset(self, session_id):
+        """The session's DataFrame at its current version, or None"""
+        with self.lock:
+            history = self._history(session_id)
+            if history is None:
+                return None
+            return self._materialize(session_id, history, history['current'])
+
+    def schema(self, session_id):
+        """Column -> dtype at the current version, without applying any step"""
+        with self.lock:
+            history = self._history(session_id)
+            if history is None:
+                return None
+            base = self.dataset_store.get(session_id)
+            schema = OrderedDict(base.dtypes.items())
+            for version_id in self._lineage(history, history['current'])[1:]:
+                op = history['versions'][version_id]['op']
+                schema = OPERATIONS[op['name']][1](schema, **op['params'])
+            return schema
+
+    def record(self, session_id, name, **params):
+        """Append an operation after the current version and return its id.
+
+        Raises CleaningError, recording nothing, if the operation fails on
+        the current version's data.
+        """
+        if name not in OPERATIONS:
+            raise ValueError(f'Unknown operation {name}')
+        with self.lock:
+            history = self._history(session_id)
+            if history is None:
+                raise ValueError('No data available')
+            parent = history['current']
+            df = self._materialize(session_id, history, parent)
+            try:
+                df = OPERATIONS[name][0](df, **params)
+            except Exception as e:
+                raise CleaningError(f'Cannot apply {name}: {e}') from e
+            version_id = f"v{history['next_version']}"
+            history['next_version'] += 1
+            history['versions'][version_id] = {
+                'parent': parent,
+                'op': {'name': name, 'params': params},
+                'created_at': time.time(),
+            }
+            history['redo'][parent] = version_id
+            history['current'] = version_id
+            self._save(session_id, history)
+            self._cache(session_id, history['base'], version_id, df)
+            return version_id
+
+    def undo(self, session_id):
+        """Move to the parent version; returns the new current id or None"""
+        with self.lock:
+            history = self._history(session_id)
+            if history is None:
+                return None
+            parent = history['versions'][history['current']]['parent']
+            if parent is None:
+                return None
+            history['current'] = parent
+            self._save(session_id, history)
+            return parent
+
+    def redo(self, session_id):
+        """Move to the most recently used child version, if any"""
+        with self.lock:
+            history = self._history(session_id)
+            if history is None:
+                return None
+            child = history['redo'].get(history['current'])
+            if child is None:
+                return None
+            history['current'] = child
+            self._save(session_id, history)
+            return child
+
+    def checkout(self, session_id, version_id):
+        """Make any recorded version current, e.g. to switch branches"""
+        with self.lock:
+            history = self._history(session_id)
+            if history is None or version_id not in history['versions']:
+                return None
+            # Redo from each ancestor now leads back towards this version
+            lineage = self._lineage(history, version_id)
+            for parent, child in zip(lineage, lineage[1:]):
+                history['redo'][parent] = child
+            history['current'] = version_id
+            self._save(session_id, history)
+            return version_id
+
+    def history(self, session_id):
+        """JSON-ready summary of the version tree"""
+        with self.lock:
+            history = self._history(session_id)
+            if history is None:
+                return None
+            current = history['current']
+            return {
+                'current': current,
+                'versions': [
+                    {'version': version_id, 'parent': v['parent'], 'op': v['op'],
+                     'created_at': v['created_at']}
+                    for version_id, v in history['versions'].items()
+                ],
+                'can_undo': history['versions'][current]['parent'] is not None,
+                'can_redo': current in history['redo'],
+            }
+
+    def delete(self, session_id):
+        """Forget the session's history and snapshots"""
+        with self.lock:
+            for key in [key for key in self.snapshots if key[0] == session_id]:
+                self.snapshot_bytes -= self.snapshots.pop(key)[1]
+            try:
+                os.remove(self._path(session_id))
+            except FileNotFoundError:
+                pass
+
+    def session_ids(self):
+        """Ids of every session with a history file"""
+        return [name[:-len('.json')] for name in os.listdir(self.history_folder)
+                if name.endswith('.json') and SESSION_ID_PATTERN.match(name[:-len('.json')])]
+
+    def _materialize(self, session_id, history, version_id):
+        base = history['base']
+        lineage = self._lineage(history, version_id)
+        # Walk back to the nearest cached snapshot, then replay forwards
+        start = 0
+        df = None
+        for i in range(len(lineage) - 1, -1, -1):
+            entry = self.snapshots.get((session_id, base, lineage[i]))
+            if entry is not None:
+                self.snapshots.move_to_end((session_id, base, lineage[i]))
+                df = entry[0]
+                start = i
+                break
+        if df is None:
+            df = self.dataset_store.get(session_id)
+        for current in lineage[start + 1:]:
+            op = history['versions'][current]['op']
+            try:
+                df = OPERATIONS[op['name']][0](df, **op['params'])
+            except Exception as e:
+                # Steps are checked when recorded; this guards against a
+                # history file that was edited or written by another version
+                raise CleaningError(f"Cleaning step {current} ({op['name']}) failed: {e}; "
+                                    f"undo it to continue") from e
+            self._cache(session_id, base, current, df)
+        if start + 1 < len(lineage):
+            self.logger.info(f"Applied {len(lineage) - start - 1} cleaning steps for session {session_id}")
+        return df
+
+    def _cache(self, session_id, base, version_id, df):
+        key = (session_id, base, version_id)
+        previous = self.snapshots.pop(key, None)
+        if previous is not None:
+            self.snapshot_bytes -= previous[1]
+        nbytes = int(df.memory_usage(deep=True, index=False).sum())
+        self.snapshots[key] = (df, nbytes)
+        self.snapshot_bytes += nbytes
+        # Columns shared with the stored frame are counted again, so this errs
+        # towards replaying steps rather than going over the budget
+        available = self.dataset_store.memory_budget - self.dataset_store.memory_used
+        while self.snapshots and (len(self.snapshots) > self.max_snapshots or self.snapshot_bytes > available):
+            _, (_, evicted) = self.snapshots.popitem(last=False)
+            self.snapshot_bytes -= evicted
+
+    def _lineage(self, history, version_id):
+        lineage = []
+        while version_id is not None:
+            lineage.append(version_id)
+            version_id = history['versions'][version_id]['parent']
+        return lineage[::-1]
+
+    def _history(self, session_id):
+        """Load the history, starting a new one if the upload changed"""
+        base = self.dataset_store.version(session_id)
+        if base is None:
+            return None
+        try:
+            with open(self._path(session_id)) as f:
+                history = json.load(f)
+            if history['base'] == base:
+                return history
+        except FileNotFoundError:
+            pass
+        return {
+            'base': base,
+            'current': 'v0',
+            'next_version': 1,
+            'versions': {'v0': {'parent': None, 'op': None, 'created_at': time.time()}},
+            'redo': {},
+        }
+
+    def _save(self, session_id, history):
+        path = self._path(session_id)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(history, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, session_id):
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise ValueError(f'Invalid session id {session_id!r}')
+        return os.path.join(self.history_folder, f'{session_id}.json')
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# Text columns become categoricals when they have at most this many distinct
+# values and no more than this share of the rows
+MAX_CATEGORIES = 10_000
+MAX_CATEGORY_RATIO = 0.5
+BOOLEAN_VALUES = {True, False}
+
+
+def _compact_float(series):
+    # float32 only when every value survives the round trip
+    compact = series.astype(np.float32)
+    if np.array_equal(compact.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+        return compact
+    return series
+
+
+def _compact_text(series):
+    values = series.dropna()
+    if values.empty:
+        return series
+    distinct = values.unique()
+    if series.isna().sum() == 0 and len(distinct) <= 2 and set(distinct) <= BOOLEAN_VALUES:
+        return series.astype(bool)
+    if len(distinct) <= MAX_CATEGORIES and len(distinct) <= MAX_CATEGORY_RATIO * len(series):
+        return series.astype('category')
+    return series
+
+
+def compact_column(series):
+    """series in the smallest dtype that holds exactly the same values"""
+    if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        # Signed only: unsigned columns wrap around when subtracted
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series):
+        return _compact_float(series)
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        return _compact_text(series)
+    return series
+
+
+def compact_dtypes(df):
+    """(compacted df, memory report) for a freshly loaded dataset.
+
+    Integers are downcast to the smallest type that fits, floats to float32
+    when that is lossless, text columns that only hold True/False to bool
+    and repeated text values to categoricals. The report gives the memory
+    use before and after, in bytes, and each column's dtype change.
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    columns = []
+    changes = {}
+    for i in range(df.shape[1]):
+        original = df.iloc[:, i]
+        columns.append(compact_column(original))
+        if columns[-1].dtype != original.dtype:
+            changes[str(original.name)] = f'{original.dtype} -> {columns[-1].dtype}'
+    compact = pd.concat(columns, axis=1) if columns else df
+    after = int(compact.memory_usage(deep=True).sum())
+    return compact, {
+        'memory_before': before,
+        'memory_after': after,
+        'saved_percent': round(100 * (1 - after / before), 1) if before else 0.0,
+        'dtype_changes': changes,
+    }
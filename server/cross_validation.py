@@ -0,0 +1,47 @@
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+from fingerprint import series_fingerprint
+
+EVALUATION_MODES = ('holdout', 'cv')
+
+# (target fingerprint, problem type, folds, seed) -> [(train_idx, valid_idx), ...]
+_FOLDS = OrderedDict()
+_FOLDS_LOCK = threading.Lock()
+_MAX_CACHED_FOLDS = 16
+
+
+def fold_indices(y, problem_type, n_folds=5, random_state=42):
+    """Positional (train, validation) index pairs for k-fold CV on y.
+
+    Classification targets are stratified when every class has at least
+    n_folds rows. The indices are computed once per target and reused by
+    every candidate model and every later run on the same training split.
+    """
+    n_folds = min(n_folds, len(y))
+    if n_folds < 2:
+        raise ValueError('Cross-validation needs at least 2 rows')
+    key = (series_fingerprint(y), problem_type, n_folds, random_state)
+    with _FOLDS_LOCK:
+        folds = _FOLDS.get(key)
+        if folds is not None:
+            _FOLDS.move_to_end(key)
+            return folds
+
+    from sklearn.model_selection import KFold, StratifiedKFold
+    counts = y.value_counts()
+    # A categorical target also counts categories that no row has
+    counts = counts[counts > 0]
+    if problem_type == 'classification' and counts.min() >= n_folds:
+        splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    else:
+        splitter = KFold(n_splits=n_folds, shuffle=True, random_state=random_state)
+    folds = list(splitter.split(np.zeros(len(y)), y))
+
+    with _FOLDS_LOCK:
+        _FOLDS[key] = folds
+        while len(_FOLDS) > _MAX_CACHED_FOLDS:
+            _FOLDS.popitem(last=False)
+    return folds
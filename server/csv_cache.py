@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from fingerprint import file_fingerprint
+
+
+class CsvCache:
+    """Parses each CSV once and serves later loads from a Feather copy.
+
+    Cache entries are keyed by the file's content hash, its mtime and the
+    read_csv options used, so an edited or replaced upload is converted again
+    while unchanged files are loaded by memory-mapping the uncompressed
+    Feather file instead of re-parsing text.
+
+    Every load refreshes its entry's mtime, and after each write the least
+    recently used entries are deleted until the folder holds at most
+    max_bytes. The entry just written is always kept.
+    """
+
+    def __init__(self, cache_folder, max_bytes=1024 * 1024 * 1024):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_folder, exist_ok=True)
+        # file_path -> ((mtime_ns, size), content hash)
+        self.hashes = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def read_csv(self, file_path, **read_kwargs):
+        """Drop-in for pd.read_csv(file_path, **read_kwargs)"""
+        cache_path = self.cache_path(file_path, **read_kwargs)
+        if os.path.exists(cache_path):
+            try:
+                os.utime(cache_path)
+                return feather.read_table(cache_path, memory_map=True).to_pandas()
+            except FileNotFoundError:
+                # Pruned by another process since the check; parse it again
+                pass
+
+        df = pd.read_csv(file_path, **read_kwargs)
+        if self._write(df, cache_path):
+            self._prune(keep=cache_path)
+        return df
+
+    def cache_path(self, file_path, **read_kwargs):
+        stat = os.stat(file_path)
+        options = hashlib.sha1(json.dumps(read_kwargs, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        return os.path.join(
+            self.cache_folder,
+            f'{self._content_hash(file_path, stat)}_{stat.st_mtime_ns}_{options}.feather')
+
+    def clear(self):
+        for name in os.listdir(self.cache_folder):
+            if name.endswith('.feather'):
+                os.remove(os.path.join(self.cache_folder, name))
+        with self.lock:
+            self.hashes.clear()
+
+    def _content_hash(self, file_path, stat):
+        # Only re-hash when the file's mtime or size changed since last time
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            known = self.hashes.get(file_path)
+        if known is not None and known[0] == version:
+            return known[1]
+        content_hash = file_fingerprint(file_path)
+        with self.lock:
+            self.hashes[file_path] = (version, content_hash)
+        return content_hash
+
+    def _write(self, df, cache_path):
+        tmp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            feather.write_feather(pa.Table.from_pandas(df), tmp_path, compression='uncompressed')
+            os.replace(tmp_path, cache_path)
+            return True
+        except Exception as e:
+            # A frame Arrow cannot represent is still returned, just not cached
+            self.logger.warning(f"Could not cache {cache_path}: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+
+    def _prune(self, keep):
+        entries = []
+        for name in os.listdir(self.cache_folder):
+            path = os.path.join(self.cache_folder, name)
+            if not name.endswith('.feather') or path == keep:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = os.path.getsize(keep) + sum(size for _, size, _ in entries)
+        # Oldest first; processes that mapped a removed file keep reading it
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.logger.info(f"Evicted {path} from the CSV cache ({size:,} bytes)")
+            except FileNotFoundError:
+                pass
+            total -= size
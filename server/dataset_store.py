@@ -0,0 +1,225 @@
+from collections import OrderedDict
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+MANIFEST = 'manifest.json'
+
+
+class DatasetStore:
+    """Session-keyed DataFrames held in an LRU cache under a memory budget.
+
+    Every frame is written through to spill_folder/<session_id>/ when it is
+    stored, one Feather file per column plus a manifest, so evicting it from
+    memory is free and a later get() reloads it lazily. Because the files are
+    the source of truth, several WSGI worker processes can share one store
+    folder: each manifest carries a generation id, and a get() that finds a
+    generation other than the one it cached reloads the frame. Files
+    dropped by a put() are only deleted one put later, so a worker that
+    has just read the previous manifest can still load it.
+
+    Every get() and put() refreshes the session folder's mtime, and
+    expire() deletes sessions that have been idle for longer than a limit.
+
+    With a SharedDatasets, a frame stored with its dataset_id is not copied
+    into the session folder: the manifest refers to the published dataset
+    and every worker attaches it zero-copy.
+    """
+
+    def __init__(self, spill_folder, memory_budget=512 * 1024 * 1024, shared_datasets=None):
+        self.spill_folder = spill_folder
+        self.memory_budget = memory_budget
+        self.shared_datasets = shared_datasets
+        os.makedirs(self.spill_folder, exist_ok=True)
+        # session_id -> (df, {column: nbytes}, manifest generation)
+        self.frames = OrderedDict()
+        self.memory_used = 0
+        self.lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    def get(self, session_id):
+        """Return the session's DataFrame, or None if it has none"""
+        folder = self._folder(session_id)
+        with self.lock:
+            for attempt in range(3):
+                manifest = self._read_manifest(folder)
+                if manifest is None:
+                    self._drop(session_id)
+                    return None
+                self._touch(folder)
+                entry = self.frames.get(session_id)
+                if entry is not None and entry[2] == manifest['generation']:
+                    self.frames.move_to_end(session_id)
+                    return entry[0]
+                try:
+                    df = self._load(folder, manifest)
+                except FileNotFoundError:
+                    # Another process replaced the manifest twice while we read it
+                    if attempt == 2:
+                        raise
+                    continue
+                self._remember(session_id, df, manifest['generation'])
+                return df
+
+    def put(self, session_id, df, dataset_id=None):
+        """Store df as the session's current dataset.
+
+        dataset_id says df is the whole of that published dataset.
+        """
+        folder = self._folder(session_id)
+        with self.lock:
+            os.makedirs(folder, exist_ok=True)
+            if dataset_id is not None and self.shared_datasets is not None:
+                self._put_shared(session_id, folder, df, dataset_id)
+                return
+            index_file = self._write_index(folder, df.index)
+            columns = [[col, self._write_column(folder, df[col])] for col in df.columns]
+            generation = self._replace_manifest(folder, {'columns': columns, 'index': index_file, 'dataset': None})
+            self._remember(session_id, df, generation)
+
+    def version(self, session_id):
+        """Token that changes whenever the session's dataset is replaced"""
+        manifest = self._read_manifest(self._folder(session_id))
+        return manifest['generation'] if manifest else None
+
+    def delete(self, session_id):
+        folder = self._folder(session_id)
+        with self.lock:
+            self._drop(session_id)
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def expire(self, max_idle_seconds):
+        """Delete sessions not read or written for max_idle_seconds; returns their ids"""
+        cutoff = time.time() - max_idle_seconds
+        expired = []
+        for session_id in self.session_ids():
+            try:
+                idle = os.path.getmtime(self._folder(session_id)) < cutoff
+            except FileNotFoundError:
+                continue
+            if idle:
+                self.delete(session_id)
+                expired.append(session_id)
+        if expired:
+            self.logger.info(f"Expired {len(expired)} idle sessions")
+        return expired
+
+    def session_ids(self):
+        """Ids of every stored session"""
+        return [name for name in os.listdir(self.spill_folder)
+                if SESSION_ID_PATTERN.match(name) and os.path.isdir(os.path.join(self.spill_folder, name))]
+
+    def referenced_datasets(self):
+        """Ids of the published datasets that stored sessions refer to"""
+        dataset_ids = set()
+        for session_id in self.session_ids():
+            manifest = self._read_manifest(self._folder(session_id))
+            if manifest and manifest.get('dataset'):
+                dataset_ids.add(manifest['dataset'])
+        return dataset_ids
+
+    def _put_shared(self, session_id, folder, df, dataset_id):
+        # Columns without a file of their own come from the published dataset
+        columns = [[col, None] for col in df.columns]
+        generation = self._replace_manifest(folder, {'columns': columns, 'index': None, 'dataset': dataset_id})
+        self._remember(session_id, df, generation)
+
+    def _load(self, folder, manifest):
+        shared = None
+        if manifest.get('dataset'):
+            shared = self.shared_datasets.attach(manifest['dataset'])
+        frames = [shared[[col]] if name is None else
+                  feather.read_table(os.path.join(folder, name), memory_map=True).to_pandas()
+                  for col, name in manifest['columns']]
+        df = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+        if manifest['index'] is not None:
+            index = feather.read_table(os.path.join(folder, manifest['index']), memory_map=True)
+            df.index = pd.Index(index.to_pandas().iloc[:, 0])
+        df.columns = [col for col, _ in manifest['columns']]
+        return df
+
+    def _write_column(self, folder, series):
+        name = f'{uuid.uuid4().hex}.feather'
+        table = pa.Table.from_pandas(series.to_frame(name='value'), preserve_index=False)
+        feather.write_feather(table, os.path.join(folder, name), compression='uncompressed')
+        return name
+
+    def _write_index(self, folder, index):
+        if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+            return None
+        name = f'{uuid.uuid4().hex}.feather'
+        table = pa.Table.from_pandas(pd.DataFrame({'index': index}), preserve_index=False)
+        feather.write_feather(table, os.path.join(folder, name), compression='uncompressed')
+        return name
+
+    def _read_manifest(self, folder):
+        try:
+            with open(os.path.join(folder, MANIFEST)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _replace_manifest(self, folder, manifest):
+        """Write manifest under a new generation and return the generation.
+
+        Files only the previous manifest refers to are kept until the next
+        replacement; older ones are removed.
+        """
+        previous = self._read_manifest(folder) or {'columns': [], 'index': None}
+        manifest['generation'] = uuid.uuid4().hex
+        path = os.path.join(folder, MANIFEST)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+        referenced = {manifest['index'], previous['index']}
+        referenced.update(name for _, name in manifest['columns'] + previous['columns'])
+        for name in os.listdir(folder):
+            if name.endswith('.feather') and name not in referenced:
+                try:
+                    os.remove(os.path.join(folder, name))
+                except FileNotFoundError:
+                    pass
+        return manifest['generation']
+
+    def _remember(self, session_id, df, generation):
+        self._drop(session_id)
+        sizes = {col: int(df[col].memory_usage(deep=True, index=False)) for col in df.columns}
+        self.frames[session_id] = (df, sizes, generation)
+        self.memory_used += sum(sizes.values())
+        self._evict()
+
+    def _drop(self, session_id):
+        entry = self.frames.pop(session_id, None)
+        if entry is not None:
+            self.memory_used -= sum(entry[1].values())
+
+    def _evict(self):
+        # Keep at least the most recently used frame even if it alone is
+        # over budget; everything evicted is already on disk.
+        while self.memory_used > self.memory_budget and len(self.frames) > 1:
+            session_id, (_, sizes, _) = self.frames.popitem(last=False)
+            self.memory_used -= sum(sizes.values())
+            self.logger.info(f"Evicted dataset for session {session_id} ({sum(sizes.values()):,} bytes)")
+
+    def _touch(self, folder):
+        try:
+            os.utime(folder)
+        except FileNotFoundError:
+            pass
+
+    def _folder(self, session_id):
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise ValueError(f'Invalid session id {session_id!r}')
+        return os.path.join(self.spill_folder, session_id)
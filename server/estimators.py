@@ -0,0 +1,59 @@
+from collections.abc import MutableMapping
+import importlib
+
+# Candidate models by name: ('module:Class', constructor params). The
+# libraries are only imported when a model is first used.
+CLASSIFIERS = {
+    'random_forest': ('sklearn.ensemble:RandomForestClassifier', {'n_estimators': 100, 'random_state': 42}),
+    'xgboost': ('xgboost:XGBClassifier', {'random_state': 42}),
+    'logistic_regression': ('sklearn.linear_model:LogisticRegression', {'random_state': 42}),
+    'svm': ('sklearn.svm:SVC', {'random_state': 42}),
+}
+REGRESSORS = {
+    'random_forest': ('sklearn.ensemble:RandomForestRegressor', {'n_estimators': 100, 'random_state': 42}),
+    'xgboost': ('xgboost:XGBRegressor', {'random_state': 42}),
+    'linear_regression': ('sklearn.linear_model:LinearRegression', {}),
+    'svr': ('sklearn.svm:SVR', {}),
+}
+
+
+def load_object(path):
+    """The object at 'package.module:name', importing the module if needed"""
+    module_name, _, name = path.partition(':')
+    return getattr(importlib.import_module(module_name), name)
+
+
+class EstimatorRegistry(MutableMapping):
+    """A dict of estimators that creates each one on first access.
+
+    Listing names or checking membership imports nothing, so a server that
+    never trains a model never loads xgboost or most of scikit-learn.
+    Estimators assigned directly are stored as they are.
+    """
+
+    def __init__(self, specs):
+        self.specs = dict(specs)
+        self.instances = {}
+
+    def __getitem__(self, name):
+        if name not in self.instances:
+            path, params = self.specs[name]
+            self.instances[name] = load_object(path)(**params)
+        return self.instances[name]
+
+    def __setitem__(self, name, estimator):
+        self.specs[name] = None
+        self.instances[name] = estimator
+
+    def __delitem__(self, name):
+        del self.specs[name]
+        self.instances.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self.specs
+
+    def __iter__(self):
+        return iter(self.specs)
+
+    def __len__(self):
+        return len(self.specs)
@@ -1,12 +1,21 @@
 
 import pandas as pd
+import numpy as np
+import codecs
 import os
 import logging
+from csv_cache import CsvCache
+
+DATE_PATTERN = r'\d{4}-\d{2}-\d{2}'
+# Share of a candidate's non-null values allowed to fail date parsing; the
+# original check converted a column only if every value parsed
+MAX_DATE_FAILURE_RATIO = 0.0
 
 class FileManager:
-    def __init__(self, upload_folder='uploads'):
+    def __init__(self, upload_folder='uploads', csv_cache=None):
         self.upload_folder = os.path.join(os.path.dirname(__file__), upload_folder)
         os.makedirs(self.upload_folder, exist_ok=True)
+        self.csv_cache = csv_cache or CsvCache(os.path.join(os.path.dirname(__file__), 'cache', 'csv'))
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
@@ -26,62 +35,143 @@ class FileManager:
             if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
                 self.logger.error("File is empty or does not exist")
                 return False, None
-                
-            # Try reading with different encodings if needed
-            for encoding in ['utf-8', 'latin1', 'iso-8859-1']:
-                try:
-                    df = pd.read_csv(file_path, encoding=encoding)
-                    if df.empty or len(df.columns) == 0:
-                        continue
-                    fixed = False
-                    break
-                except:
-                    continue
-            else:
+
+            # Detect the encoding from the raw bytes so the file is parsed once
+            encoding = self._detect_encoding(file_path)
+            try:
+                df = self.csv_cache.read_csv(file_path, encoding=encoding)
+            except Exception:
+                df = None
+            if df is None or df.empty or len(df.columns) == 0:
                 self.logger.error("Could not parse CSV file with any encoding")
                 return False, None
-            
-            # Fix 1: Remove duplicate rows
-            initial_rows = len(df)
-            df = df.drop_duplicates()
-            if len(df) < initial_rows:
-                fixed = True
-                self.logger.info(f"Removed {initial_rows - len(df)} duplicate rows")
-
-            # Fix 2: Convert date columns
-            date_columns = df.select_dtypes(include=['object']).columns
-            for col in date_columns:
-                try:
-                    if df[col].str.match(r'\d{4}-\d{2}-\d{2}').any():
-                        df[col] = pd.to_datetime(df[col])
-                        fixed = True
-                        self.logger.info(f"Converted {col} to datetime")
-                except:
-                    pass
-
-            # Fix 3: Handle missing values
-            if df.isnull().any().any():
-                numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
-                for col in numeric_cols:
-                    if df[col].isnull().any():
-                        df[col] = df[col].fillna(df[col].mean())
-                        fixed = True
-                
-                categorical_cols = df.select_dtypes(include=['object']).columns
-                for col in categorical_cols:
-                    if df[col].isnull().any():
-                        df[col] = df[col].fillna(df[col].mode()[0])
-                        fixed = True
-                
-                self.logger.info("Fixed missing values")
+            df, fixed = self.fix_frame(df)
 
             if fixed:
                 new_path = file_path.replace('.csv', '_fixed.csv')
                 df.to_csv(new_path, index=False)
                 return True, new_path
-            
+
             return False, file_path
 
         except Exception as e:
             self.logger.error(f"Error processing file: {str(e)}")
             return False, None
+
+    def fix_frame(self, df):
+        """Deduplicate, parse date columns and fill nulls; returns (df, fixed)"""
+        fixed = False
+
+        # Fix 1: Remove duplicate rows
+        initial_rows = len(df)
+        df = df[~self._duplicated_rows(df)]
+        if len(df) < initial_rows:
+            fixed = True
+            self.logger.info(f"Removed {initial_rows - len(df)} duplicate rows")
+
+        # Fix 2: Convert date columns, shortlisted on a sample and confirmed
+        # on the full column
+        for col in self._date_candidates(df):
+            parsed = self._parse_dates(df[col])
+            if parsed is not None:
+                df[col] = parsed
+                fixed = True
+                self.logger.info(f"Converted {col} to datetime")
+
+        # Fix 3: Handle missing values
+        fill_values = self._fill_values(df)
+        if fill_values:
+            df = df.fillna(fill_values)
+            fixed = True
+            self.logger.info("Fixed missing values")
+
+        return df, fixed
+
+    def _detect_encoding(self, file_path, chunk_size=1 << 20):
+        """utf-8 (with or without BOM) if the bytes decode cleanly, else latin1"""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        with open(file_path, 'rb') as f:
+            chunk = f.read(chunk_size)
+            encoding = 'utf-8-sig' if chunk.startswith(codecs.BOM_UTF8) else 'utf-8'
+            try:
+                while chunk:
+                    decoder.decode(chunk)
+                    chunk = f.read(chunk_size)
+                decoder.decode(b'', final=True)
+            except UnicodeDecodeError:
+                # latin1 maps every byte, so it always parses
+                return 'latin1'
+        return encoding
+
+    def _duplicated_rows(self, df):
+        """Same result as df.duplicated(), found by hashing each row once.
+
+        Only rows whose hash occurs more than once are compared exactly, so
+        hash collisions never drop a distinct row.
+        """
+        hashes = pd.Series(self._row_hashes(df), index=df.index)
+        candidates = hashes.duplicated(keep=False)
+        duplicated = pd.Series(False, index=df.index)
+        if candidates.any():
+            duplicated[candidates] = df[candidates].duplicated()
+        return duplicated
+
+    def _row_hashes(self, df):
+        """One uint64 per row combining a hash of every column"""
+        hashes = np.zeros(len(df), dtype=np.uint64)
+        for _, series in df.items():
+            if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+                column = pd.util.hash_pandas_object(series, index=False).to_numpy()
+            else:
+                # Hashing text is slow, so hash its factorized codes instead;
+                # they only need to be consistent within this frame
+                codes, _ = pd.factorize(series)
+                column = pd.util.hash_array(codes)
+            hashes = hashes * np.uint64(1000003) ^ column
+        return hashes
+
+    def _date_candidates(self, df, sample_size=1000):
+        """Text columns whose sampled values look like ISO dates.
+
+        Only a shortlist: _parse_dates confirms each one on the full column.
+        """
+        candidates = []
+        for col in df.select_dtypes(include=['object', 'string']).columns:
+            values = df[col].dropna()
+            if len(values) > sample_size:
+                values = values.iloc[::len(values) // sample_size]
+            try:
+                if values.astype(str).str.match(DATE_PATTERN).any():
+                    candidates.append(col)
+            except (TypeError, AttributeError):
+                pass
+        return candidates
+
+    def _parse_dates(self, values):
+        """values as datetimes, or None if too many of them do not parse"""
+        try:
+            parsed = pd.to_datetime(values, errors='coerce')
+        except (TypeError, ValueError):
+            return None
+        present = values.notna().sum()
+        failed = (parsed.isna() & values.notna()).sum()
+        if present == 0 or failed > present * MAX_DATE_FAILURE_RATIO:
+            return None
+        return parsed
+
+    def _fill_values(self, df):
+        """One fillna mapping: column mean for numeric, mode for text columns"""
+        null_counts = df.isnull().sum()
+        with_nulls = null_counts[null_counts > 0].index
+        if len(with_nulls) == 0:
+            return {}
+
+        numeric_cols = df[with_nulls].select_dtypes(include='number').columns
+        text_cols = df[with_nulls].select_dtypes(include=['object', 'string']).columns
+        fill_values = {}
+        if len(numeric_cols) > 0:
+            fill_values.update(df[numeric_cols].mean().items())
+        if len(text_cols) > 0:
+            fill_values.update(df[text_cols].mode().iloc[0].items())
+        # Columns with no values at all have nothing to fill with
+        return {col: value for col, value in fill_values.items() if pd.notna(value)}
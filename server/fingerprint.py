@@ -0,0 +1,26 @@
+import hashlib
+
+import pandas as pd
+
+
+def file_fingerprint(file_path, block_size=1 << 20):
+    """SHA-1 of a file's contents, read in blocks"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def series_fingerprint(series):
+    """SHA-1 of a column's name, dtype and values"""
+    digest = hashlib.sha1(f'{series.name}:{series.dtype}:'.encode())
+    digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df):
+    """SHA-1 of a DataFrame's columns, dtypes and values, ignoring the index"""
+    digest = hashlib.sha1(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+import json
+import threading
+
+from fingerprint import frame_fingerprint
+
+
+def fit_key(data, columns, model_name, params):
+    """Cache key for model_name fitted with params on data[columns]"""
+    return (frame_fingerprint(data[list(columns)]), model_name,
+            json.dumps(params, sort_keys=True, default=str))
+
+
+class FittedModelCache:
+    """Fitted time-series models keyed by (series fingerprint, model, params).
+
+    Forecasting another horizon, re-plotting or re-running a bake-off on an
+    unchanged series reuses the fitted model instead of fitting it again.
+    Only the `max_entries` most recently used models are kept.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            model = self.entries.get(key)
+            if model is not None:
+                self.entries.move_to_end(key)
+            return model
+
+    def put(self, key, model):
+        with self.lock:
+            self.entries[key] = model
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __getstate__(self):
+        # Worker processes get an empty cache rather than a copy
+        return {'max_entries': self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_entries'])
+
+
+FITTED_MODELS = FittedModelCache()
@@ -0,0 +1,299 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from fingerprint import frame_fingerprint
+from parallel import run_tasks, split_cores
+from preprocessing import FEATURE_CACHE, MODEL_VIEWS, encode_target, with_preprocessor
+
+MODELS_FOLDER = os.path.join(os.path.dirname(__file__), 'models')
+SEARCH_SPACE_FILES = {
+    'classification': 'classification.yml',
+    'regression': 'regression.yml',
+}
+STRATEGIES = ('halving', 'random')
+
+
+def load_search_spaces(problem_type, models_folder=MODELS_FOLDER):
+    """{model name: search space} for the models listed with a key and a
+    search section in the problem type's YAML file.
+
+    A space maps each parameter to a list of choices or to a range
+    {low, high, log, type}, where type is 'int' or 'float' (the default).
+    """
+    if problem_type not in SEARCH_SPACE_FILES:
+        raise ValueError(f"No search spaces for {problem_type} models")
+    with open(os.path.join(models_folder, SEARCH_SPACE_FILES[problem_type])) as f:
+        catalog = yaml.safe_load(f)
+    return {entry['key']: entry['search'] for entry in catalog['models']
+            if entry.get('key') and entry.get('search')}
+
+
+def sample_params(space, rng):
+    """One random draw from a search space"""
+    params = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            params[name] = spec[rng.integers(len(spec))]
+            continue
+        low, high = spec['low'], spec['high']
+        if spec.get('log'):
+            value = math.exp(rng.uniform(math.log(low), math.log(high)))
+        else:
+            value = rng.uniform(low, high)
+        params[name] = int(round(value)) if spec.get('type') == 'int' else float(value)
+    return params
+
+
+def _score(problem_type, y_true, y_pred):
+    from sklearn.metrics import accuracy_score, r2_score
+    # Higher is better for both
+    if problem_type == 'classification':
+        return float(accuracy_score(y_true, y_pred))
+    return float(r2_score(y_true, y_pred))
+
+
+def _run_trial(estimator, params, problem_type, X_train, y_train, X_valid, y_valid):
+    """Fit one parameter set; runs in a worker process. Returns (score, seconds)"""
+    from sklearn.base import clone
+    start = time.perf_counter()
+    model = clone(estimator).set_params(**params).fit(X_train, y_train)
+    score = _score(problem_type, y_valid, model.predict(X_valid))
+    return score, time.perf_counter() - start
+
+
+class TrialCache:
+    """Trial scores by dataset fingerprint, model, parameters and row budget.
+
+    Scores are kept in memory and in cache_folder/<fingerprint>.json, so
+    repeating a search on an unchanged dataset, or overlapping searches,
+    only fit the parameter sets that were never tried.
+    """
+
+    def __init__(self, cache_folder):
+        self.cache_folder = cache_folder
+        os.makedirs(self.cache_folder, exist_ok=True)
+        # fingerprint -> {trial key: score}
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, fingerprint, model_name, params, n_rows):
+        with self.lock:
+            return self._scores(fingerprint).get(self._key(model_name, params, n_rows))
+
+    def put(self, fingerprint, model_name, params, n_rows, score):
+        with self.lock:
+            scores = self._scores(fingerprint)
+            scores[self._key(model_name, params, n_rows)] = score
+            path = self._path(fingerprint)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(scores, f)
+            os.replace(tmp_path, path)
+
+    def _scores(self, fingerprint):
+        scores = self.entries.get(fingerprint)
+        if scores is None:
+            try:
+                with open(self._path(fingerprint)) as f:
+                    scores = json.load(f)
+            except (FileNotFoundError, ValueError):
+                scores = {}
+            self.entries[fingerprint] = scores
+        return scores
+
+    def _key(self, model_name, params, n_rows):
+        payload = json.dumps([model_name, params, n_rows], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _path(self, fingerprint):
+        return os.path.join(self.cache_folder, f'{os.path.basename(fingerprint)}.json')
+
+
+class HyperparameterSearch:
+    """Tunes one of ModelTrainer's models over its YAML search space.
+
+    The trainer's training split is divided again into a fit and a
+    validation part; trials are scored on the validation part and the
+    trainer's test split is only used to report the refitted best model.
+    Trials run in worker processes through parallel.run_tasks, and scores
+    already in the TrialCache are not recomputed.
+
+    'halving' (successive halving) scores every sampled parameter set on a
+    small sample of rows, keeps the best 1/eta and repeats with eta times
+    more rows until the survivors get all of them. 'random' scores sampled
+    sets in rounds of one per worker and stops early once `patience` trials
+    in a row have not improved on the best score.
+    """
+
+    def __init__(self, trainer, trial_cache, n_workers=None, trial_timeout=None,
+                 feature_cache=None, models_folder=MODELS_FOLDER, random_state=42):
+        self.trainer = trainer
+        self.trial_cache = trial_cache
+        self.n_workers = n_workers
+        self.trial_timeout = trial_timeout
+        self.feature_cache = feature_cache or FEATURE_CACHE
+        self.models_folder = models_folder
+        self.random_state = random_state
+        self.logger = logging.getLogger(__name__)
+
+    def search(self, X, y, model_name, problem_type='classification', strategy='halving',
+               n_trials=27, eta=3, patience=8, progress=None):
+        """Tune model_name, save the refitted best model and return a summary"""
+        from sklearn.model_selection import train_test_split
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy {strategy}")
+        spaces = load_search_spaces(problem_type, self.models_folder)
+        models, _, _ = self.trainer._model_functions(problem_type)
+        if model_name not in models or model_name not in spaces:
+            raise ValueError(f"No search space for {problem_type} model {model_name}")
+        if progress:
+            progress(model_name, 'running')
+
+        try:
+            start = time.perf_counter()
+            target, classes = encode_target(y) if problem_type == 'classification' else (y, None)
+            X_train, X_test, y_train, y_test = self.trainer.prepare_data(X, target)
+            X_fit, X_valid, y_fit, y_valid = train_test_split(
+                X_train, y_train, test_size=0.2, random_state=self.random_state)
+            view = MODEL_VIEWS.get(model_name, 'linear')
+            _, Xt_fit, Xt_valid = self.feature_cache.transform_split(X_fit, X_valid, [view])[view]
+            fingerprint = frame_fingerprint(pd.concat([X, y], axis=1))
+            # Row budgets take a prefix of one fixed shuffle, so a parameter
+            # set scored on n rows always sees the same rows
+            order = np.random.default_rng(self.random_state).permutation(len(y_fit))
+            data = (models[model_name], problem_type, Xt_fit, y_fit, Xt_valid, y_valid, order)
+            prepare_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            candidates = self._candidates(spaces[model_name], n_trials)
+            if strategy == 'halving':
+                trials = self._successive_halving(model_name, fingerprint, data, candidates, eta)
+            else:
+                trials = self._random_search(model_name, fingerprint, data, candidates, patience)
+            search_seconds = time.perf_counter() - start
+
+            scored = [trial for trial in trials if trial['score'] is not None]
+            if not scored:
+                raise ValueError(f"Every trial failed: {trials[0]['error'] if trials else 'no trials'}")
+            full_rows = len(y_fit)
+            best = max((t for t in scored if t['n_rows'] == full_rows), key=lambda t: t['score'],
+                       default=max(scored, key=lambda t: t['score']))
+
+            # Refit on the whole training split and report on the test split
+            features = self.feature_cache.transform_split(X_train, X_test, [view])[view]
+            from sklearn.base import clone
+            estimator = clone(models[model_name]).set_params(**best['params'])
+            model, evaluation, timings = self.trainer._fit_and_evaluate(
+                model_name, problem_type, features[1], features[2], y_train, y_test, estimator=estimator)
+            timings = dict(timings, prepare_seconds=prepare_seconds, search_seconds=search_seconds)
+            metadata = self.trainer._model_metadata(X, y, evaluation, timings, fingerprint, classes)
+            metadata['params'] = best['params']
+            metadata['search'] = {'strategy': strategy, 'trials': len(trials),
+                                  'validation_score': best['score']}
+            model_path = self.trainer.save_model(with_preprocessor(features[0], model, classes),
+                                                 model_name, problem_type, metadata)
+        except Exception:
+            if progress:
+                progress(model_name, 'failed')
+            raise
+
+        if progress:
+            progress(model_name, 'completed')
+        return {
+            'model_name': model_name,
+            'strategy': strategy,
+            'best_params': best['params'],
+            'best_score': best['score'],
+            'evaluation': evaluation,
+            'timings': timings,
+            'trials': trials,
+            'cached_trials': sum(1 for trial in trials if trial['cached']),
+            'model_path': model_path,
+        }
+
+    def _candidates(self, space, n_trials):
+        rng = np.random.default_rng(self.random_state)
+        candidates, seen = [], set()
+        # Small discrete spaces run out of distinct draws before n_trials
+        for _ in range(n_trials * 10):
+            if len(candidates) == n_trials:
+                break
+            params = sample_params(space, rng)
+            key = json.dumps(params, sort_keys=True, default=str)
+            if key not in seen:
+                seen.add(key)
+                candidates.append(params)
+        return candidates
+
+    def _successive_halving(self, model_name, fingerprint, data, candidates, eta):
+        full_rows = len(data[3])
+        n_rungs = 1
+        while eta ** n_rungs <= len(candidates):
+            n_rungs += 1
+        trials = []
+        for rung in range(n_rungs):
+            n_rows = max(min(full_rows, 2 * eta), int(full_rows / eta ** (n_rungs - 1 - rung)))
+            results = self._evaluate(model_name, fingerprint, data, candidates, n_rows)
+            trials.extend(results)
+            scored = sorted((t for t in results if t['score'] is not None),
+                            key=lambda t: t['score'], reverse=True)
+            if rung < n_rungs - 1:
+                candidates = [t['params'] for t in scored[:max(1, len(scored) // eta)]]
+                if not candidates:
+                    break
+        return trials
+
+    def _random_search(self, model_name, fingerprint, data, candidates, patience):
+        full_rows = len(data[3])
+        n_workers, _ = split_cores(len(candidates), self.n_workers)
+        trials, best, since_best = [], None, 0
+        for start in range(0, len(candidates), n_workers):
+            for trial in self._evaluate(model_name, fingerprint, data,
+                                        candidates[start:start + n_workers], full_rows):
+                trials.append(trial)
+                if trial['score'] is not None and (best is None or trial['score'] > best):
+                    best, since_best = trial['score'], 0
+                else:
+                    since_best += 1
+            if since_best >= patience:
+                self.logger.info(f"Stopping {model_name} search after {len(trials)} trials")
+                break
+        return trials
+
+    def _evaluate(self, model_name, fingerprint, data, candidates, n_rows):
+        """Score parameter sets on the first n_rows fit rows, cached ones first"""
+        estimator, problem_type, X_fit, y_fit, X_valid, y_valid, order = data
+        trials, tasks = [], {}
+        for i, params in enumerate(candidates):
+            score = self.trial_cache.get(fingerprint, model_name, params, n_rows)
+            trials.append({'params': params, 'n_rows': n_rows, 'score': score,
+                           'seconds': 0.0, 'cached': score is not None})
+            if score is None:
+                rows = order[:n_rows]
+                tasks[i] = (estimator, params, problem_type, X_fit[rows],
+                            y_fit.iloc[rows], X_valid, y_valid)
+
+        if tasks:
+            n_workers, n_threads = split_cores(len(tasks), self.n_workers)
+            if 'n_jobs' in estimator.get_params():
+                # Cap a copy; the trainer's estimator keeps its own setting
+                from sklearn.base import clone
+                estimator = clone(estimator).set_params(n_jobs=n_threads)
+                tasks = {i: (estimator,) + args[1:] for i, args in tasks.items()}
+            outcomes = run_tasks(_run_trial, tasks, n_workers=n_workers, timeout=self.trial_timeout)
+            for i, (ok, outcome) in outcomes.items():
+                if not ok:
+                    trials[i]['error'] = outcome
+                    continue
+                trials[i]['score'], trials[i]['seconds'] = outcome
+                self.trial_cache.put(fingerprint, model_name, candidates[i], n_rows, outcome[0])
+        return trials
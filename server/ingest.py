@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from profiler import DatasetProfile
+
+CHUNK_BYTES = 1 << 20
+CHUNK_ROWS = 100_000
+
+
+def save_stream(stream, file_path, chunk_size=CHUNK_BYTES):
+    """Copy a request body to file_path chunk by chunk, returning bytes written.
+
+    The body goes to a uniquely named temporary file first, so concurrent
+    uploads of the same name never write into each other; the last one to
+    finish replaces the file.
+    """
+    written = 0
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.',
+                                    prefix=f'.{os.path.basename(file_path)}.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in iter(lambda: stream.read(chunk_size), b''):
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
+
+
+class DuplicateCounter:
+    """Counts duplicate rows from 64-bit row hashes without keeping them all.
+
+    Hashes are appended to on-disk partitions chosen by their top bits, so
+    counting needs only one partition in memory at a time.
+    """
+
+    def __init__(self, partitions=64):
+        self.partitions = partitions
+        self.shift = np.uint64(64 - int(np.log2(partitions)))
+        self.folder = tempfile.mkdtemp(prefix='forcastica-dedup-')
+
+    def update(self, row_hashes):
+        row_hashes = np.asarray(row_hashes, dtype=np.uint64)
+        buckets = row_hashes >> self.shift
+        order = np.argsort(buckets, kind='stable')
+        row_hashes, buckets = row_hashes[order], buckets[order]
+        bounds = np.searchsorted(buckets, np.arange(self.partitions + 1))
+        for part in range(self.partitions):
+            start, end = bounds[part], bounds[part + 1]
+            if start < end:
+                with open(self._path(part), 'ab') as f:
+                    row_hashes[start:end].tofile(f)
+
+    def count(self):
+        duplicates = 0
+        for part in range(self.partitions):
+            path = self._path(part)
+            if os.path.exists(path):
+                row_hashes = np.fromfile(path, dtype=np.uint64)
+                duplicates += len(row_hashes) - len(np.unique(row_hashes))
+        return duplicates
+
+    def close(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def _path(self, part):
+        return os.path.join(self.folder, f'{part}.bin')
+
+
+def _merge_dtype(known, new):
+    if known is None or known == new:
+        return new
+    if pd.api.types.is_numeric_dtype(known) and pd.api.types.is_numeric_dtype(new):
+        return np.result_type(known, new)
+    return np.dtype('object')
+
+
+class ChunkedCsvProfiler:
+    """Schema, null counts, duplicates and column profiles in one pass.
+
+    Feed it DataFrame chunks with update(); memory use depends on the chunk
+    size and the number of columns, not on the number of rows.
+    """
+
+    def __init__(self):
+        self.columns = []
+        self.dtypes = {}
+        self.preview = None
+        self.profile = DatasetProfile()
+        self.duplicates = DuplicateCounter()
+
+    def update(self, chunk):
+        if self.preview is None:
+            self.columns = chunk.columns.tolist()
+            self.preview = chunk.head(10)
+        self.duplicates.update(pd.util.hash_pandas_object(chunk, index=False).to_numpy())
+        for col in chunk.columns:
+            self.dtypes[col] = _merge_dtype(self.dtypes.get(col), chunk[col].dtype)
+        self.profile.update(chunk)
+
+    def result(self):
+        try:
+            duplicate_rows = self.duplicates.count()
+        finally:
+            self.duplicates.close()
+        return {
+            'num_records': f"{self.profile.num_records:,}",
+            'columns': self.columns,
+            'column_types': {col: str(dtype) for col, dtype in self.dtypes.items()},
+            'null_counts': self.profile.null_counts(),
+            'duplicate_rows': duplicate_rows,
+            'describe': self.profile.describe(),
+            'preview': [] if self.preview is None else self.preview.to_dict(orient='records')
+        }
+
+
+def profile_csv(file_path, chunksize=CHUNK_ROWS, **read_kwargs):
+    """Profile a CSV of any size with read_csv(chunksize=...)"""
+    profiler = ChunkedCsvProfiler()
+    try:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, **read_kwargs):
+            profiler.update(chunk)
+    except Exception:
+        profiler.duplicates.close()
+        raise
+    return profiler.result()
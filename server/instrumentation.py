@@ -0,0 +1,221 @@
+from contextlib import contextmanager
+import contextvars
+import cProfile
+import logging
+import os
+import re
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+from flask import g, request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+MEMORY_BUCKETS = tuple(2 ** power for power in range(20, 34, 2))  # 1 MiB to 4 GiB
+
+# Spans recorded while the current request is handled: [(name, seconds)]
+_REQUEST_SPANS = contextvars.ContextVar('request_spans', default=None)
+
+
+def _label_value(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Histogram:
+    """A Prometheus histogram with a fixed set of label names"""
+
+    def __init__(self, name, documentation, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        # label values -> ([count per bucket], sum)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            counts, total = self.series.get(labels) or ([0] * len(self.buckets), 0.0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.series[labels] = (counts, total + value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self.series.items())
+        for labels, (counts, total) in series:
+            label_text = ','.join(f'{name}="{_label_value(value)}"'
+                                  for name, value in zip(self.label_names, labels))
+            prefix = f'{label_text},' if label_text else ''
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{_format_value(bound)}"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {counts[-1]}')
+        return lines
+
+
+class Counter:
+    """A Prometheus counter with a fixed set of label names"""
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self.lock:
+            series = sorted(self.series.items())
+        for labels, value in series:
+            label_text = ','.join(f'{name}="{_label_value(v)}"' for name, v in zip(self.label_names, labels))
+            lines.append(f'{self.name}{{{label_text}}} {value}')
+        return lines
+
+
+REQUEST_SECONDS = Histogram('forcastica_request_duration_seconds',
+                            'Time to build each response, by route', ['route', 'method'])
+REQUESTS = Counter('forcastica_requests_total', 'Responses by route and status', ['route', 'method', 'status'])
+REQUEST_PEAK_BYTES = Histogram('forcastica_request_peak_memory_bytes',
+                               'Peak Python heap growth while handling a request, by route',
+                               ['route'], buckets=MEMORY_BUCKETS)
+SPAN_SECONDS = Histogram('forcastica_span_duration_seconds',
+                         'Time spent in instrumented code paths', ['span'])
+MODEL_SECONDS = Histogram('forcastica_model_phase_seconds',
+                          'Time spent per model in each training phase', ['model', 'phase'])
+METRICS = [REQUEST_SECONDS, REQUESTS, REQUEST_PEAK_BYTES, SPAN_SECONDS, MODEL_SECONDS]
+
+
+def record(name, seconds):
+    """Count an already measured duration as a span"""
+    SPAN_SECONDS.observe((name,), seconds)
+    spans = _REQUEST_SPANS.get()
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as span `name`.
+
+    Every span feeds the span histogram; spans inside a request are also
+    listed in that response's Server-Timing header.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def record_model_timings(model_name, timings):
+    """Feed a trainer's {'<phase>_seconds': seconds} timings into the model histogram"""
+    for key, seconds in timings.items():
+        if key.endswith('_seconds') and isinstance(seconds, (int, float)):
+            MODEL_SECONDS.observe((model_name, key[:-len('_seconds')]), seconds)
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    lines += ['# HELP forcastica_process_max_rss_bytes Peak resident memory of this process',
+              '# TYPE forcastica_process_max_rss_bytes gauge',
+              f'forcastica_process_max_rss_bytes {max_rss}']
+    return '\n'.join(lines) + '\n'
+
+
+class RequestInstrumentation:
+    """Per-request latency, spans, peak memory and optional cProfile dumps.
+
+    Every response is timed into the latency histogram under its route
+    pattern and gets a Server-Timing header listing the spans recorded
+    while it was built. With trace_memory the peak Python heap growth per
+    request is measured with tracemalloc, which slows allocation-heavy
+    code, and is only exact when requests do not overlap. With
+    profile_folder every request slower than profile_min_seconds is
+    profiled and its stats written there as a .prof file for pstats or
+    snakeviz.
+
+    Metrics are per process; scrape each worker, or sum across them.
+    """
+
+    def __init__(self, app, trace_memory=False, profile_folder=None, profile_min_seconds=0.0):
+        self.trace_memory = trace_memory
+        self.profile_folder = profile_folder
+        self.profile_min_seconds = profile_min_seconds
+        self.logger = logging.getLogger(__name__)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.profile_folder:
+            os.makedirs(self.profile_folder, exist_ok=True)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def _start(self):
+        g.instrumentation_spans = []
+        g.instrumentation_token = _REQUEST_SPANS.set(g.instrumentation_spans)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            g.instrumentation_memory = tracemalloc.get_traced_memory()[0]
+        if self.profile_folder:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.instrumentation_profiler = profiler
+            except ValueError:
+                # Python 3.12+ allows one active profiler; overlapping requests go unprofiled
+                pass
+        g.instrumentation_start = time.perf_counter()
+
+    def _finish(self, response):
+        if 'instrumentation_start' not in g:
+            return response
+        seconds = time.perf_counter() - g.instrumentation_start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe((route, request.method), seconds)
+        REQUESTS.inc((route, request.method, str(response.status_code)))
+
+        if self.trace_memory:
+            peak = max(0, tracemalloc.get_traced_memory()[1] - g.instrumentation_memory)
+            REQUEST_PEAK_BYTES.observe((route,), peak)
+        if 'instrumentation_profiler' in g:
+            g.instrumentation_profiler.disable()
+            if seconds >= self.profile_min_seconds:
+                self._dump_profile(g.instrumentation_profiler, route, seconds)
+
+        totals = {}
+        for name, span_seconds in g.instrumentation_spans:
+            totals[name] = totals.get(name, 0.0) + span_seconds
+        timings = [f'{name};dur={span_seconds * 1000:.1f}' for name, span_seconds in totals.items()]
+        timings.append(f'total;dur={seconds * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+        # Lets browser clients on other origins read the header
+        response.headers['Timing-Allow-Origin'] = '*'
+        _REQUEST_SPANS.reset(g.instrumentation_token)
+        return response
+
+    def _dump_profile(self, profiler, route, seconds):
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', route.strip('/')) or 'root'
+        path = os.path.join(self.profile_folder,
+                            f'{time.strftime("%Y%m%d-%H%M%S")}_{request.method}_{name}_{seconds * 1000:.0f}ms.prof')
+        try:
+            profiler.dump_stats(path)
+        except OSError as e:
+            self.logger.warning(f"Could not write profile {path}: {e}")
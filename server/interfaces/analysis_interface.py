@@ -1,48 +1,50 @@
-
 from flask import jsonify
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+from plot_cache import PlotCache
+from chart_data import distribution_chart
+from cleaning_pipeline import NULL_ACTIONS, CleaningError
+from instrumentation import span
 
 class AnalysisInterface:
-    def __init__(self, app):
+    def __init__(self, app, cleaning_pipeline, shared_datasets=None):
         self.app = app
-        self.images_folder = os.path.join('server', 'images')
+        self.cleaning_pipeline = cleaning_pipeline
+        self.images_folder = app.config['IMAGES_FOLDER']
         os.makedirs(self.images_folder, exist_ok=True)
-        
-    def generate_statistics(self, stored_df):
+        self.plot_cache = PlotCache(self.images_folder, n_workers=app.config.get('PLOT_WORKERS'),
+                                    shared_datasets=shared_datasets)
+
+    def generate_statistics(self, stored_df, mode='images'):
+        """Correlations plus distribution charts for every numeric column.
+
+        mode='images' returns rendered PNGs; mode='data' returns histogram
+        bin counts and KDE curves as JSON for the client to draw.
+        """
         if stored_df is None:
             return jsonify({'error': 'No data uploaded yet'}), 400
 
         try:
-            # Clean existing images
-            for file in os.listdir(self.images_folder):
-                if file.endswith('.png'):
-                    os.remove(os.path.join(self.images_folder, file))
-
             # Generate correlation metrics
             correlation_metrics = {}
-            numeric_cols = stored_df.select_dtypes(include=['int64', 'float64']).columns
+            numeric_cols = stored_df.select_dtypes(include='number').columns
             if len(numeric_cols) > 0:
-                correlation_matrix = stored_df[numeric_cols].corr()
-                correlation_metrics = correlation_matrix.to_dict()
+                with span('analysis.correlation'):
+                    correlation_matrix = stored_df[numeric_cols].corr()
+                    correlation_metrics = correlation_matrix.to_dict()
 
-            # Generate plots
-            generated_images = []
-            for column in stored_df.columns:
-                if stored_df[column].dtype in ['int64', 'float64']:
-                    plt.figure()
-                    sns.histplot(stored_df[column].dropna(), kde=True)
-                    plt.title(f"Distribution of {column}")
-                    plt.xlabel(column)
-                    plt.tight_layout()
+            if mode == 'data':
+                with span('analysis.chart_data'):
+                    charts = [distribution_chart(stored_df[col]) for col in numeric_cols]
+                return jsonify({
+                    'message': 'Statistics and chart data generated',
+                    'charts': charts,
+                    'correlation_metrics': correlation_metrics
+                }), 200
 
-                    image_filename = f"{column}.png"
-                    image_path = os.path.join(self.images_folder, image_filename)
-                    plt.savefig(image_path)
-                    plt.close()
-                    generated_images.append(image_filename)
+            # Generate plots, reusing any already drawn for this dataset
+            with span('analysis.plots'):
+                generated_images = self.plot_cache.plots(stored_df, numeric_cols, kind='hist')
 
             return jsonify({
                 'message': 'Statistics and plots generated',
@@ -53,38 +55,39 @@ class AnalysisInterface:
         except Exception as e:
             return jsonify({'error': f'Failed to analyze: {str(e)}'}), 500
 
-    def handle_nulls(self, request, stored_df):
+    def list_images(self, stored_df):
         if stored_df is None:
+            return jsonify({'images': []})
+        try:
+            return jsonify({'images': self.plot_cache.list_images(stored_df)})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    def handle_nulls(self, request, session_id):
+        schema = self.cleaning_pipeline.schema(session_id)
+        if schema is None:
             return jsonify({'error': 'No data available'}), 400
 
         data = request.json
-        columns = data.get('columns', [])
+        columns = [col for col in data.get('columns', []) if col in schema]
         action = data.get('action')
-        original_file = data.get('filename')
+        if action not in NULL_ACTIONS:
+            return jsonify({'error': f'Unknown action {action}'}), 400
+        if action == 'mean':
+            non_numeric = [col for col in columns if not pd.api.types.is_numeric_dtype(schema[col])]
+            if non_numeric:
+                return jsonify({'error': f'Cannot fill non-numeric columns with mean: {", ".join(non_numeric)}'}), 400
 
         try:
-            df = stored_df.copy()
-            if action == 'remove':
-                df = df.dropna(subset=columns)
-            elif action == 'mean':
-                df[columns] = df[columns].fillna(df[columns].mean())
-            elif action == 'mode':
-                df[columns] = df[columns].fillna(df[columns].mode().iloc[0])
-
-            new_filename = None
-            if original_file:
-                base_name = original_file.rsplit('.', 1)[0]
-                new_filename = f"{base_name}_v1.csv"
-                cleansed_dir = os.path.join('server', 'cleansed_data')
-                os.makedirs(cleansed_dir, exist_ok=True)
-                file_path = os.path.join(cleansed_dir, new_filename)
-                df.to_csv(file_path, index=False)
-
+            version = self.cleaning_pipeline.record(session_id, 'handle_nulls', columns=columns, action=action)
             return jsonify({
-                'data': df.to_dict(),
                 'message': 'Null values handled successfully',
-                'processed_file': new_filename
+                'action': action,
+                'columns': columns,
+                'version': version
             }), 200
-            
+
+        except CleaningError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
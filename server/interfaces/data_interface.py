@@ -1,60 +1,113 @@
 
 from flask import jsonify
+from werkzeug.utils import secure_filename
 import pandas as pd
 import os
+from fingerprint import frame_fingerprint
+from serialization import page_args, frame_payload, json_response, wants_arrow, arrow_response
+from instrumentation import span
+from cleaning_pipeline import CleaningError
 
 class DataInterface:
-    def __init__(self, app):
+    def __init__(self, app, cleaning_pipeline):
         self.app = app
-        self.cleansed_dir = os.path.join('server', 'cleansed_data')
+        self.cleaning_pipeline = cleaning_pipeline
+        self.cleansed_dir = app.config['CLEANSED_FOLDER']
         os.makedirs(self.cleansed_dir, exist_ok=True)
 
-    def get_current_data(self, stored_df):
+    def get_current_data(self, request, stored_df):
         if stored_df is None:
             return jsonify({'error': 'No data available'}), 400
-        return jsonify({'data': stored_df.to_dict()}), 200
+        try:
+            offset, limit, columns = page_args(request)
+        except ValueError:
+            return jsonify({'error': 'offset and limit must be integers'}), 400
+        with span('serialize'):
+            if wants_arrow(request):
+                return arrow_response(stored_df, offset, limit, columns)
+            return json_response(frame_payload(stored_df, offset, limit, columns))
 
-    def remove_columns(self, request, stored_df):
-        if stored_df is None:
+    def remove_columns(self, request, session_id):
+        schema = self.cleaning_pipeline.schema(session_id)
+        if schema is None:
             return jsonify({'error': 'No data available'}), 400
 
         try:
             data = request.json
             columns = data.get('columns', [])
-            original_file = data.get('filename', '')
 
-            valid_columns = [col for col in columns if col in stored_df.columns]
+            valid_columns = [col for col in columns if col in schema]
+            version = None
             if valid_columns:
-                stored_df = stored_df.drop(columns=valid_columns)
-
-            new_filename = None
-            if original_file:
-                base_name = original_file.rsplit('.', 1)[0]
-                new_filename = f"{base_name}_v1.csv"
-                file_path = os.path.join(self.cleansed_dir, new_filename)
-                stored_df.to_csv(file_path, index=False)
+                version = self.cleaning_pipeline.record(session_id, 'remove_columns', columns=valid_columns)
 
             return jsonify({
-                'data': stored_df.to_dict(),
                 'message': 'Columns removed successfully',
-                'processed_file': new_filename
+                'removed_columns': valid_columns,
+                'columns': [str(col) for col in schema if col not in valid_columns],
+                'version': version
             }), 200
+        except CleaningError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
-    def save_cleansed(self, request, stored_df):
+    def undo(self, session_id):
+        version = self.cleaning_pipeline.undo(session_id)
+        if version is None:
+            return jsonify({'error': 'Nothing to undo'}), 400
+        return jsonify(self.cleaning_pipeline.history(session_id))
+
+    def redo(self, session_id):
+        version = self.cleaning_pipeline.redo(session_id)
+        if version is None:
+            return jsonify({'error': 'Nothing to redo'}), 400
+        return jsonify(self.cleaning_pipeline.history(session_id))
+
+    def checkout(self, request, session_id):
+        version = self.cleaning_pipeline.checkout(session_id, request.json.get('version'))
+        if version is None:
+            return jsonify({'error': 'Unknown version'}), 404
+        return jsonify(self.cleaning_pipeline.history(session_id))
+
+    def history(self, session_id):
+        history = self.cleaning_pipeline.history(session_id)
+        if history is None:
+            return jsonify({'error': 'No data available'}), 400
+        return jsonify(history)
+
+    def save_cleansed(self, request, session_id):
+        """Write the current version to cleansed_data as a Parquet file.
+
+        Files are named <name>_<version>_<fingerprint>.parquet, so saving
+        never overwrites an earlier version and re-saving an unchanged one
+        is free.
+        """
+        try:
+            stored_df = self.cleaning_pipeline.dataset(session_id)
+        except CleaningError as e:
+            return jsonify({'error': str(e)}), 500
         if stored_df is None:
             return jsonify({'error': 'No data available'}), 400
 
-        data = request.json
-        filename = data.get('filename', 'cleansed_data.csv')
+        data = request.json or {}
+        base_name = secure_filename(data.get('filename', 'cleansed_data.csv')).rsplit('.', 1)[0] or 'cleansed_data'
+        version = self.cleaning_pipeline.history(session_id)['current']
+        with span('fingerprint'):
+            filename = f"{base_name}_{version}_{frame_fingerprint(stored_df)[:10]}.parquet"
         save_path = os.path.join(self.cleansed_dir, filename)
 
         try:
-            stored_df.to_csv(save_path, index=False)
+            if not os.path.exists(save_path):
+                tmp_path = f'{save_path}.{os.getpid()}.tmp'
+                with span('parquet.write'):
+                    stored_df.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, save_path)
             return jsonify({
                 'message': 'Data saved successfully',
-                'path': save_path
+                'path': save_path,
+                'filename': filename,
+                'version': version
             })
         except Exception as e:
             return jsonify({'error': f'Failed to save file: {str(e)}'}), 500
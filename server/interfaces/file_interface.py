@@ -1,14 +1,20 @@
 from flask import jsonify, request
+from werkzeug.utils import secure_filename
 import pandas as pd
 import os
-import io
+from ingest import save_stream, profile_csv
+from profiler import profile_frame, format_info
+from compact_dtypes import compact_dtypes
+from instrumentation import span
 
 
 class FileInterface:
 
-    def __init__(self, app):
+    def __init__(self, app, dataset_store, csv_cache, shared_datasets):
         self.app = app
-        self.stored_df = None
+        self.dataset_store = dataset_store
+        self.shared_datasets = shared_datasets
+        self.csv_cache = csv_cache
         self.upload_folder = os.path.join('uploads')
         os.makedirs(self.upload_folder, exist_ok=True)
 
@@ -25,7 +31,7 @@ class FileInterface:
             response.headers.add('Access-Control-Allow-Origin', '*')
             return response
 
-    def handle_file_upload(self, request):
+    def handle_file_upload(self, request, session_id):
         try:
             # Handle existing file selection
             if 'filename' in request.form:
@@ -38,9 +44,8 @@ class FileInterface:
                     return jsonify({'error': f'File {filename} not found in uploads folder'}), 404
                     
                 try:
-                    df = pd.read_csv(file_path)
-                    self.stored_df = df
-                    return self._generate_analysis_response(df, filename, file_path)
+                    df, memory, dataset_id = self._load(file_path, session_id)
+                    return self._generate_analysis_response(df, filename, file_path, memory, dataset_id)
                 except Exception as e:
                     return jsonify({'error': f'Error reading file: {str(e)}'}), 500
 
@@ -55,7 +60,7 @@ class FileInterface:
 
                 file_path = os.path.join(self.upload_folder, file.filename)
                 file.save(file_path)
-                response = self._process_file(file.filename, file_path)
+                response = self._process_file(file.filename, file_path, session_id)
                 return response
 
             return jsonify({'error': 'No file provided'}), 400
@@ -63,52 +68,107 @@ class FileInterface:
         except Exception as e:
             return jsonify({'error': f'Failed to process file: {str(e)}'}), 500
 
-    def _load_existing_file(self, filename, file_path):
+    def handle_stream_upload(self, request, session_id):
+        """Upload a raw CSV request body of any size.
+
+        The body is written to disk in chunks and profiled chunk by chunk, so
+        memory stays bounded. The file is only loaded into the session when
+        it is below STREAM_LOAD_LIMIT bytes.
+        """
+        filename = secure_filename(request.args.get('filename', ''))
+        if not filename.endswith('.csv'):
+            return jsonify({'error': 'Invalid file format. Please upload a CSV file.'}), 400
+
+        file_path = os.path.join(self.upload_folder, filename)
+        try:
+            size = save_stream(request.stream, file_path)
+            if size == 0:
+                os.remove(file_path)
+                return jsonify({'error': 'No file provided'}), 400
+            analysis = profile_csv(file_path)
+            loaded = size <= self.app.config['STREAM_LOAD_LIMIT']
+            memory, dataset_id = self._load(file_path, session_id)[1:] if loaded else (None, None)
+        except Exception as e:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            return jsonify({'error': f'Failed to process CSV file: {str(e)}'}), 500
+
+        response = jsonify({
+            'filename': filename,
+            'size': size,
+            'analysis': analysis,
+            'loaded': loaded,
+            'memory': memory,
+            'dataset_id': dataset_id,
+            'message': 'File processed successfully!' if loaded else
+                       'File profiled; too large to load for interactive analysis'
+        })
+        response.headers.add('Access-Control-Allow-Origin', '*')
+        return response
+
+    def _load_existing_file(self, filename, file_path, session_id):
         if not os.path.exists(file_path):
             return jsonify({'error': f'File {filename} not found'}), 400
 
         try:
-            df = pd.read_csv(file_path)
-            self.stored_df = df
-            return self._generate_analysis_response(df, filename, file_path)
+            df, memory, dataset_id = self._load(file_path, session_id)
+            return self._generate_analysis_response(df, filename, file_path, memory, dataset_id)
         except Exception as e:
             return jsonify({'error': f'Failed to read file: {str(e)}'}), 500
 
-    def _process_file(self, filename, file_path):
+    def _process_file(self, filename, file_path, session_id):
         try:
-            df = pd.read_csv(file_path)
-            self.stored_df = df
-            return self._generate_analysis_response(df, filename, file_path)
+            df, memory, dataset_id = self._load(file_path, session_id)
+            return self._generate_analysis_response(df, filename, file_path, memory, dataset_id)
         except Exception as e:
             if os.path.exists(file_path):
                 os.remove(file_path)
             return jsonify({'error':
                             f'Failed to process CSV file: {str(e)}'}), 500
 
-    def _generate_analysis_response(self, df, filename, file_path):
+    def _load(self, file_path, session_id):
+        """Read a CSV into the session in compact dtypes.
+
+        The frame is published once in shared_datasets and the session
+        refers to it by id. Returns (df, memory report, dataset id).
+        """
+        with span('csv.parse'):
+            df = self.csv_cache.read_csv(file_path)
+        with span('dtypes.compact'):
+            df, memory = compact_dtypes(df)
+        with span('dataset.publish'):
+            dataset_id = self.shared_datasets.publish(df)
+            df = self.shared_datasets.attach(dataset_id)
+        self.dataset_store.put(session_id, df, dataset_id=dataset_id)
+        return df, memory, dataset_id
+
+    def _generate_analysis_response(self, df, filename, file_path, memory=None, dataset_id=None):
         try:
-            info_buffer = io.StringIO()
-            df.info(buf=info_buffer)
-
-            analysis = {
-                'num_records': f"{len(df):,}",
-                'columns': df.columns.tolist(),
-                'column_types': {
-                    col: str(df[col].dtype)
-                    for col in df.columns
-                },
-                'info': info_buffer.getvalue(),
-                'describe': df.describe(include='all').to_dict(),
-                'null_counts': df.isnull().sum().to_dict(),
-                'preview': df.head(10).to_dict(orient='records')
-            }
-
-            response = jsonify({
-                'filename': filename,
-                'size': os.path.getsize(file_path),
-                'analysis': analysis,
-                'message': 'File processed successfully!'
-            })
+            # One pass over the data for info, describe and null counts
+            with span('profile'):
+                profile = profile_frame(df)
+                analysis = {
+                    'num_records': f"{len(df):,}",
+                    'columns': df.columns.tolist(),
+                    'column_types': {
+                        col: str(df[col].dtype)
+                        for col in df.columns
+                    },
+                    'info': format_info(df, profile),
+                    'describe': profile.describe(),
+                    'null_counts': profile.null_counts(),
+                    'preview': df.head(10).to_dict(orient='records')
+                }
+
+            with span('serialize'):
+                response = jsonify({
+                    'filename': filename,
+                    'size': os.path.getsize(file_path),
+                    'analysis': analysis,
+                    'memory': memory,
+                    'dataset_id': dataset_id,
+                    'message': 'File processed successfully!'
+                })
             response.headers.add('Access-Control-Allow-Origin', '*')
             return response
 
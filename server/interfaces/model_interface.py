@@ -1,24 +1,20 @@
 
 from flask import jsonify
-import joblib
-import os
 import yaml
-import matplotlib.pyplot as plt
-import shap
 
 class ModelInterface:
-    def __init__(self, app):
+    def __init__(self, app, model_registry):
         self.app = app
-        self.saved_models_folder = os.path.join('server', 'saved_models')
-        os.makedirs(self.saved_models_folder, exist_ok=True)
+        self.model_registry = model_registry
 
     def list_models(self):
+        """Saved model files plus each version's manifest, without loading any"""
         try:
-            models = []
-            for file in os.listdir(self.saved_models_folder):
-                if file.endswith('.joblib'):
-                    models.append(file)
-            return jsonify({'models': models})
+            artifacts = self.model_registry.list_models()
+            return jsonify({
+                'models': [artifact['file'] for artifact in artifacts],
+                'artifacts': artifacts
+            })
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
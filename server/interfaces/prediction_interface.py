@@ -0,0 +1,128 @@
+from flask import jsonify, Response
+import pandas as pd
+import os
+from ingest import save_stream
+from micro_batcher import MicroBatcher
+from serialization import json_response
+from preprocessing import input_columns, predict_labels
+
+PROBLEM_TYPES = ('classification', 'regression')
+
+
+class PredictionInterface:
+    def __init__(self, app, model_registry):
+        self.app = app
+        self.model_registry = model_registry
+        self.chunk_rows = app.config['PREDICTION_CHUNK_ROWS']
+        self.predictions_folder = app.config['PREDICTIONS_FOLDER']
+        os.makedirs(self.predictions_folder, exist_ok=True)
+        self.batcher = MicroBatcher(self._predict_rows,
+                                    max_batch=app.config['PREDICTION_BATCH_SIZE'],
+                                    max_wait=app.config['PREDICTION_BATCH_WAIT_MS'] / 1000)
+
+    def predict(self, request):
+        """Predict from a CSV upload, a JSON 'rows' array or a single JSON 'row'.
+
+        CSV uploads are read and answered as CSV in chunks of
+        PREDICTION_CHUNK_ROWS rows; single rows are micro-batched with other
+        concurrent requests for the same model.
+        """
+        params = request.form if 'file' in request.files else (request.get_json(silent=True) or {})
+        model_name = params.get('model_name')
+        problem_type = params.get('problem_type') or 'classification'
+        if not model_name:
+            return jsonify({'error': 'No model selected'}), 400
+        if problem_type not in PROBLEM_TYPES:
+            return jsonify({'error': f'Unsupported problem type {problem_type}'}), 400
+
+        try:
+            version = params.get('version')
+            version = int(version) if version not in (None, '') else \
+                self.model_registry.latest_version(model_name, problem_type)
+            model = self.model_registry.load(model_name, problem_type, version) if version is not None else None
+        except Exception as e:
+            return jsonify({'error': f'Failed to load model: {str(e)}'}), 500
+        if model is None:
+            return jsonify({'error': f'No saved {problem_type} model {model_name}, train models first'}), 404
+
+        try:
+            if 'file' in request.files:
+                return self._predict_csv(model, request.files['file'], version)
+            if 'row' in params:
+                # Checked before joining a batch, so a bad row fails only its own request
+                self._check_columns(model, params['row'])
+                prediction = self.batcher.submit((model_name, problem_type, version), params['row'])
+                return json_response({'model_name': model_name, 'version': version, 'prediction': prediction})
+            if isinstance(params.get('rows'), list):
+                return self._predict_json(model, params['rows'], model_name, version)
+            return jsonify({'error': "Send a CSV file, a JSON 'rows' array or a single 'row'"}), 400
+        except ValueError as e:
+            return jsonify({'error': f'Invalid input: {str(e)}'}), 400
+        except Exception as e:
+            return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
+
+    def _predict_json(self, model, rows, model_name, version):
+        predictions = []
+        for start in range(0, len(rows), self.chunk_rows):
+            X = pd.DataFrame.from_records(rows[start:start + self.chunk_rows])
+            predictions.extend(self._predict_frame(model, X).tolist())
+        return json_response({
+            'model_name': model_name,
+            'version': version,
+            'predictions': predictions,
+            'num_predictions': len(predictions)
+        })
+
+    def _predict_csv(self, model, file, version):
+        # The upload is closed once the view returns, so the streamed
+        # response reads from its own copy
+        input_path = os.path.join(self.predictions_folder, f'input_{os.urandom(8).hex()}.csv')
+        save_stream(file.stream, input_path)
+        try:
+            reader = pd.read_csv(input_path, chunksize=self.chunk_rows)
+            # Predict the first chunk up front so bad input is still a 400
+            first = next(reader, None)
+            if first is None:
+                raise ValueError('CSV file has no rows')
+            first['prediction'] = self._predict_frame(model, first)
+        except Exception:
+            os.remove(input_path)
+            raise
+
+        def generate():
+            try:
+                yield first.to_csv(index=False)
+                for chunk in reader:
+                    chunk['prediction'] = self._predict_frame(model, chunk)
+                    yield chunk.to_csv(index=False, header=False)
+            finally:
+                reader.close()
+                os.remove(input_path)
+
+        response = Response(generate(), mimetype='text/csv')
+        response.headers['Content-Disposition'] = 'attachment; filename=predictions.csv'
+        response.headers['X-Model-Version'] = str(version)
+        return response
+
+    def _predict_rows(self, key, rows):
+        """Batch callback for the micro-batcher"""
+        model = self.model_registry.load(*key)
+        return self._predict_frame(model, pd.DataFrame.from_records(rows)).tolist()
+
+    def _check_columns(self, model, row):
+        if not isinstance(row, dict):
+            raise ValueError("'row' must be an object of column values")
+        missing = [col for col in input_columns(model) or [] if col not in row]
+        if missing:
+            raise ValueError(f"missing columns {', '.join(map(str, missing))}")
+
+    def _predict_frame(self, model, X):
+        # Models fitted on a DataFrame expect its columns in the same order;
+        # columns the preprocessor drops may be left out and are sent as null
+        features = getattr(model, 'feature_names_in_', None)
+        if features is not None:
+            missing = [col for col in input_columns(model) if col not in X.columns]
+            if missing:
+                raise ValueError(f"missing columns {', '.join(map(str, missing))}")
+            X = X.reindex(columns=list(features))
+        return predict_labels(model, X)
@@ -0,0 +1,259 @@
+from flask import jsonify, Response
+import pandas as pd
+import os
+from job_queue import JobQueue
+from serialization import dumps
+from preprocessing import predict_labels
+from model_trainer import ModelTrainer, TimeSeriesModelTrainer
+from cross_validation import EVALUATION_MODES
+from hyperparameter_search import HyperparameterSearch, TrialCache, STRATEGIES
+
+
+class TrainingInterface:
+    def __init__(self, app, model_registry, shared_datasets=None):
+        self.app = app
+        self.model_registry = model_registry
+        self.shared_datasets = shared_datasets
+        self.jobs_folder = app.config['JOBS_FOLDER']
+        self.predictions_folder = app.config['PREDICTIONS_FOLDER']
+        os.makedirs(self.predictions_folder, exist_ok=True)
+        self.job_queue = JobQueue(self.jobs_folder,
+                                  max_workers=app.config['TRAINING_WORKERS'])
+        self.trial_cache = TrialCache(app.config['SEARCH_CACHE_FOLDER'])
+
+    def train_models(self, data, stored_df):
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Send the training options as a JSON object'}), 400
+        if stored_df is None:
+            return jsonify({'error': 'No data available'}), 400
+
+        target_column = data.get('target_column')
+        problem_type = data.get('problem_type') or 'classification'
+        if target_column not in stored_df.columns:
+            return jsonify({'error': f'Target variable {target_column} not found in dataset'}), 400
+
+        try:
+            if problem_type == 'time_series':
+                date_column = data.get('date_column') or self._find_date_column(stored_df)
+                if date_column is None:
+                    return jsonify({'error': 'No date column found for time series training'}), 400
+                trainer = TimeSeriesModelTrainer(model_timeout=self.app.config['MODEL_TIMEOUT'])
+                if data.get('evaluation') == 'backtest':
+                    try:
+                        n_windows = int(data.get('backtest_windows') or 5)
+                        horizon = int(data['horizon']) if data.get('horizon') else None
+                    except (TypeError, ValueError):
+                        return jsonify({'error': 'backtest_windows and horizon must be integers'}), 400
+                    if n_windows < 1 or (horizon is not None and horizon < 1):
+                        return jsonify({'error': 'backtest_windows and horizon must be at least 1'}), 400
+                    job_id = self.job_queue.submit(
+                        'backtest', list(trainer.models), self._backtest_time_series,
+                        trainer, stored_df, target_column, date_column, n_windows, horizon)
+                    return self._accepted(job_id)
+                job_id = self.job_queue.submit(
+                    'train', list(trainer.models), self._train_time_series,
+                    trainer, stored_df, target_column, date_column)
+            else:
+                evaluation = data.get('evaluation') or self.app.config['TRAINING_EVALUATION']
+                if evaluation not in EVALUATION_MODES:
+                    return jsonify({'error': f'Unknown evaluation mode {evaluation}'}), 400
+                try:
+                    cv_folds = int(data.get('cv_folds') or self.app.config['CV_FOLDS'])
+                except (TypeError, ValueError):
+                    return jsonify({'error': 'cv_folds must be an integer'}), 400
+                if cv_folds < 2:
+                    return jsonify({'error': 'cv_folds must be at least 2'}), 400
+                trainer = ModelTrainer(model_timeout=self.app.config['MODEL_TIMEOUT'],
+                                       registry=self.model_registry,
+                                       evaluation=evaluation, cv_folds=cv_folds)
+                models = trainer.classification_models if problem_type == 'classification' \
+                    else trainer.regression_models
+                X = stored_df.drop(columns=[target_column])
+                y = stored_df[target_column]
+                job_id = self.job_queue.submit(
+                    'train', list(models), trainer.train_and_evaluate_all_models,
+                    X, y, problem_type, parallel=True)
+
+            return self._accepted(job_id)
+        except Exception as e:
+            return jsonify({'error': f'Failed to start training: {str(e)}'}), 500
+
+    def tune_model(self, data, stored_df):
+        """Queue a hyperparameter search for one model over its YAML search space"""
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Send the search options as a JSON object'}), 400
+        if stored_df is None:
+            return jsonify({'error': 'No data available'}), 400
+
+        target_column = data.get('target_column')
+        problem_type = data.get('problem_type') or 'classification'
+        model_name = data.get('model_name')
+        strategy = data.get('strategy') or 'halving'
+        if target_column not in stored_df.columns:
+            return jsonify({'error': f'Target variable {target_column} not found in dataset'}), 400
+        if problem_type not in ('classification', 'regression'):
+            return jsonify({'error': f'Hyperparameter search is not available for {problem_type} models'}), 400
+        if strategy not in STRATEGIES:
+            return jsonify({'error': f'Unknown search strategy {strategy}'}), 400
+        try:
+            n_trials = int(data.get('n_trials') or self.app.config['SEARCH_TRIALS'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'n_trials must be an integer'}), 400
+
+        try:
+            trainer = ModelTrainer(registry=self.model_registry)
+            search = HyperparameterSearch(trainer, self.trial_cache,
+                                          trial_timeout=self.app.config['MODEL_TIMEOUT'])
+            models = trainer.classification_models if problem_type == 'classification' \
+                else trainer.regression_models
+            if model_name not in models:
+                return jsonify({'error': f'Model {model_name} not found'}), 400
+            X = stored_df.drop(columns=[target_column])
+            y = stored_df[target_column]
+            job_id = self.job_queue.submit(
+                'tune', [model_name], search.search, X, y, model_name, problem_type,
+                strategy=strategy, n_trials=max(1, n_trials))
+            return self._accepted(job_id)
+        except Exception as e:
+            return jsonify({'error': f'Failed to start search: {str(e)}'}), 500
+
+    def forecast_groups(self, data, stored_df):
+        """Forecast every group of group_column, streamed as one JSON line per group"""
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Send the forecast options as a JSON object'}), 400
+        if stored_df is None:
+            return jsonify({'error': 'No data available'}), 400
+
+        target_column = data.get('target_column')
+        group_column = data.get('group_column')
+        model_name = data.get('model_name') or 'sarima'
+        date_column = data.get('date_column') or self._find_date_column(stored_df)
+        trainer = TimeSeriesModelTrainer()
+        for column in (target_column, group_column):
+            if column not in stored_df.columns:
+                return jsonify({'error': f'Column {column} not found in dataset'}), 400
+        if date_column is None:
+            return jsonify({'error': 'No date column found for time series forecasting'}), 400
+        if model_name not in trainer.models:
+            return jsonify({'error': f'Model {model_name} not found'}), 400
+        try:
+            horizon = int(data['horizon']) if data.get('horizon') not in (None, '') else 12
+            if horizon < 1:
+                raise ValueError('horizon must be at least 1')
+            df = stored_df.assign(**{date_column: pd.to_datetime(stored_df[date_column])})
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': f'Invalid forecast request: {str(e)}'}), 400
+
+        def generate():
+            groups = 0
+            for result in trainer.forecast_groups(df, target_column, date_column, group_column,
+                                                  model_name, horizon, self.shared_datasets):
+                groups += 1
+                yield dumps(result) + b'\n'
+            yield dumps({'done': True, 'groups': groups}) + b'\n'
+
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    def run_predictions(self, data, stored_df):
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Send the prediction options as a JSON object'}), 400
+        if stored_df is None:
+            return jsonify({'error': 'No data available'}), 400
+
+        model_name = data.get('model_name')
+        problem_type = data.get('problem_type') or 'classification'
+        target_column = data.get('target_column')
+        if not model_name:
+            return jsonify({'error': 'No model selected'}), 400
+
+        try:
+            if problem_type == 'time_series':
+                trainer = TimeSeriesModelTrainer()
+                if model_name not in trainer.models:
+                    return jsonify({'error': f'Model {model_name} not found'}), 400
+                date_column = data.get('date_column') or self._find_date_column(stored_df)
+                if date_column is None or target_column not in stored_df.columns:
+                    return jsonify({'error': 'Time series forecasts need a date and target column'}), 400
+                try:
+                    horizon = int(data['horizon']) if data.get('horizon') not in (None, '') else 12
+                except (TypeError, ValueError):
+                    return jsonify({'error': 'horizon must be an integer'}), 400
+                if horizon < 1:
+                    return jsonify({'error': 'horizon must be at least 1'}), 400
+                job_id = self.job_queue.submit(
+                    'predict', [model_name], self._forecast, trainer, model_name,
+                    stored_df, target_column, date_column, horizon)
+            else:
+                X = stored_df.drop(columns=[target_column], errors='ignore')
+                job_id = self.job_queue.submit(
+                    'predict', [model_name], self._predict, model_name, problem_type, X)
+
+            return self._accepted(job_id)
+        except Exception as e:
+            return jsonify({'error': f'Failed to start predictions: {str(e)}'}), 500
+
+    def job_status(self, job_id):
+        job = self.job_queue.status(job_id)
+        if job is None:
+            return jsonify({'error': f'Job {job_id} not found'}), 404
+        return jsonify(job), 200
+
+    def _accepted(self, job_id):
+        return jsonify({
+            'job_id': job_id,
+            'status_url': f'/jobs/{job_id}',
+            'message': 'Job queued'
+        }), 202
+
+    def _find_date_column(self, df):
+        for col in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[col]):
+                return col
+        for col in df.select_dtypes(include=['object', 'string', 'category']).columns:
+            if df[col].astype(str).str.match(r'\d{4}-\d{2}-\d{2}').all():
+                return col
+        return None
+
+    def _train_time_series(self, trainer, df, target_column, date_column, progress=None):
+        df = df.assign(**{date_column: pd.to_datetime(df[date_column])})
+        return trainer.train_and_evaluate_all_models(df, target_column, date_column, parallel=True,
+                                                     progress=progress)
+
+    def _backtest_time_series(self, trainer, df, target_column, date_column, n_windows, horizon,
+                              progress=None):
+        df = df.assign(**{date_column: pd.to_datetime(df[date_column])})
+        return trainer.backtest(df, target_column, date_column, n_windows, horizon, parallel=True,
+                                progress=progress)
+
+    def _predict(self, model_name, problem_type, X, progress):
+        progress(model_name, 'running')
+        model = self.model_registry.load(model_name, problem_type)
+        if model is None:
+            progress(model_name, 'failed')
+            raise ValueError(f'No saved {problem_type} model {model_name}, train models first')
+
+        predictions = X.copy()
+        predictions['prediction'] = predict_labels(model, X)
+        progress(model_name, 'completed')
+        return self._save_predictions(predictions)
+
+    def _forecast(self, trainer, model_name, df, target_column, date_column, horizon, progress):
+        progress(model_name, 'running')
+        df = df.assign(**{date_column: pd.to_datetime(df[date_column])})
+        # Fitted once per series; another horizon reuses the cached model
+        future_dates, forecast = trainer.forecast(model_name, df, target_column, date_column, horizon)
+        progress(model_name, 'completed')
+        return self._save_predictions(pd.DataFrame({
+            date_column: future_dates.astype(str),
+            'forecast': forecast
+        }))
+
+    def _save_predictions(self, predictions):
+        filename = f'predictions_{os.urandom(8).hex()}.csv'
+        predictions.to_csv(os.path.join(self.predictions_folder, filename), index=False)
+        preview = predictions.head(100)
+        return {
+            'predictions': preview.astype(object).where(preview.notnull(), None).to_dict(orient='records'),
+            'num_predictions': len(predictions),
+            'csv_url': f'/predictions/{filename}'
+        }
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import json
+import logging
+import os
+import threading
+import uuid
+
+from serialization import nan_to_none, to_builtin
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobQueue:
+    """Runs long jobs on a small worker pool and persists their state.
+
+    Each job is recorded as jobs_folder/<job_id>.json and rewritten on every
+    state change, so any server process can report on a job that another one
+    is running.
+    """
+
+    def __init__(self, jobs_folder, max_workers=2):
+        self.jobs_folder = jobs_folder
+        os.makedirs(self.jobs_folder, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='forcastica-job')
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def submit(self, kind, steps, func, *args, **kwargs):
+        """Queue func(*args, progress=..., **kwargs) and return the job id.
+
+        `steps` names the units of work (models) whose progress is reported.
+        func must return a JSON-serialisable result.
+        """
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'progress': {step: 'pending' for step in steps},
+            'results': None,
+            'error': None,
+            'created_at': _now(),
+            'started_at': None,
+            'finished_at': None,
+        }
+        with self.lock:
+            self.jobs[job_id] = job
+            self._persist(job)
+        self.executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def status(self, job_id):
+        """Return the job record, or None when the id is unknown"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return json.loads(json.dumps(nan_to_none(job), default=to_builtin, allow_nan=False))
+        path = self._job_path(job_id)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, status='running', started_at=_now())
+
+        def progress(step, state):
+            with self.lock:
+                self.jobs[job_id]['progress'][step] = state
+                self._persist(self.jobs[job_id])
+
+        try:
+            results = func(*args, progress=progress, **kwargs)
+            self._update(job_id, status='completed', results=results, finished_at=_now())
+        except Exception as e:
+            self.logger.error(f"Job {job_id} failed: {str(e)}")
+            self._update(job_id, status='failed', error=str(e), finished_at=_now())
+        finally:
+            # Finished jobs are served from disk from now on
+            with self.lock:
+                self.jobs.pop(job_id, None)
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+            self._persist(self.jobs[job_id])
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_folder, f'{os.path.basename(job_id)}.json')
+
+    def _persist(self, job):
+        path = self._job_path(job['job_id'])
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            # Bare NaN is not JSON; metrics such as r2 can be undefined
+            json.dump(nan_to_none(job), f, default=to_builtin, allow_nan=False)
+        os.replace(tmp_path, path)
@@ -0,0 +1,66 @@
+from concurrent.futures import Future
+import threading
+import time
+
+
+class MicroBatcher:
+    """Combines concurrent single-row predictions into one vectorized call.
+
+    The first request for a key waits up to `max_wait` seconds for others to
+    arrive, then runs predict_batch(key, rows) once for all of them; a batch
+    that reaches `max_batch` rows runs immediately. Each caller gets back the
+    result for its own row. If the combined call fails, the rows are retried
+    one at a time, so an exception only reaches the caller whose row raised
+    it.
+    """
+
+    def __init__(self, predict_batch, max_batch=256, max_wait=0.005):
+        self.predict_batch = predict_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        # key -> [(row, future), ...] still collecting
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, row):
+        """Predict one row, blocking until its batch has run"""
+        future = Future()
+        with self.lock:
+            batch = self.pending.setdefault(key, [])
+            batch.append((row, future))
+            leader = len(batch) == 1
+            if len(batch) >= self.max_batch:
+                del self.pending[key]
+                full = batch
+            else:
+                full = None
+
+        if full is not None:
+            self._run(key, full)
+        elif leader:
+            time.sleep(self.max_wait)
+            with self.lock:
+                # Unless a full batch already took it, the leader runs it
+                if self.pending.get(key) is batch:
+                    del self.pending[key]
+                else:
+                    batch = None
+            if batch is not None:
+                self._run(key, batch)
+        return future.result()
+
+    def _run(self, key, batch):
+        try:
+            results = self.predict_batch(key, [row for row, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            for row, future in batch:
+                try:
+                    future.set_result(self.predict_batch(key, [row])[0])
+                except Exception as row_error:
+                    future.set_exception(row_error)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
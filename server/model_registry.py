@@ -0,0 +1,250 @@
+from collections import OrderedDict
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import joblib
+
+from serialization import nan_to_none, to_builtin
+
+ARTIFACT_FILE = re.compile(
+    r'^(?P<name>.+)_(?P<problem_type>classification|regression)(?:_v(?P<version>\d+))?'
+    r'\.(?P<ext>joblib|ubj)$')
+MANIFEST_SUFFIX = '.manifest.json'
+# Pipeline steps in front of a natively stored XGBoost model
+STEPS_SUFFIX = '.steps.joblib'
+# Estimators stored in XGBoost's own binary format instead of a pickle
+XGBOOST_ESTIMATORS = ('XGBClassifier', 'XGBRegressor')
+
+
+class ModelRegistry:
+    """Saved models by name, problem type and version, with an LRU of loaded ones.
+
+    Every save writes a new version next to a small JSON manifest holding
+    its metrics, feature schema, training data fingerprint, size and
+    timings, so models can be listed without unpickling anything. XGBoost
+    estimators are stored in XGBoost's native .ubj format; everything else
+    is an uncompressed joblib file that is loaded memory-mapped, so large
+    arrays are paged in on demand rather than copied.
+
+    load() defaults to the latest version. Loaded models are kept in memory,
+    at most `max_loaded` of them, so serving predictions does not reload the
+    model on every request. An unversioned <model>_<problem_type>.joblib from
+    before versioning counts as version 0.
+    """
+
+    def __init__(self, models_folder, max_loaded=8):
+        self.models_folder = models_folder
+        os.makedirs(self.models_folder, exist_ok=True)
+        self.max_loaded = max_loaded
+        # (model_name, problem_type, version) -> model
+        self.loaded = OrderedDict()
+        self.lock = threading.RLock()
+        self.logger = logging.getLogger(__name__)
+
+    def save(self, model, model_name, problem_type, metadata=None):
+        """Store model as a new version; returns (path, version).
+
+        metadata (metrics, features, target, data_fingerprint, timings) is
+        written to the version's manifest.
+        """
+        steps = getattr(model, 'steps', None)
+        final = steps[-1][1] if steps else model
+        estimator = type(final).__name__
+        model_format = 'xgboost' if estimator in XGBOOST_ESTIMATORS else 'joblib'
+        ext = 'ubj' if model_format == 'xgboost' else 'joblib'
+
+        start = time.perf_counter()
+        tmp_path = os.path.join(
+            self.models_folder,
+            f'.{model_name}_{problem_type}.{os.getpid()}.{threading.get_ident()}.tmp.{ext}')
+        steps_tmp_path = None
+        if model_format == 'xgboost':
+            final.save_model(tmp_path)
+            if steps:
+                # The booster stays native; the steps before it are pickled
+                steps_tmp_path = tmp_path + STEPS_SUFFIX
+                joblib.dump({'steps': steps[:-1], 'final_step': steps[-1][0],
+                             'label_classes': getattr(model, 'label_classes_', None)}, steps_tmp_path)
+        else:
+            joblib.dump(model, tmp_path)
+        save_seconds = time.perf_counter() - start
+
+        with self.lock:
+            version = (self.latest_version(model_name, problem_type) or 0) + 1
+            try:
+                while True:
+                    path = self._path(model_name, problem_type, version, ext)
+                    try:
+                        # link() fails if the name exists, so another process
+                        # saving the same model at once takes the next version.
+                        # The steps go in before the booster, so a load that
+                        # finds the booster always finds its steps too.
+                        if steps_tmp_path:
+                            os.link(steps_tmp_path, path + STEPS_SUFFIX)
+                        try:
+                            os.link(tmp_path, path)
+                        except FileExistsError:
+                            if steps_tmp_path:
+                                os.remove(path + STEPS_SUFFIX)
+                            raise
+                        break
+                    except FileExistsError:
+                        version += 1
+            finally:
+                os.remove(tmp_path)
+                if steps_tmp_path:
+                    os.remove(steps_tmp_path)
+
+            metadata = dict(metadata or {})
+            timings = dict(metadata.pop('timings', {}), save_seconds=save_seconds)
+            manifest = {
+                'model_name': model_name,
+                'problem_type': problem_type,
+                'version': version,
+                'file': os.path.basename(path),
+                'format': model_format,
+                'estimator': estimator,
+                'pipeline_steps': [name for name, _ in steps] if steps else None,
+                'size_bytes': os.path.getsize(path) + (
+                    os.path.getsize(path + STEPS_SUFFIX) if steps_tmp_path else 0),
+                'created_at': time.time(),
+                'metrics': metadata.pop('metrics', {}),
+                'features': metadata.pop('features', []),
+                'target': metadata.pop('target', None),
+                'data_fingerprint': metadata.pop('data_fingerprint', None),
+                'timings': timings,
+                **metadata,
+            }
+            self._write_manifest(path, manifest)
+            self._remember((model_name, problem_type, version), model)
+        return path, version
+
+    def load(self, model_name, problem_type, version=None):
+        """The model at `version` (latest by default), or None if not saved"""
+        with self.lock:
+            if version is None:
+                version = self.latest_version(model_name, problem_type)
+                if version is None:
+                    return None
+            key = (model_name, problem_type, version)
+            model = self.loaded.get(key)
+            if model is not None:
+                self.loaded.move_to_end(key)
+                return model
+
+            path = self._existing_path(model_name, problem_type, version)
+            if path is None:
+                return None
+            start = time.perf_counter()
+            if path.endswith('.ubj'):
+                model = self._load_xgboost(path)
+            else:
+                model = joblib.load(path, mmap_mode='r')
+            self.logger.info(f"Loaded {model_name} {problem_type} model v{version} "
+                             f"in {time.perf_counter() - start:.3f}s")
+            self._remember(key, model)
+            return model
+
+    def list_models(self):
+        """Manifests of every saved version, read without loading any model"""
+        models = []
+        for filename in sorted(os.listdir(self.models_folder)):
+            match = ARTIFACT_FILE.match(filename)
+            if not match:
+                continue
+            path = os.path.join(self.models_folder, filename)
+            manifest = self._read_manifest(path)
+            if manifest is None:
+                # Saved before manifests existed
+                manifest = {
+                    'model_name': match.group('name'),
+                    'problem_type': match.group('problem_type'),
+                    'version': int(match.group('version') or 0),
+                    'file': filename,
+                    'format': 'xgboost' if match.group('ext') == 'ubj' else 'joblib',
+                    'size_bytes': os.path.getsize(path),
+                    'created_at': os.path.getmtime(path),
+                }
+            models.append(manifest)
+        models.sort(key=lambda m: (m['model_name'], m['problem_type'], m['version']))
+        return models
+
+    def manifest(self, model_name, problem_type, version=None):
+        """Metadata of one version (latest by default), or None"""
+        if version is None:
+            version = self.latest_version(model_name, problem_type)
+        path = self._existing_path(model_name, problem_type, version) if version is not None else None
+        return self._read_manifest(path) if path else None
+
+    def versions(self, model_name, problem_type):
+        """Saved versions of a model, oldest first"""
+        versions = []
+        for filename in os.listdir(self.models_folder):
+            match = ARTIFACT_FILE.match(filename)
+            if match and match.group('name') == model_name and match.group('problem_type') == problem_type:
+                versions.append(int(match.group('version') or 0))
+        return sorted(set(versions))
+
+    def latest_version(self, model_name, problem_type):
+        versions = self.versions(model_name, problem_type)
+        return versions[-1] if versions else None
+
+    def __getstate__(self):
+        # Sent to training worker processes: the folder, not loaded models
+        return {'models_folder': self.models_folder, 'max_loaded': self.max_loaded}
+
+    def __setstate__(self, state):
+        self.__init__(state['models_folder'], state['max_loaded'])
+
+    def _load_xgboost(self, path):
+        import xgboost
+        manifest = self._read_manifest(path) or {}
+        estimator = manifest.get('estimator')
+        if estimator not in XGBOOST_ESTIMATORS:
+            estimator = 'XGBClassifier' if '_classification' in os.path.basename(path) else 'XGBRegressor'
+        model = getattr(xgboost, estimator)()
+        model.load_model(path)
+        if os.path.exists(path + STEPS_SUFFIX):
+            from sklearn.pipeline import Pipeline
+            saved = joblib.load(path + STEPS_SUFFIX)
+            pipeline = Pipeline(list(saved['steps']) + [(saved['final_step'], model)])
+            if saved.get('label_classes') is not None:
+                pipeline.label_classes_ = saved['label_classes']
+            return pipeline
+        return model
+
+    def _read_manifest(self, path):
+        try:
+            with open(path + MANIFEST_SUFFIX) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_manifest(self, path, manifest):
+        manifest_path = path + MANIFEST_SUFFIX
+        tmp_path = f'{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(nan_to_none(manifest), f, default=to_builtin, allow_nan=False)
+        os.replace(tmp_path, manifest_path)
+
+    def _remember(self, key, model):
+        self.loaded[key] = model
+        self.loaded.move_to_end(key)
+        while len(self.loaded) > self.max_loaded:
+            self.loaded.popitem(last=False)
+
+    def _existing_path(self, model_name, problem_type, version):
+        for ext in ('joblib', 'ubj'):
+            path = self._path(model_name, problem_type, version, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _path(self, model_name, problem_type, version, ext='joblib'):
+        if version == 0:
+            return os.path.join(self.models_folder, f'{model_name}_{problem_type}.{ext}')
+        return os.path.join(self.models_folder, f'{model_name}_{problem_type}_v{version}.{ext}')
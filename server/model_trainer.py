@@ -1,41 +1,51 @@
 
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.linear_model import LogisticRegression, LinearRegression
-from sklearn.metrics import accuracy_score, mean_squared_error, r2_score, mean_absolute_error
-from xgboost import XGBClassifier, XGBRegressor
-from sklearn.svm import SVC, SVR
 import pandas as pd
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-from prophet import Prophet
+# scikit-learn, xgboost, statsmodels and prophet are imported where they are
+# first needed, so importing this module stays cheap
+from estimators import CLASSIFIERS, REGRESSORS, EstimatorRegistry
+from parallel import group_progress, run_tasks, split_cores, stream_tasks
+from model_registry import ModelRegistry
+from fingerprint import frame_fingerprint
+from preprocessing import FEATURE_CACHE, MODEL_VIEWS, encode_target, with_preprocessor
+from cross_validation import EVALUATION_MODES, fold_indices
+from fitted_model_cache import FITTED_MODELS, fit_key
+from instrumentation import record, record_model_timings
+import functools
+import os
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
+# Below this many rows a bake-off runs serially even when parallel is asked
+# for: starting a process per task costs more than the fits save. With
+# synthetic 'extralearn' data on one CPU parallel ran at 0.88x for 1k rows,
+# 0.92x for 5k and broke even (1.01x) at 20k.
+MIN_PARALLEL_ROWS = 20_000
+
 class ModelTrainer:
-    def __init__(self):
+    def __init__(self, n_workers=None, model_timeout=None, registry=None, feature_cache=None,
+                 evaluation='holdout', cv_folds=5, min_parallel_rows=MIN_PARALLEL_ROWS):
+        if evaluation not in EVALUATION_MODES:
+            raise ValueError(f"Unknown evaluation mode {evaluation}")
         self.has_tensorflow = False
+        self.n_workers = n_workers
+        self.model_timeout = model_timeout
+        self.evaluation = evaluation
+        self.cv_folds = cv_folds
+        self.min_parallel_rows = min_parallel_rows
+        self.registry = registry or ModelRegistry(os.path.join(os.path.dirname(__file__), 'saved_models'))
+        self.feature_cache = feature_cache or FEATURE_CACHE
             
-        self.classification_models = {
-            'random_forest': RandomForestClassifier(n_estimators=100, random_state=42),
-            'xgboost': XGBClassifier(random_state=42),
-            'logistic_regression': LogisticRegression(random_state=42),
-            'svm': SVC(random_state=42)
-        }
+        self.classification_models = EstimatorRegistry(CLASSIFIERS)
         
         if self.has_tensorflow:
             self.classification_models['tensorflow_nn'] = create_tf_classifier()
         
-        self.regression_models = {
-            'random_forest': RandomForestRegressor(n_estimators=100, random_state=42),
-            'xgboost': XGBRegressor(random_state=42),
-            'linear_regression': LinearRegression(),
-            'svr': SVR()
-        }
+        self.regression_models = EstimatorRegistry(REGRESSORS)
 
     def prepare_data(self, X, y, test_size=0.2):
+        from sklearn.model_selection import train_test_split
         return train_test_split(X, y, test_size=test_size, random_state=42)
 
     def train_classification_model(self, X_train, y_train, model_name):
@@ -55,17 +65,16 @@ class ModelTrainer:
         return model
 
     def evaluate_classification_model(self, model, X_test, y_test):
+        from sklearn.metrics import accuracy_score
         y_pred = model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
-        cv_scores = cross_val_score(model, X_test, y_test, cv=5)
         
         return {
-            'accuracy': accuracy,
-            'cv_scores_mean': cv_scores.mean(),
-            'cv_scores_std': cv_scores.std()
+            'accuracy': accuracy
         }
 
     def evaluate_regression_model(self, model, X_test, y_test):
+        from sklearn.metrics import mean_squared_error, r2_score
         y_pred = model.predict(X_test)
         mse = mean_squared_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
@@ -76,67 +85,275 @@ class ModelTrainer:
             'r2_score': r2
         }
 
-    def save_model(self, model, model_name, problem_type):
-        """Save trained model to disk"""
-        import joblib
-        import os
-        
-        save_path = os.path.join('server/saved_models', f'{model_name}_{problem_type}.joblib')
-        joblib.dump(model, save_path)
+    def save_model(self, model, model_name, problem_type, metadata=None):
+        """Save trained model to disk as a new version with its manifest"""
+        save_path, _ = self.registry.save(model, model_name, problem_type, metadata)
         return save_path
 
-    def load_model(self, model_name, problem_type):
-        """Load trained model from disk"""
-        import joblib
-        import os
-        
-        load_path = os.path.join('server/saved_models', f'{model_name}_{problem_type}.joblib')
-        if os.path.exists(load_path):
-            return joblib.load(load_path)
-        return None
+    def load_model(self, model_name, problem_type, version=None):
+        """Load trained model, the latest version unless one is given"""
+        return self.registry.load(model_name, problem_type, version)
 
-    def train_and_evaluate_all_models(self, X, y, problem_type='classification'):
-        X_train, X_test, y_train, y_test = self.prepare_data(X, y)
-        results = {}
+    def _model_functions(self, problem_type):
+        if problem_type == 'classification':
+            return (self.classification_models, self.train_classification_model,
+                    self.evaluate_classification_model)
+        return (self.regression_models, self.train_regression_model,
+                self.evaluate_regression_model)
+
+    def _fit_and_evaluate(self, model_name, problem_type, X_train, X_test, y_train, y_test, estimator=None):
+        """Train a single candidate and return (model, evaluation, timings).
+
+        estimator, if given, is fitted in place of the registered one.
+        """
+        _, train_func, eval_func = self._model_functions(problem_type)
+        start = time.perf_counter()
+        if estimator is None:
+            model = train_func(X_train, y_train, model_name)
+        else:
+            model = estimator.fit(X_train, y_train)
+        fitted = time.perf_counter()
+        evaluation = eval_func(model, X_test, y_test)
+        timings = {'fit_seconds': fitted - start, 'evaluate_seconds': time.perf_counter() - fitted}
+        return model, evaluation, timings
 
+    def _fit_and_score_fold(self, model_name, problem_type, X_train, X_valid, y_train, y_valid, n_threads=None):
+        """Fit a fresh copy of a candidate on one fold; returns (score, seconds)"""
+        from sklearn.metrics import accuracy_score, r2_score
+        start = time.perf_counter()
+        model = self._fresh_estimator(model_name, problem_type, n_threads).fit(X_train, y_train)
+        y_pred = model.predict(X_valid)
         if problem_type == 'classification':
-            models = self.classification_models
-            eval_func = self.evaluate_classification_model
-            train_func = self.train_classification_model
+            score = accuracy_score(y_valid, y_pred)
         else:
-            models = self.regression_models
-            eval_func = self.evaluate_regression_model
-            train_func = self.train_regression_model
+            score = r2_score(y_valid, y_pred)
+        return score, time.perf_counter() - start
+
+    def _run_task(self, kind, *args, n_threads=None):
+        if kind == 'fold':
+            return self._fit_and_score_fold(*args, n_threads=n_threads)
+        if n_threads is None:
+            return self._fit_and_evaluate(*args)
+        model_name, problem_type = args[:2]
+        return self._fit_and_evaluate(*args, estimator=self._fresh_estimator(model_name, problem_type, n_threads))
+
+    def _fresh_estimator(self, model_name, problem_type, n_threads=None):
+        """An unfitted copy of a candidate, its own thread pool capped at n_threads"""
+        from sklearn.base import clone
+        models, _, _ = self._model_functions(problem_type)
+        model = clone(models[model_name])
+        if n_threads is not None and 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=n_threads)
+        return model
+
+    def _cv_tasks(self, X_train, y_train, problem_type, views):
+        """(model, fold) tasks for k-fold CV on the training half.
+
+        Fold indices come from the fold cache and each fold's features from
+        the feature cache, so every candidate shares one encoding per fold
+        and view. Returns (tasks, folds_seconds, preprocess_seconds).
+        """
+        start = time.perf_counter()
+        folds = fold_indices(y_train, problem_type, self.cv_folds)
+        indexed = time.perf_counter()
+        fold_features = [
+            self.feature_cache.transform_split(X_train.iloc[train_idx], X_train.iloc[valid_idx],
+                                               sorted(set(views.values())))
+            for train_idx, valid_idx in folds]
+        preprocessed = time.perf_counter()
+
+        tasks = {}
+        for i, (train_idx, valid_idx) in enumerate(folds):
+            y_fold_train, y_fold_valid = y_train.iloc[train_idx], y_train.iloc[valid_idx]
+            for name, view in views.items():
+                _, Xt_train, Xt_valid = fold_features[i][view]
+                tasks[f'{name}/fold{i + 1}'] = (
+                    'fold', name, problem_type, Xt_train, Xt_valid, y_fold_train, y_fold_valid)
+        return tasks, indexed - start, preprocessed - indexed
+
+    def _cv_summary(self, model_name, outcomes):
+        """cv_* result fields from a model's fold outcomes"""
+        folds = [outcome for task, outcome in outcomes.items()
+                 if task.startswith(f'{model_name}/fold')]
+        errors = [result for ok, result in folds if not ok]
+        if errors:
+            return {'cv_error': errors[0]}
+        scores = np.array([score for _, (score, _) in folds])
+        return {
+            'cv_scores_mean': float(scores.mean()),
+            'cv_scores_std': float(scores.std()),
+            'cv_folds': len(scores),
+            'cv_seconds': sum(seconds for _, (_, seconds) in folds),
+        }
 
-        for model_name in models.keys():
+    def _model_metadata(self, X, y, evaluation, timings, data_fingerprint, classes=None):
+        """Manifest fields for a saved model"""
+        metadata = {
+            'metrics': dict(evaluation),
+            'features': [{'name': str(col), 'dtype': str(dtype)} for col, dtype in X.dtypes.items()],
+            'target': str(y.name),
+            'data_fingerprint': data_fingerprint,
+            'timings': timings,
+        }
+        if classes is not None:
+            metadata['classes'] = list(classes)
+        return metadata
+
+    def train_and_evaluate_all_models(self, X, y, problem_type='classification', parallel=False,
+                                      progress=None):
+        """Train and evaluate every candidate model.
+
+        Each candidate is fitted on the training split and scored once on the
+        held-out split. With self.evaluation == 'cv' it is also scored by
+        k-fold cross-validation on the training split, one task per fold, and
+        the fold scores are reported as cv_scores_mean and cv_scores_std.
+        Every result carries the seconds spent in each phase.
+
+        With parallel=True each task is run in its own worker process,
+        at most self.n_workers at a time, and a task still running after
+        self.model_timeout seconds is stopped and reported as an error.
+        Inputs under self.min_parallel_rows rows run serially instead,
+        without the timeout.
+        progress(model_name, state) is called as each candidate starts and ends.
+        """
+        start = time.perf_counter()
+        target, classes = encode_target(y) if problem_type == 'classification' else (y, None)
+        X_train, X_test, y_train, y_test = self.prepare_data(X, target)
+        models, _, _ = self._model_functions(problem_type)
+        results = {}
+        split_seconds = time.perf_counter() - start
+
+        # Encode each feature view once for the split and share the
+        # matrices between all candidates that use it
+        start = time.perf_counter()
+        views = {name: MODEL_VIEWS.get(name, 'linear') for name in models}
+        features = self.feature_cache.transform_split(X_train, X_test, sorted(set(views.values())))
+        preprocess_seconds = time.perf_counter() - start
+
+        tasks = {name: ('final', name, problem_type, features[view][1], features[view][2], y_train, y_test)
+                 for name, view in views.items()}
+        phase_timings = {'split_seconds': split_seconds, 'preprocess_seconds': preprocess_seconds}
+        if self.evaluation == 'cv':
+            cv_tasks, folds_seconds, cv_preprocess_seconds = self._cv_tasks(X_train, y_train, problem_type, views)
+            tasks.update(cv_tasks)
+            phase_timings.update(cv_split_seconds=folds_seconds, cv_preprocess_seconds=cv_preprocess_seconds)
+        for phase, seconds in phase_timings.items():
+            record(f"train.{phase[:-len('_seconds')]}", seconds)
+        task_models = {task: args[1] for task, args in tasks.items()}
+        # Only a model's final fit decides whether it completed or failed
+        task_progress = group_progress(progress, task_models, decisive=models)
+
+        if parallel and len(X) < self.min_parallel_rows:
+            parallel = False
+        if parallel:
+            n_workers, n_threads = split_cores(len(tasks), self.n_workers)
+            # Each task caps the threads of its own copy of the estimator
+            outcomes = run_tasks(
+                functools.partial(self._run_task, n_threads=n_threads),
+                tasks,
+                n_workers=n_workers,
+                timeout=self.model_timeout,
+                progress=task_progress)
+        else:
+            outcomes = {}
+            for task, args in tasks.items():
+                if task_progress:
+                    task_progress(task, 'running')
+                try:
+                    outcomes[task] = (True, self._run_task(*args))
+                except Exception as e:
+                    outcomes[task] = (False, str(e))
+                if task_progress:
+                    task_progress(task, 'completed' if outcomes[task][0] else 'failed')
+
+        data_fingerprint = None
+        for model_name in models:
+            ok, outcome = outcomes[model_name]
+            if not ok:
+                results[model_name] = f"Error: {outcome}"
+                continue
             try:
-                model = train_func(X_train, y_train, model_name)
-                evaluation = eval_func(model, X_test, y_test)
-                results[model_name] = evaluation
-                
+                model, evaluation, timings = outcome
+                timings = dict(phase_timings, **timings)
+                if self.evaluation == 'cv':
+                    evaluation = dict(evaluation, **self._cv_summary(model_name, outcomes))
+                    if 'cv_seconds' in evaluation:
+                        timings['cv_seconds'] = evaluation.pop('cv_seconds')
+                record_model_timings(model_name, {key: timings[key] for key in timings if key not in phase_timings})
+                results[model_name] = dict(evaluation, **timings)
+
                 # Save model if its performance is good
                 if (problem_type == 'classification' and evaluation['accuracy'] > 0.7) or \
                    (problem_type == 'regression' and evaluation['r2_score'] > 0.7):
-                    save_path = self.save_model(model, model_name, problem_type)
+                    if data_fingerprint is None:
+                        data_fingerprint = frame_fingerprint(pd.concat([X, y], axis=1))
+                    metadata = self._model_metadata(X, y, evaluation, timings, data_fingerprint, classes)
+                    # Saved with its preprocessor so it predicts on raw rows
+                    pipeline = with_preprocessor(features[views[model_name]][0], model, classes)
+                    save_path = self.save_model(pipeline, model_name, problem_type, metadata)
                     results[model_name]['model_path'] = save_path
-                    
+
             except Exception as e:
                 results[model_name] = f"Error: {str(e)}"
 
         return results
 
+# Orders and seasonal settings each model is fitted with; part of the
+# fitted-model cache key
+TIME_SERIES_PARAMS = {
+    'arima': {'order': (1, 1, 1)},
+    'sarima': {'order': (1, 1, 1), 'seasonal_order': (1, 1, 1, 12)},
+    'prophet': {},
+    'holtwinters': {'seasonal_periods': 12},
+}
+# Models whose fitted results take new observations without a refit
+INCREMENTAL_MODELS = ('arima', 'sarima')
+
+def future_dates(dates, horizon):
+    """The `horizon` dates after a sorted DatetimeIndex, at its inferred frequency"""
+    freq = pd.infer_freq(dates) if len(dates) >= 3 else None
+    return pd.date_range(dates[-1], periods=horizon + 1, freq=freq or 'D')[1:]
+
+def backtest_metrics(forecasts, actual):
+    """Error metrics per model from (models, windows, horizon) forecasts.
+
+    actual is (windows, horizon). Returns {metric: per-model values}; the
+    _by_window and _by_step entries hold one value per window or step.
+    """
+    errors = forecasts - actual[np.newaxis]
+    squared = errors ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.abs(errors / actual[np.newaxis]) * 100
+    percentage[~np.isfinite(percentage)] = np.nan
+    mse = squared.mean(axis=(1, 2))
+    mape = np.nanmean(percentage.reshape(len(forecasts), -1), axis=1)
+    return {
+        'mse': mse.tolist(),
+        'rmse': np.sqrt(mse).tolist(),
+        'mae': np.abs(errors).mean(axis=(1, 2)).tolist(),
+        # Undefined when every actual value is zero
+        'mape': [None if np.isnan(value) else value for value in mape.tolist()],
+        'rmse_by_window': np.sqrt(squared.mean(axis=2)).tolist(),
+        'rmse_by_step': np.sqrt(squared.mean(axis=1)).tolist(),
+    }
+
 class TimeSeriesModelTrainer:
-    def __init__(self):
+    def __init__(self, n_workers=None, model_timeout=None, model_cache=None):
         self.models = {
             'arima': self._train_arima,
             'sarima': self._train_sarima,
             'prophet': self._train_prophet,
             'holtwinters': self._train_holtwinters
         }
+        self.params = {name: dict(TIME_SERIES_PARAMS[name]) for name in self.models}
+        self.n_workers = n_workers
+        self.model_timeout = model_timeout
+        self.model_cache = model_cache or FITTED_MODELS
 
     def prepare_data(self, data, target_col, date_col, test_size=0.2):
         """Prepare time series data for modeling"""
-        data = data.sort_values(date_col)
+        # A positional index lets statsmodels results take appended observations
+        data = data.sort_values(date_col).reset_index(drop=True)
         train_size = int(len(data) * (1 - test_size))
         train = data[:train_size]
         test = data[train_size:]
@@ -144,11 +361,13 @@ class TimeSeriesModelTrainer:
 
     def _train_arima(self, train_data, target_col, order=(1,1,1)):
         """Train ARIMA model"""
+        from statsmodels.tsa.arima.model import ARIMA
         model = ARIMA(train_data[target_col], order=order)
         return model.fit()
 
     def _train_sarima(self, train_data, target_col, order=(1,1,1), seasonal_order=(1,1,1,12)):
         """Train SARIMA model"""
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
         model = SARIMAX(train_data[target_col], 
                        order=order, 
                        seasonal_order=seasonal_order)
@@ -156,6 +375,7 @@ class TimeSeriesModelTrainer:
 
     def _train_prophet(self, train_data, date_col, target_col):
         """Train Prophet model"""
+        from prophet import Prophet
         df = pd.DataFrame({
             'ds': train_data[date_col],
             'y': train_data[target_col]
@@ -166,6 +386,7 @@ class TimeSeriesModelTrainer:
 
     def _train_holtwinters(self, train_data, target_col, seasonal_periods=12):
         """Train Holt-Winters model"""
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
         model = ExponentialSmoothing(train_data[target_col],
                                    seasonal_periods=seasonal_periods,
                                    seasonal='add')
@@ -173,14 +394,8 @@ class TimeSeriesModelTrainer:
 
     def evaluate_model(self, model, test_data, target_col, date_col=None, model_type='arima'):
         """Evaluate time series model"""
-        if model_type == 'prophet':
-            future = pd.DataFrame({'ds': test_data[date_col]})
-            y_pred = model.predict(future)['yhat']
-        elif model_type in ['arima', 'sarima']:
-            y_pred = model.forecast(len(test_data))
-        else:  # holtwinters
-            y_pred = model.forecast(len(test_data))
-
+        from sklearn.metrics import mean_squared_error, mean_absolute_error
+        y_pred = self._predict(model, test_data, date_col, model_type)
         y_true = test_data[target_col]
         
         return {
@@ -189,22 +404,302 @@ class TimeSeriesModelTrainer:
             'mae': mean_absolute_error(y_true, y_pred)
         }
 
-    def train_and_evaluate_all_models(self, data, target_col, date_col):
-        """Train and evaluate all time series models"""
+    def _predict(self, model, test_data, date_col, model_type):
+        """Predictions for the rows of test_data, which follow the training data"""
+        if model_type == 'prophet':
+            future = pd.DataFrame({'ds': test_data[date_col]})
+            return model.predict(future)['yhat'].to_numpy()
+        return np.asarray(model.forecast(len(test_data)))
+
+    def backtest(self, data, target_col, date_col, n_windows=5, horizon=None, parallel=False,
+                 progress=None):
+        """Rolling-origin backtest of every model over expanding windows.
+
+        The last n_windows * horizon observations are forecast `horizon`
+        steps at a time, each window trained on everything before it
+        (horizon defaults to a fifth of the series split across the
+        windows). ARIMA and SARIMA are fitted once at the first origin and
+        later windows append the new observations to those results, keeping
+        the estimated parameters, instead of refitting. Every (model,
+        window) pair is its own task, run in worker processes with
+        parallel=True, and the metrics of all models and windows are
+        computed in one pass over a (models, windows, horizon) array.
+        fit_seconds is the time a model spent across its windows; the
+        incremental models also report base_fit_seconds, the time of their
+        own base fit (only the cache lookup when the fit was cached).
+        """
+        data = data.sort_values(date_col).reset_index(drop=True)
+        if horizon is None:
+            horizon = max(1, int(len(data) * 0.2) // n_windows)
+        first_origin = len(data) - n_windows * horizon
+        if first_origin < 2:
+            raise ValueError(f'{len(data)} observations are too few for {n_windows} windows of {horizon}')
+        origins = [first_origin + i * horizon for i in range(n_windows)]
+        actual = np.stack([data[target_col].to_numpy(dtype=float)[o:o + horizon] for o in origins])
+
+        # Starting points for the incremental models, from the fitted-model cache
+        bases, base_seconds, errors = {}, {}, {}
+        base_tasks = {name: (name, data.iloc[:first_origin], target_col, date_col)
+                      for name in INCREMENTAL_MODELS if name in self.models}
+        for name, args in base_tasks.items():
+            start = time.perf_counter()
+            bases[name] = self.model_cache.get(
+                fit_key(args[1], [date_col, target_col], name, self.params[name]))
+            base_seconds[name] = time.perf_counter() - start
+        misses = {name: args for name, args in base_tasks.items() if bases[name] is None}
+        if parallel and misses:
+            n_workers, _ = split_cores(len(misses), self.n_workers)
+            fitted = run_tasks(self._fit_base, misses, n_workers=n_workers, timeout=self.model_timeout)
+        else:
+            fitted = {}
+            for name, args in misses.items():
+                try:
+                    fitted[name] = (True, self._fit_base(*args))
+                except Exception as e:
+                    fitted[name] = (False, str(e))
+        for name, (ok, outcome) in fitted.items():
+            if ok:
+                bases[name], elapsed = outcome
+                base_seconds[name] += elapsed
+                self.model_cache.put(fit_key(misses[name][1], [date_col, target_col], name,
+                                             self.params[name]), bases[name])
+            else:
+                del bases[name]
+                errors[name] = outcome
+
+        tasks = {}
+        for name in self.models:
+            if name in errors:
+                continue
+            for i, origin in enumerate(origins):
+                base = bases.get(name)
+                # Incremental models only need the observations since their base fit
+                history = data.iloc[first_origin:origin] if base is not None else data.iloc[:origin]
+                tasks[f'{name}/window{i + 1}'] = (name, base, history, data.iloc[origin:origin + horizon],
+                                                  target_col, date_col)
+        task_models = {task: args[0] for task, args in tasks.items()}
+        task_progress = group_progress(progress, task_models)
+        if parallel and tasks:
+            n_workers, _ = split_cores(len(tasks), self.n_workers)
+            outcomes = run_tasks(self._backtest_window, tasks, n_workers=n_workers,
+                                 timeout=self.model_timeout, progress=task_progress)
+        else:
+            outcomes = {}
+            for task, args in tasks.items():
+                if task_progress:
+                    task_progress(task, 'running')
+                try:
+                    outcomes[task] = (True, self._backtest_window(*args))
+                except Exception as e:
+                    outcomes[task] = (False, str(e))
+                if task_progress:
+                    task_progress(task, 'completed' if outcomes[task][0] else 'failed')
+
+        forecasts, seconds = {}, {}
+        for name in self.models:
+            windows = [outcomes[task] for task in tasks if task_models[task] == name]
+            failed = [outcome for ok, outcome in windows if not ok]
+            if failed:
+                errors[name] = failed[0]
+            elif windows:
+                forecasts[name] = np.stack([window for _, (window, _) in windows])
+                seconds[name] = sum(elapsed for _, (_, elapsed) in windows)
+
+        results = {name: f"Error: {errors[name]}" for name in self.models if name in errors}
+        if forecasts:
+            metrics = backtest_metrics(np.stack(list(forecasts.values())), actual)
+            for i, name in enumerate(forecasts):
+                results[name] = {metric: values[i] for metric, values in metrics.items()}
+                results[name].update(windows=n_windows, horizon=horizon, fit_seconds=seconds[name])
+                if name in bases:
+                    results[name]['base_fit_seconds'] = base_seconds[name]
+        return {name: results[name] for name in self.models}
+
+    def _fit_base(self, model_name, data, target_col, date_col):
+        """(model, seconds) for one backtest base fit; runs in a worker process"""
+        start = time.perf_counter()
+        model = self._fit_model(model_name, data, target_col, date_col)
+        return model, time.perf_counter() - start
+
+    def _backtest_window(self, model_name, base, history, test_data, target_col, date_col):
+        """(forecast, seconds) for one backtest window; runs in a worker process"""
+        start = time.perf_counter()
+        if base is None:
+            model = self._fit_model(model_name, history, target_col, date_col)
+        elif len(history):
+            model = base.append(history[target_col])
+        else:
+            model = base
+        forecast = self._predict(model, test_data, date_col, model_name)
+        return np.asarray(forecast, dtype=float), time.perf_counter() - start
+
+    def fit(self, model_name, data, target_col, date_col):
+        """model_name fitted on data, reused from the cache when already fitted"""
+        key = fit_key(data, [date_col, target_col], model_name, self.params[model_name])
+        model = self.model_cache.get(key)
+        if model is None:
+            model = self._fit_model(model_name, data, target_col, date_col)
+            self.model_cache.put(key, model)
+        return model
+
+    def forecast(self, model_name, data, target_col, date_col, horizon):
+        """(future dates, forecast) from model_name fitted on all of data"""
+        data = data.sort_values(date_col).reset_index(drop=True)
+        dates = future_dates(pd.DatetimeIndex(data[date_col]), horizon)
+        model = self.fit(model_name, data, target_col, date_col)
+        if model_name == 'prophet':
+            return dates, model.predict(pd.DataFrame({'ds': dates}))['yhat'].to_numpy()
+        return dates, pd.Series(model.forecast(horizon)).to_numpy()
+
+    def min_observations(self, model_name):
+        """Shortest history model_name is fitted on; shorter series get the fallback"""
+        params = self.params[model_name]
+        if 'seasonal_order' in params:
+            return 2 * params['seasonal_order'][3] + 2
+        if 'seasonal_periods' in params:
+            return 2 * params['seasonal_periods']
+        return 10
+
+    def forecast_groups(self, data, target_col, date_col, group_col, model_name='sarima', horizon=12,
+                        shared_datasets=None):
+        """Yield a forecast per value of group_col, in the order groups finish.
+
+        The frame is split once; each group's date and target columns are
+        forecast in a pool of worker processes that only holds a few groups
+        at a time. Groups too short for model_name, or whose fit fails, are
+        forecast with _forecast_fallback instead. With shared_datasets the
+        two columns are published once and each task only carries its rows.
+        """
+        frame = data[[group_col, date_col, target_col]]
+        if shared_datasets is not None:
+            handle = shared_datasets.share(frame[[date_col, target_col]].reset_index(drop=True))
+            groups = ((key, (model_name, handle, rows, target_col, date_col, horizon))
+                      for key, rows in frame.groupby(group_col, sort=False).indices.items())
+            func = self._forecast_shared_group
+        else:
+            groups = ((key, (model_name, group[[date_col, target_col]], target_col, date_col, horizon))
+                      for key, group in frame.groupby(group_col, sort=False))
+            func = self._forecast_group
+        for key, ok, result in stream_tasks(func, groups, n_workers=self.n_workers):
+            yield dict(result, group=key) if ok else {'group': key, 'error': result}
+
+    def _forecast_shared_group(self, model_name, handle, rows, target_col, date_col, horizon):
+        """_forecast_group on rows of a published dataset; runs in a worker process"""
+        data = handle.load([date_col, target_col]).iloc[rows]
+        return self._forecast_group(model_name, data, target_col, date_col, horizon)
+
+    def _forecast_group(self, model_name, data, target_col, date_col, horizon):
+        """Forecast for one group; runs in a worker process"""
+        start = time.perf_counter()
+        data = data.dropna(subset=[target_col]).sort_values(date_col)
+        if data.empty:
+            raise ValueError('No observations')
+        needed = self.min_observations(model_name)
+        fallback_reason = None
+        if len(data) < needed:
+            fallback_reason = f'{len(data)} observations, {needed} needed'
+        else:
+            try:
+                dates, forecast = self.forecast(model_name, data, target_col, date_col, horizon)
+            except Exception as e:
+                fallback_reason = str(e)
+        if fallback_reason is not None:
+            dates = future_dates(pd.DatetimeIndex(data[date_col]), horizon)
+            model_name, forecast = self._forecast_fallback(data[target_col], horizon)
+        return {
+            'model': model_name,
+            'observations': len(data),
+            'fallback_reason': fallback_reason,
+            'dates': dates.astype(str).tolist(),
+            'forecast': np.asarray(forecast, dtype=float).tolist(),
+            'seconds': time.perf_counter() - start,
+        }
+
+    def _forecast_fallback(self, y, horizon):
+        """(model name, forecast): Holt's linear trend, or the last value for very short series"""
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+        y = y.astype(float).to_numpy()
+        if len(y) >= 4:
+            return 'holt', ExponentialSmoothing(y, trend='add').fit().forecast(horizon)
+        return 'naive', np.repeat(y[-1], horizon)
+
+    def _fit_model(self, model_name, data, target_col, date_col):
+        train_func = self.models[model_name]
+        if model_name == 'prophet':
+            return train_func(data, date_col, target_col, **self.params[model_name])
+        return train_func(data, target_col, **self.params[model_name])
+
+    def _fit_and_evaluate(self, model_name, train_data, test_data, target_col, date_col):
+        """Fit and score one model; returns (model, evaluation, timings)"""
+        start = time.perf_counter()
+        model = self._fit_model(model_name, train_data, target_col, date_col)
+        fitted = time.perf_counter()
+        evaluation = self.evaluate_model(model, test_data, target_col, date_col, model_name)
+        timings = {'fit_seconds': fitted - start, 'evaluate_seconds': time.perf_counter() - fitted}
+        return model, evaluation, timings
+
+    def train_and_evaluate_all_models(self, data, target_col, date_col, parallel=False, progress=None):
+        """Train and evaluate all time series models.
+
+        Models already fitted on this training series come from the
+        fitted-model cache and are only scored. With parallel=True the
+        others are fitted concurrently in worker processes, at most
+        self.n_workers at a time with native thread pools capped to each
+        worker's share of the CPUs, and a fit running longer than
+        self.model_timeout seconds is reported as an error.
+        """
         train_data, test_data = self.prepare_data(data, target_col, date_col)
         results = {}
 
-        for model_name, train_func in self.models.items():
+        keys = {name: fit_key(train_data, [date_col, target_col], name, self.params[name])
+                for name in self.models}
+        outcomes = {}
+        for model_name, key in keys.items():
+            model = self.model_cache.get(key)
+            if model is None:
+                continue
+            if progress:
+                progress(model_name, 'running')
             try:
-                if model_name == 'prophet':
-                    model = train_func(train_data, date_col, target_col)
-                else:
-                    model = train_func(train_data, target_col)
-                
-                results[model_name] = self.evaluate_model(
-                    model, test_data, target_col, date_col, model_name
-                )
+                start = time.perf_counter()
+                evaluation = self.evaluate_model(model, test_data, target_col, date_col, model_name)
+                outcomes[model_name] = (True, (model, evaluation, {
+                    'fit_seconds': 0.0, 'evaluate_seconds': time.perf_counter() - start}))
             except Exception as e:
-                results[model_name] = f"Error: {str(e)}"
+                outcomes[model_name] = (False, str(e))
+            if progress:
+                progress(model_name, 'completed' if outcomes[model_name][0] else 'failed')
+
+        tasks = {name: (name, train_data, test_data, target_col, date_col)
+                 for name in self.models if name not in outcomes}
+        if parallel and tasks:
+            n_workers, _ = split_cores(len(tasks), self.n_workers)
+            outcomes.update(run_tasks(
+                self._fit_and_evaluate,
+                tasks,
+                n_workers=n_workers,
+                timeout=self.model_timeout,
+                progress=progress))
+        else:
+            for model_name, args in tasks.items():
+                if progress:
+                    progress(model_name, 'running')
+                try:
+                    outcomes[model_name] = (True, self._fit_and_evaluate(*args))
+                except Exception as e:
+                    outcomes[model_name] = (False, str(e))
+                if progress:
+                    progress(model_name, 'completed' if outcomes[model_name][0] else 'failed')
+
+        for model_name in self.models:
+            ok, outcome = outcomes[model_name]
+            if not ok:
+                results[model_name] = f"Error: {outcome}"
+                continue
+            model, evaluation, timings = outcome
+            if model_name in tasks:
+                self.model_cache.put(keys[model_name], model)
+            record_model_timings(model_name, timings)
+            results[model_name] = dict(evaluation, **timings)
 
         return results
@@ -0,0 +1,196 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor
+from concurrent.futures import wait as wait_futures
+import multiprocessing
+from multiprocessing.connection import wait
+import os
+import time
+
+
+def available_cpus():
+    """Number of CPUs this process is allowed to run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def split_cores(n_tasks, n_workers=None):
+    """Return (n_workers, threads_per_worker) for running n_tasks at once.
+
+    Workers default to one per task, capped at the CPU count, and the CPUs are
+    shared evenly so that workers times threads never oversubscribes the box.
+    """
+    cpus = available_cpus()
+    if n_workers is None:
+        n_workers = cpus
+    n_workers = max(1, min(n_workers, n_tasks, cpus))
+    return n_workers, max(1, cpus // n_workers)
+
+
+def _run_in_child(conn, func, args, n_threads):
+    try:
+        try:
+            from threadpoolctl import threadpool_limits
+            limits = threadpool_limits(limits=n_threads)
+        except ImportError:
+            limits = None
+        try:
+            result = func(*args)
+        finally:
+            if limits is not None:
+                limits.restore_original_limits()
+        conn.send((True, result))
+    except Exception as e:
+        conn.send((False, str(e)))
+    finally:
+        conn.close()
+
+
+def run_tasks(func, tasks, n_workers=None, timeout=None, progress=None):
+    """Run func(*args) for every (name, args) in tasks in worker processes.
+
+    Each task gets its own process so a task that exceeds `timeout` seconds
+    can be terminated without affecting the others. At most `n_workers`
+    processes run at once and native thread pools (BLAS, OpenMP) inside each
+    one are capped to that worker's share of the CPUs.
+
+    Returns a dict of name -> (ok, result), where result is the error message
+    when ok is False. Results are returned in the order of `tasks`. If given,
+    progress(name, state) is called as each task goes 'running' and then
+    'completed' or 'failed'.
+    """
+    tasks = list(tasks.items()) if isinstance(tasks, dict) else list(tasks)
+    if not tasks:
+        return {}
+    n_workers, n_threads = split_cores(len(tasks), n_workers)
+    ctx = multiprocessing.get_context()
+
+    pending = list(tasks)
+    running = {}
+    results = {}
+    while pending or running:
+        while pending and len(running) < n_workers:
+            name, args = pending.pop(0)
+            parent_conn, child_conn = ctx.Pipe(duplex=False)
+            proc = ctx.Process(target=_run_in_child,
+                               args=(child_conn, func, args, n_threads),
+                               daemon=True)
+            proc.start()
+            child_conn.close()
+            running[parent_conn] = (name, proc, time.monotonic())
+            if progress:
+                progress(name, 'running')
+
+        wait_for = None
+        if timeout is not None:
+            oldest = min(start for _, _, start in running.values())
+            wait_for = max(0.0, oldest + timeout - time.monotonic())
+
+        for conn in wait(list(running), timeout=wait_for):
+            name, proc, _ = running.pop(conn)
+            try:
+                results[name] = conn.recv()
+            except EOFError:
+                proc.join()
+                results[name] = (False, f"worker exited with code {proc.exitcode}")
+            conn.close()
+            proc.join()
+            if progress:
+                progress(name, 'completed' if results[name][0] else 'failed')
+
+        if timeout is not None:
+            now = time.monotonic()
+            for conn, (name, proc, start) in list(running.items()):
+                if now - start >= timeout:
+                    proc.terminate()
+                    proc.join()
+                    conn.close()
+                    del running[conn]
+                    results[name] = (False, f"timed out after {timeout}s")
+                    if progress:
+                        progress(name, 'failed')
+
+    return {name: results[name] for name, _ in tasks}
+
+
+def group_progress(progress, task_groups, decisive=None):
+    """Adapts run_tasks progress callbacks for tasks that share a step.
+
+    task_groups maps each task name to the step (e.g. model) it belongs to.
+    The step is reported running with its first task and finished with its
+    last; it fails if any of its tasks in `decisive` (all by default) failed.
+    """
+    if progress is None:
+        return None
+    remaining = {}
+    for group in task_groups.values():
+        remaining[group] = remaining.get(group, 0) + 1
+    started, failed = set(), set()
+
+    def report(task, state):
+        group = task_groups[task]
+        if state == 'running':
+            if group not in started:
+                started.add(group)
+                progress(group, 'running')
+            return
+        if state == 'failed' and (decisive is None or task in decisive):
+            failed.add(group)
+        remaining[group] -= 1
+        if remaining[group] == 0:
+            progress(group, 'failed' if group in failed else 'completed')
+    return report
+
+
+def _limit_pool_threads(n_threads):
+    # Pool initializer: the cap stays in place for the worker's lifetime
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=n_threads)
+    except ImportError:
+        pass
+
+
+def _call(func, args):
+    try:
+        return True, func(*args)
+    except Exception as e:
+        return False, str(e)
+
+
+def stream_tasks(func, tasks, n_workers=None, max_pending=None):
+    """Yield (name, ok, result) for func(*args) over (name, args) pairs as each finishes.
+
+    Meant for many small tasks: a fixed pool of worker processes is reused
+    instead of one process per task, with native thread pools capped as in
+    run_tasks. `tasks` may be a lazy iterable; at most `max_pending` tasks
+    (two per worker by default) are submitted at once, so only that many
+    argument sets are held in memory. There is no per-task timeout. Closing
+    the generator cancels tasks that have not started.
+    """
+    n_workers, n_threads = split_cores(n_workers or available_cpus(), n_workers)
+    max_pending = max_pending or 2 * n_workers
+    tasks = iter(tasks.items() if isinstance(tasks, dict) else tasks)
+    executor = ProcessPoolExecutor(max_workers=n_workers,
+                                   mp_context=multiprocessing.get_context(),
+                                   initializer=_limit_pool_threads,
+                                   initargs=(n_threads,))
+    pending = {}
+    try:
+        while True:
+            for name, args in tasks:
+                pending[executor.submit(_call, func, args)] = name
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+            done, _ = wait_futures(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    ok, result = future.result()
+                except Exception as e:
+                    ok, result = False, f"worker failed: {e}"
+                yield name, ok, result
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,129 @@
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+
+from fingerprint import series_fingerprint
+from parallel import split_cores
+
+FINGERPRINT_PATTERN = re.compile(r'^[0-9a-f]{40}$')
+
+
+def _render_histogram(values, column, path):
+    """Draw a histogram with KDE; runs in a worker process"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure()
+    sns.histplot(values, kde=True)
+    plt.title(f"Distribution of {column}")
+    plt.xlabel(column)
+    plt.tight_layout()
+    tmp_path = f'{path}.{os.getpid()}.tmp.png'
+    plt.savefig(tmp_path)
+    plt.close()
+    os.replace(tmp_path, path)
+
+
+RENDERERS = {
+    'hist': _render_histogram,
+}
+
+
+def _render_shared(kind, handle, column, path):
+    """Render one column of a published dataset; runs in a worker process"""
+    values = handle.load([column]).iloc[:, 0].dropna().to_numpy()
+    RENDERERS[kind](values, str(column), path)
+
+
+class PlotCache:
+    """Chart images stored per column and rendered only on a cache miss.
+
+    Each image is keyed on the column's series fingerprint (its name, dtype
+    and values) and the chart kind, as images_folder/<kind>/<fingerprint>.png,
+    so a cleaning step only redraws the columns it changed and two sessions
+    with the same column share one image. Misses are rendered in a pool of
+    spawned processes because matplotlib is not thread-safe. Every use
+    refreshes an image's mtime and only the `max_images` most recently used
+    are kept. With a SharedDatasets the columns to draw are published once
+    and the workers attach them, rather than each task pickling its
+    column's values.
+    """
+
+    def __init__(self, images_folder, n_workers=None, max_images=2000, shared_datasets=None):
+        self.images_folder = images_folder
+        os.makedirs(self.images_folder, exist_ok=True)
+        self.n_workers = n_workers
+        self.shared_datasets = shared_datasets
+        self.max_images = max_images
+        self.executor = None
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def plots(self, df, columns, kind='hist'):
+        """Return image paths relative to images_folder for each column"""
+        os.makedirs(os.path.join(self.images_folder, kind), exist_ok=True)
+        images, misses = [], []
+        for column in columns:
+            image = self._image(df[column], kind)
+            path = os.path.join(self.images_folder, image)
+            images.append(image)
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                misses.append((column, path))
+
+        if misses:
+            self.logger.info(f"Rendering {len(misses)} of {len(columns)} {kind} plots")
+            if self.shared_datasets is not None:
+                handle = self.shared_datasets.share(df[[column for column, _ in misses]])
+                tasks = [(_render_shared, kind, handle, column, path) for column, path in misses]
+            else:
+                tasks = [(RENDERERS[kind], df[column].dropna().to_numpy(), str(column), path)
+                         for column, path in misses]
+            futures = [self._executor().submit(*task) for task in tasks]
+            for future in futures:
+                future.result()
+            self._prune()
+        return images
+
+    def list_images(self, df):
+        """Images already rendered for this dataset's columns"""
+        images = [self._image(df[column], kind) for column in df.columns for kind in RENDERERS]
+        return sorted(image for image in images if os.path.exists(os.path.join(self.images_folder, image)))
+
+    def _image(self, series, kind):
+        return f'{kind}/{series_fingerprint(series)}.png'
+
+    def _executor(self):
+        with self.lock:
+            if self.executor is None:
+                n_workers, _ = split_cores(os.cpu_count() or 1, self.n_workers)
+                self.executor = ProcessPoolExecutor(
+                    max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'))
+            return self.executor
+
+    def _prune(self):
+        # Per-dataset folders of the earlier layout are no longer referenced
+        for name in os.listdir(self.images_folder):
+            if FINGERPRINT_PATTERN.match(name) and os.path.isdir(os.path.join(self.images_folder, name)):
+                shutil.rmtree(os.path.join(self.images_folder, name), ignore_errors=True)
+
+        images = []
+        for kind in RENDERERS:
+            folder = os.path.join(self.images_folder, kind)
+            if os.path.isdir(folder):
+                images.extend(os.path.join(folder, f) for f in os.listdir(folder) if f.endswith('.png'))
+        if len(images) <= self.max_images:
+            return
+        images.sort(key=lambda path: os.stat(path).st_mtime_ns if os.path.exists(path) else 0)
+        for path in images[:-self.max_images]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
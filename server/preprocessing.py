@@ -0,0 +1,176 @@
+from collections import OrderedDict
+import logging
+import threading
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import frame_fingerprint
+
+# Feature views: tree ensembles get compact ordinal codes, linear and kernel
+# models get one-hot categoricals and standardized numeric columns
+MODEL_VIEWS = {
+    'random_forest': 'tree',
+    'xgboost': 'tree',
+    'logistic_regression': 'linear',
+    'svm': 'linear',
+    'linear_regression': 'linear',
+    'svr': 'linear',
+}
+MAX_ONE_HOT_CATEGORIES = 50
+
+
+def _datetime_to_seconds(X):
+    columns = []
+    for col in X.columns:
+        values = pd.to_datetime(X[col])
+        if values.dt.tz is not None:
+            values = values.dt.tz_convert(None)
+        columns.append((values - pd.Timestamp(0)).dt.total_seconds().to_numpy())
+    return np.column_stack(columns)
+
+
+def _as_text(X):
+    # Encoders need one comparable type per column; nulls become a category
+    return X.astype(object).where(X.notna(), '__missing__').astype(str)
+
+
+def column_groups(X):
+    """(numeric, datetime, categorical) column lists.
+
+    Text columns whose values are all distinct, such as row identifiers,
+    carry no signal a model could reuse and are left out.
+    """
+    numeric = list(X.select_dtypes(include=['number', 'bool']).columns)
+    datetimes = list(X.select_dtypes(include=['datetime', 'datetimetz']).columns)
+    categorical = [col for col in X.columns if col not in numeric and col not in datetimes]
+    categorical = [col for col in categorical if len(X) < 2 or X[col].nunique() < len(X)]
+    return numeric, datetimes, categorical
+
+
+def build_preprocessor(X, view):
+    """An unfitted ColumnTransformer for X in the given feature view"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, OrdinalEncoder, StandardScaler
+    numeric, datetimes, categorical = column_groups(X)
+    numeric_steps = [SimpleImputer(strategy='median')]
+    if view == 'linear':
+        numeric_steps.append(StandardScaler())
+        encoder = OneHotEncoder(handle_unknown='infrequent_if_exist',
+                                max_categories=MAX_ONE_HOT_CATEGORIES)
+    else:
+        encoder = OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1)
+
+    transformers = []
+    if numeric:
+        transformers.append(('numeric', make_pipeline(*numeric_steps), numeric))
+    if datetimes:
+        transformers.append(('datetime', make_pipeline(
+            FunctionTransformer(_datetime_to_seconds), *numeric_steps), datetimes))
+    if categorical:
+        transformers.append(('categorical', make_pipeline(
+            FunctionTransformer(_as_text), encoder), categorical))
+    return ColumnTransformer(transformers, remainder='drop', sparse_threshold=0.3)
+
+
+def encode_target(y):
+    """(codes, classes) for a classification target.
+
+    Estimators such as XGBoost only accept classes numbered 0..k-1, so
+    every classifier is fitted on the codes; classes[code] is the label.
+    """
+    from sklearn.preprocessing import LabelEncoder
+    encoder = LabelEncoder()
+    codes = pd.Series(encoder.fit_transform(y), index=y.index, name=y.name)
+    return codes, encoder.classes_
+
+
+def with_preprocessor(preprocessor, model, classes=None):
+    """A pipeline that applies the fitted preprocessor before the model.
+
+    classes, from encode_target, is kept on the pipeline as label_classes_
+    so predict_labels can turn the model's codes back into labels.
+    """
+    from sklearn.pipeline import Pipeline
+    pipeline = Pipeline([('preprocess', preprocessor), ('model', model)])
+    if classes is not None:
+        pipeline.label_classes_ = np.asarray(classes)
+    return pipeline
+
+
+def input_columns(model):
+    """The input columns a fitted model reads, or None if it does not say.
+
+    For a pipeline that starts with a ColumnTransformer these are the
+    columns its transformers use; ones it drops, such as row identifiers,
+    need not be sent.
+    """
+    features = getattr(model, 'feature_names_in_', None)
+    if features is None:
+        return None
+    steps = getattr(model, 'steps', None)
+    transformers = getattr(steps[0][1] if steps else model, 'transformers_', None)
+    if transformers is None:
+        return list(features)
+    used = {col for _, transformer, cols in transformers if transformer != 'drop' for col in cols}
+    return [col for col in features if col in used]
+
+
+def predict_labels(model, X):
+    """model.predict(X), with class codes decoded to the original labels"""
+    predictions = model.predict(X)
+    classes = getattr(model, 'label_classes_', None)
+    if classes is None:
+        return predictions
+    return classes[np.asarray(predictions).astype(int)]
+
+
+class FeatureCache:
+    """Preprocessors fitted once per train/test split, with their matrices.
+
+    Keyed by the fingerprints of both halves of the split and the feature
+    view, so every candidate in a bake-off - and a later bake-off on the same
+    split - reuses the encoded sparse or dense matrices instead of encoding
+    the data again. The preprocessor is fitted on the training half only.
+    Cross-validation adds an entry per fold and view, hence the default size.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        # (train fingerprint, test fingerprint, view) -> (preprocessor, Xt_train, Xt_test)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def transform_split(self, X_train, X_test, views):
+        """{view: (fitted preprocessor, X_train matrix, X_test matrix)}"""
+        split_key = (frame_fingerprint(X_train), frame_fingerprint(X_test))
+        features = {}
+        for view in views:
+            key = split_key + (view,)
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+            if entry is None:
+                preprocessor = build_preprocessor(X_train, view)
+                entry = (preprocessor, preprocessor.fit_transform(X_train), preprocessor.transform(X_test))
+                self.logger.info(f"Encoded {view} features: {entry[1].shape[1]} columns")
+                with self.lock:
+                    self.entries[key] = entry
+                    while len(self.entries) > self.max_entries:
+                        self.entries.popitem(last=False)
+            features[view] = entry
+        return features
+
+    def __getstate__(self):
+        # Worker processes get an empty cache rather than a copy
+        return {'max_entries': self.max_entries}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_entries'])
+
+
+FEATURE_CACHE = FeatureCache()
@@ -0,0 +1,266 @@
+import numpy as np
+import pandas as pd
+
+QUANTILES = (0.25, 0.5, 0.75)
+DESCRIBE_ROWS = ['count', 'unique', 'top', 'freq', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def _bit_length(values):
+    """Vectorised int.bit_length() for uint64 arrays"""
+    hi = (values >> np.uint64(32)).astype(np.float64)
+    lo = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(hi > 0, 32 + np.frexp(hi)[1], np.frexp(lo)[1])
+
+
+class HyperLogLog:
+    """Approximate distinct counter; registers merge with an element-wise max"""
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # Set the bit just above the index bits so the rank is always bounded
+        remainder = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        rank = (65 - _bit_length(remainder)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class ColumnProfile:
+    """Mergeable one-pass summary of a single column.
+
+    Distinct values are counted exactly until `exact_limit` is exceeded and
+    with a HyperLogLog sketch after that. Quantiles come from a bottom-k
+    sample (the `sample_size` values with the smallest random priorities),
+    which stays a uniform sample when two profiles are merged. Top values
+    are tracked with counters truncated to `top_capacity` entries.
+    """
+
+    def __init__(self, kind, sample_size=8192, exact_limit=1 << 14, top_capacity=1000, seed=0):
+        self.kind = kind
+        self.count = 0
+        self.nulls = 0
+        self.hll = HyperLogLog()
+        self.exact = np.empty(0, dtype=np.uint64)
+        self.exact_limit = exact_limit
+        self.rng = np.random.default_rng(seed)
+        if kind == 'categorical':
+            self.top_counts = pd.Series(dtype=np.int64)
+            self.top_capacity = top_capacity
+        else:
+            self.mean = 0.0
+            self.m2 = 0.0
+            self.min = np.inf
+            self.max = -np.inf
+            self.sample_size = sample_size
+            self.sample = np.empty(0, dtype=np.float64)
+            self.priorities = np.empty(0, dtype=np.float64)
+
+    @staticmethod
+    def kind_of(series):
+        if pd.api.types.is_bool_dtype(series) or not (
+                pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)):
+            return 'categorical'
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return 'datetime'
+        return 'numeric'
+
+    def update(self, series):
+        valid = series.dropna()
+        if self.kind == 'numeric' and not pd.api.types.is_numeric_dtype(valid):
+            # A later chunk was parsed as text; values that are not numbers
+            # are left out of the numeric statistics
+            valid = pd.to_numeric(valid, errors='coerce').dropna()
+        n = len(valid)
+        self.nulls += int(series.isnull().sum()) if n < len(series) else 0
+        if n == 0:
+            return
+
+        hashes = pd.util.hash_array(valid.to_numpy())
+        self.hll.update(hashes)
+        if self.exact is not None:
+            self.exact = np.union1d(self.exact, hashes)
+            if len(self.exact) > self.exact_limit:
+                self.exact = None
+
+        if self.kind == 'categorical':
+            self._merge_top(valid.value_counts(sort=False))
+        else:
+            values = pd.DatetimeIndex(valid).as_unit('ns').asi8 if self.kind == 'datetime' \
+                else valid.to_numpy(dtype=np.float64)
+            self._merge_moments(n, float(values.mean()), float(values.var() * n),
+                                values.min(), values.max())
+            self._merge_sample(values.astype(np.float64), self.rng.random(n))
+        self.count += n
+
+    def merge(self, other):
+        self.nulls += other.nulls
+        self.hll.merge(other.hll)
+        if self.exact is not None and other.exact is not None:
+            self.exact = np.union1d(self.exact, other.exact)
+            if len(self.exact) > self.exact_limit:
+                self.exact = None
+        else:
+            self.exact = None
+
+        if self.kind == 'categorical':
+            self._merge_top(other.top_counts)
+        elif other.count:
+            self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+            self._merge_sample(other.sample, other.priorities)
+        self.count += other.count
+        return self
+
+    def _merge_top(self, counts):
+        merged = self.top_counts.add(counts, fill_value=0).astype(np.int64)
+        if len(merged) > self.top_capacity:
+            merged = merged.nlargest(self.top_capacity)
+        self.top_counts = merged
+
+    def _merge_moments(self, n, mean, m2, minimum, maximum):
+        # Chan et al. parallel variance update
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def _merge_sample(self, values, priorities):
+        values = np.concatenate([self.sample, values])
+        priorities = np.concatenate([self.priorities, priorities])
+        if len(values) > self.sample_size:
+            keep = np.argpartition(priorities, self.sample_size)[:self.sample_size]
+            values, priorities = values[keep], priorities[keep]
+        self.sample, self.priorities = values, priorities
+
+    def distinct(self):
+        if self.exact is not None:
+            return len(self.exact)
+        return self.hll.estimate()
+
+    def describe(self):
+        """Statistics keyed like a column of DataFrame.describe(include='all')"""
+        stats = dict.fromkeys(DESCRIBE_ROWS, np.nan)
+        stats['count'] = float(self.count)
+        if self.count == 0:
+            return stats
+
+        if self.kind == 'categorical':
+            stats['unique'] = self.distinct()
+            top = self.top_counts.idxmax()
+            stats['top'] = top.item() if isinstance(top, np.generic) else top
+            stats['freq'] = int(self.top_counts.max())
+            return stats
+
+        quantiles = np.quantile(self.sample, QUANTILES)
+        values = [self.mean, self.min, *quantiles, self.max]
+        if self.kind == 'datetime':
+            values = [pd.Timestamp(int(round(v))) for v in values]
+        else:
+            values = [float(v) for v in values]
+        stats['mean'], stats['min'], stats['25%'], stats['50%'], stats['75%'], stats['max'] = values
+        if self.kind == 'numeric':
+            stats['std'] = float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else np.nan
+        return stats
+
+
+class DatasetProfile:
+    """Column profiles for a whole frame, built chunk by chunk and mergeable"""
+
+    def __init__(self):
+        self.num_records = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        self.num_records += len(chunk)
+        for col in chunk.columns:
+            profile = self.columns.get(col)
+            if profile is None:
+                profile = self.columns[col] = ColumnProfile(ColumnProfile.kind_of(chunk[col]))
+            profile.update(chunk[col])
+        return self
+
+    def merge(self, other):
+        self.num_records += other.num_records
+        for col, profile in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(profile)
+            else:
+                self.columns[col] = profile
+        return self
+
+    def null_counts(self):
+        return {col: int(p.nulls) for col, p in self.columns.items()}
+
+    def describe(self):
+        """Same nested dict as df.describe(include='all').to_dict()"""
+        described = {col: p.describe() for col, p in self.columns.items()}
+        kinds = {p.kind for p in self.columns.values()}
+        rows = ['count']
+        if 'categorical' in kinds:
+            rows += ['unique', 'top', 'freq']
+        if kinds & {'numeric', 'datetime'}:
+            rows += ['mean']
+        if 'numeric' in kinds:
+            rows += ['std']
+        if kinds & {'numeric', 'datetime'}:
+            rows += ['min', '25%', '50%', '75%', 'max']
+        return {col: {row: stats[row] for row in rows} for col, stats in described.items()}
+
+
+def profile_frame(df, chunksize=1_000_000):
+    """Profile an in-memory frame, a bounded slice of rows at a time"""
+    profile = DatasetProfile()
+    for start in range(0, max(len(df), 1), chunksize):
+        profile.update(df.iloc[start:start + chunksize])
+    return profile
+
+
+def format_info(df, profile):
+    """Text in the layout of df.info(), using counts from the profile"""
+    nulls = profile.null_counts()
+    names = [str(col) for col in df.columns]
+    name_width = max([len('Column')] + [len(n) for n in names])
+    dtypes = [str(dtype) for dtype in df.dtypes]
+    dtype_width = max([len('Dtype')] + [len(d) for d in dtypes])
+    non_null = [f"{len(df) - nulls.get(col, 0)} non-null" for col in df.columns]
+    count_width = max([len('Non-Null Count')] + [len(c) for c in non_null])
+
+    lines = [str(type(df)), f"RangeIndex: {len(df)} entries, 0 to {len(df) - 1}"
+             if isinstance(df.index, pd.RangeIndex) else f"Index: {len(df)} entries",
+             f"Data columns (total {len(df.columns)} columns):",
+             f" {'#':<3} {'Column':<{name_width}}  {'Non-Null Count':<{count_width}}  {'Dtype':<{dtype_width}}",
+             f"{'---':<4} {'-' * 6:<{name_width}}  {'-' * 14:<{count_width}}  {'-' * 5:<{dtype_width}}"]
+    for i, (name, count, dtype) in enumerate(zip(names, non_null, dtypes)):
+        lines.append(f" {i:<3} {name:<{name_width}}  {count:<{count_width}}  {dtype:<{dtype_width}}")
+
+    dtype_counts = pd.Series(dtypes).value_counts().sort_index()
+    lines.append('dtypes: ' + ', '.join(f"{d}({n})" for d, n in dtype_counts.items()))
+    lines.append(f"memory usage: {_format_size(df)}")
+    return '\n'.join(lines) + '\n'
+
+
+def _format_size(df):
+    # Shallow memory usage, marked with '+' when object columns hold more
+    size = float(df.memory_usage(index=True, deep=False).sum())
+    plus = '+' if (df.dtypes == object).any() else ''
+    for unit in ['bytes', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024.0:
+            return f"{size:3.1f}{plus} {unit}"
+        size /= 1024.0
+    return f"{size:3.1f}{plus} PB"
@@ -0,0 +1,119 @@
+import json
+
+from flask import Response
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+DEFAULT_PAGE_SIZE = 1000
+
+
+def page_args(request):
+    """offset, limit and column projection from the query string.
+
+    ?offset=0&limit=100&columns=a,b ; limit=all returns every row.
+    """
+    offset = max(int(request.args.get('offset', 0)), 0)
+    limit = request.args.get('limit', str(DEFAULT_PAGE_SIZE))
+    limit = None if limit == 'all' else max(int(limit), 0)
+    columns = request.args.get('columns')
+    columns = [c for c in columns.split(',') if c] if columns else None
+    return offset, limit, columns
+
+
+def _column_values(series):
+    """A column as a list of JSON-ready Python values, nulls as None"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.dt.strftime('%Y-%m-%dT%H:%M:%S').astype(object)
+    elif isinstance(series.dtype, pd.CategoricalDtype):
+        values = series.astype(object)
+    else:
+        values = series
+    if values.hasnans:
+        return values.astype(object).where(values.notna(), None).tolist()
+    return values.tolist()
+
+
+def frame_page(df, offset=0, limit=None, columns=None):
+    """Slice df to the requested rows and columns"""
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    end = None if limit is None else offset + limit
+    return df.iloc[offset:end]
+
+
+def frame_payload(df, offset=0, limit=None, columns=None):
+    """Column-oriented payload: {'data': {column: [values, ...]}, ...}"""
+    page = frame_page(df, offset, limit, columns)
+    return {
+        'columns': [str(c) for c in page.columns],
+        'dtypes': {str(c): str(t) for c, t in page.dtypes.items()},
+        'data': {str(c): _column_values(page[c]) for c in page.columns},
+        'offset': offset,
+        'limit': limit,
+        'total_rows': len(df),
+    }
+
+
+def to_builtin(value):
+    """json.dump fallback for numpy and pandas scalars"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def nan_to_none(value):
+    """value with NaN and infinite floats, at any depth, replaced by None"""
+    if isinstance(value, dict):
+        return {key: nan_to_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [nan_to_none(item) for item in value]
+    if isinstance(value, (float, np.floating)) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(payload):
+    """Serialize to compact JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode()
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+def wants_arrow(request):
+    return request.args.get('format') == 'arrow' or \
+        request.accept_mimetypes.best == ARROW_MIMETYPE
+
+
+def arrow_response(df, offset=0, limit=None, columns=None):
+    """Rows and columns as an Arrow IPC stream"""
+    table = pa.Table.from_pandas(frame_page(df, offset, limit, columns), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    response = Response(sink.getvalue().to_pybytes(), mimetype=ARROW_MIMETYPE)
+    response.headers['X-Total-Rows'] = str(len(df))
+    return response
@@ -0,0 +1,48 @@
+import logging
+import threading
+import time
+
+
+class SessionExpiry:
+    """Deletes idle sessions and the shared datasets no session refers to.
+
+    A session that has not been read or written for max_idle_seconds loses
+    its stored dataset, cleaning history and snapshots; afterwards every
+    pinned shared dataset that no remaining session refers to, and that
+    was not published within the same window, is removed. run() is cheap
+    to call often: it sweeps at most once per interval_seconds per process.
+    Several worker processes can sweep the same folders at once.
+    """
+
+    def __init__(self, dataset_store, cleaning_pipeline, shared_datasets,
+                 max_idle_seconds=24 * 3600, interval_seconds=600):
+        self.dataset_store = dataset_store
+        self.cleaning_pipeline = cleaning_pipeline
+        self.shared_datasets = shared_datasets
+        self.max_idle_seconds = max_idle_seconds
+        self.interval_seconds = interval_seconds
+        self.last_run = 0.0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def run(self):
+        """Sweep if the last sweep was over interval_seconds ago"""
+        now = time.monotonic()
+        with self.lock:
+            if self.last_run and now - self.last_run < self.interval_seconds:
+                return
+            self.last_run = now
+        try:
+            self.sweep()
+        except OSError as e:
+            self.logger.warning(f"Session expiry failed: {e}")
+
+    def sweep(self):
+        for session_id in self.dataset_store.expire(self.max_idle_seconds):
+            self.cleaning_pipeline.delete(session_id)
+        # Histories whose dataset another process expired
+        stored = set(self.dataset_store.session_ids())
+        for session_id in self.cleaning_pipeline.session_ids():
+            if session_id not in stored:
+                self.cleaning_pipeline.delete(session_id)
+        self.shared_datasets.collect(self.dataset_store.referenced_datasets(), self.max_idle_seconds)
@@ -0,0 +1,178 @@
+from collections import OrderedDict
+import logging
+import os
+import re
+import threading
+import time
+
+import pyarrow as pa
+
+from fingerprint import frame_fingerprint
+
+DATASET_ID_PATTERN = re.compile(r'^[0-9a-f]{40}$')
+SCRATCH = 'scratch'
+
+# path -> memory-mapped Arrow table, per process
+_TABLES = OrderedDict()
+_TABLES_LOCK = threading.Lock()
+_MAX_MAPPED_TABLES = 32
+
+
+def _mapped_table(path):
+    """The Arrow table in an IPC file, memory-mapped once per process"""
+    with _TABLES_LOCK:
+        table = _TABLES.get(path)
+        if table is not None:
+            _TABLES.move_to_end(path)
+            return table
+    # The table's buffers point into the map and keep it open
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    with _TABLES_LOCK:
+        _TABLES[path] = table
+        while len(_TABLES) > _MAX_MAPPED_TABLES:
+            _TABLES.popitem(last=False)
+    return table
+
+
+def _to_frame(table, columns=None):
+    if columns is not None:
+        table = table.select([str(col) for col in columns])
+    # One block per column so numeric columns stay views of the mapped file
+    return table.to_pandas(split_blocks=True)
+
+
+class DatasetHandle:
+    """Picklable reference to a published dataset.
+
+    Pass this to worker processes instead of a DataFrame: load() maps the
+    file in whichever process calls it, so only the path crosses the pipe.
+    """
+
+    def __init__(self, dataset_id, path):
+        self.dataset_id = dataset_id
+        self.path = path
+
+    def load(self, columns=None):
+        return _to_frame(_mapped_table(self.path), columns)
+
+
+class SharedDatasets:
+    """DataFrames published once as Arrow IPC files and attached zero-copy by id.
+
+    A dataset's id is its frame fingerprint, so publishing the same data
+    twice writes one file; like the fingerprint, the index is not kept.
+
+    attach() memory-maps the file: numeric columns are read-only views of
+    the mapped pages and strings stay in Arrow buffers, so every HTTP
+    worker and pool process that attaches the same id shares one copy
+    through the OS page cache. Point folder at /dev/shm to keep the files
+    in shared memory rather than on disk.
+
+    Datasets published with pinned=False (worker inputs derived from a
+    session's data) go to a scratch folder of which only the max_scratch
+    most recently used are kept; pinned ones stay until removed or until
+    collect() finds that nothing refers to them any more.
+    """
+
+    def __init__(self, folder, max_scratch=32):
+        self.folder = folder
+        self.scratch_folder = os.path.join(folder, SCRATCH)
+        os.makedirs(self.scratch_folder, exist_ok=True)
+        self.max_scratch = max_scratch
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def publish(self, df, pinned=True):
+        """Write df unless it is already published; returns its dataset id"""
+        dataset_id = frame_fingerprint(df)
+        path = self._pinned_path(dataset_id) if pinned else self._scratch_path(dataset_id)
+        with self.lock:
+            existing = self._existing_path(dataset_id)
+            if existing is None:
+                self._write(df, path)
+                self.logger.info(f"Published dataset {dataset_id} ({df.shape[0]:,} x {df.shape[1]})")
+                if not pinned:
+                    self._prune()
+            elif pinned and existing != path:
+                os.replace(existing, path)
+            else:
+                os.utime(existing)
+        return dataset_id
+
+    def attach(self, dataset_id, columns=None):
+        """The published dataset as a DataFrame backed by the mapped file"""
+        return self.handle(dataset_id).load(columns)
+
+    def handle(self, dataset_id):
+        """A DatasetHandle for dataset_id, for passing to worker processes"""
+        if not DATASET_ID_PATTERN.match(dataset_id):
+            raise ValueError(f'Invalid dataset id {dataset_id!r}')
+        path = self._existing_path(dataset_id)
+        if path is None:
+            raise KeyError(f'Dataset {dataset_id} is not published')
+        return DatasetHandle(dataset_id, path)
+
+    def share(self, df):
+        """Publish df as scratch and return its handle"""
+        return self.handle(self.publish(df, pinned=False))
+
+    def remove(self, dataset_id):
+        with self.lock:
+            path = self._existing_path(dataset_id)
+            if path is not None:
+                os.remove(path)
+
+    def collect(self, referenced, min_age_seconds):
+        """Remove pinned datasets not in referenced; returns their ids.
+
+        Only files older than min_age_seconds go, so a dataset published for
+        an upload whose session is not stored yet is kept.
+        """
+        cutoff = time.time() - min_age_seconds
+        removed = []
+        with self.lock:
+            for name in os.listdir(self.folder):
+                dataset_id = name[:-len('.arrow')]
+                if not name.endswith('.arrow') or not DATASET_ID_PATTERN.match(dataset_id) \
+                        or dataset_id in referenced:
+                    continue
+                path = self._pinned_path(dataset_id)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        # Processes that already mapped the file keep reading it
+                        os.remove(path)
+                        removed.append(dataset_id)
+                except FileNotFoundError:
+                    pass
+        if removed:
+            self.logger.info(f"Removed {len(removed)} unreferenced datasets")
+        return removed
+
+    def _write(self, df, path):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def _prune(self):
+        files = [os.path.join(self.scratch_folder, f) for f in os.listdir(self.scratch_folder)
+                 if f.endswith('.arrow')]
+        if len(files) <= self.max_scratch:
+            return
+        files.sort(key=os.path.getmtime)
+        # Processes that already mapped a removed file keep reading it
+        for path in files[:-self.max_scratch]:
+            os.remove(path)
+
+    def _existing_path(self, dataset_id):
+        for path in (self._pinned_path(dataset_id), self._scratch_path(dataset_id)):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _pinned_path(self, dataset_id):
+        return os.path.join(self.folder, f'{dataset_id}.arrow')
+
+    def _scratch_path(self, dataset_id):
+        return os.path.join(self.scratch_folder, f'{dataset_id}.arrow')